@@ -0,0 +1,623 @@
+# --- Dershane Otomasyonu Performans Ölçümleri ---
+# Kamera gerektirmez; sentetik yüz verisi üretip ölçüm yapar. Proje klasöründen çalıştırın:
+#   python benchmark.py suite --users 100 1000 --samples 5 --output sonuc.json [--video kayit.mp4]
+#   python benchmark.py compare eski.json yeni.json
+#   python benchmark.py load --users 50 200 800 --samples 5 --workers 8
+#   python benchmark.py identify --users 100 1000 5000 --queries 50
+#   python benchmark.py preview --frames 300
+#   python benchmark.py formats --users 20
+#   python benchmark.py events --rows 1000000 --users 2000
+#   python benchmark.py multicam --cameras 4 --workers 1 2 4 8 [--video kayit.mp4]
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import derhane__otomasyonu as app
+
+
+# --- Sentetik Veri ---
+# Her kullanıcıya ait düşük frekanslı bir desen üretilir, örnekler bu desene gürültü eklenerek türetilir.
+# Gerçek yüz değildir ama çözümleme/eğitim/tanıma maliyeti açısından aynı boyutta veridir.
+def make_user_pattern(rng, size=(150, 150)):
+    base = rng.integers(0, 256, (size[1] // 10, size[0] // 10), dtype=np.uint8)
+    return cv2.resize(base, size, interpolation=cv2.INTER_CUBIC)
+
+def make_user_sample(rng, pattern):
+    noise = rng.normal(0, 12, pattern.shape)
+    return np.clip(pattern + noise, 0, 255).astype(np.uint8)
+
+def make_synthetic_face_data(data_dir, users, samples, size=(150, 150), seed=0):
+    rng = np.random.default_rng(seed)
+    for u in range(users):
+        user_name = f"Ogrenci_{u:05d}"
+        user_dir = os.path.join(data_dir, user_name)
+        os.makedirs(user_dir, exist_ok=True)
+        pattern = make_user_pattern(rng, size)
+        for i in range(samples):
+            cv2.imwrite(os.path.join(user_dir, f"{user_name}_{i}.png"), make_user_sample(rng, pattern))
+
+
+# --- face_data/ Yükleme: Seri ve Paralel ---
+def bench_load(user_counts, samples, workers):
+    print(f"{'kullanıcı':>10} {'örnek':>8} {'seri (s)':>10} {'paralel (s)':>12} {'hızlanma':>9}")
+    results = []
+    for users in user_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = os.path.join(tmp, "face_data")
+            make_synthetic_face_data(data_dir, users, samples)
+            row = {"users": users, "samples": users * samples}
+            for name, n_workers in (("serial", 1), ("parallel", workers)):
+                store = app.SampleStore(os.path.join(tmp, f"{name}.bin"), os.path.join(tmp, f"{name}_index.pickle"))
+                cache = app.PreprocessCache(os.path.join(tmp, f"{name}_cache.pickle"))
+                start = time.perf_counter()
+                app.sync_face_data(data_dir, store, cache, workers=n_workers)
+                row[name] = time.perf_counter() - start
+            row["speedup"] = row["serial"] / row["parallel"]
+            results.append(row)
+            print(f"{users:>10} {row['samples']:>8} {row['serial']:>10.2f} {row['parallel']:>12.2f} {row['speedup']:>8.1f}x")
+    return results
+
+
+# --- 1:N Kimlik Belirleme: predict() ve Vektörel Dizin ---
+# Her kullanıcı sayısı için sentetik bir LBPH modeli eğitilir, aynı sorgu yüzleri
+# recognizer.predict(), LBPHModel.predict(), tam taramalı dizin ve ön elemeli dizin ile ölçülür. 1:1 doğrulama
+# (UserHistogramCache) depo gerektirdiği için tam ölçüm takımında (bench_model) ölçülür.
+def make_user_faces(users, samples, seed=0):
+    rng = np.random.default_rng(seed)
+    faces, ids, queries = [], [], []
+    for u in range(users):
+        pattern = make_user_pattern(rng, app.FACE_SIZE)
+        for _ in range(samples):
+            faces.append(app.normalize_face(make_user_sample(rng, pattern)))
+            ids.append(u)
+        queries.append((u, app.normalize_face(make_user_sample(rng, pattern))))
+    return faces, ids, queries
+
+def time_queries(fn, queries):
+    start = time.perf_counter()
+    hits = sum(fn(user_id, face) == user_id for user_id, face in queries)
+    return (time.perf_counter() - start) * 1000 / len(queries), hits / len(queries)
+
+def bench_identify(user_counts, samples, queries_per_run):
+    print(f"{'kullanıcı':>10} {'histogram':>10} {'predict (ms)':>13} {'model (ms)':>11} {'dizin (ms)':>11} "
+          f"{'ön eleme (ms)':>14} {'isabet p/m/d/ö':>16}")
+    results = []
+    for users in user_counts:
+        faces, ids, queries = make_user_faces(users, samples)
+        queries = queries[::max(1, len(queries) // queries_per_run)][:queries_per_run]
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.train(faces, np.array(ids))
+        model = app.LBPHModel.from_recognizer(recognizer)
+        exact = app.IdentificationIndex.from_recognizer(recognizer, prefilter_users=None)
+        filtered = app.IdentificationIndex.from_recognizer(recognizer, prefilter_min_users=0)
+
+        row = {"users": users, "histograms": len(exact)}
+        row["predict_ms"], predict_acc = time_queries(lambda u, f: recognizer.predict(f)[0], queries)
+        row["model_ms"], model_acc = time_queries(lambda u, f: model.predict(f)[0], queries)
+        row["index_ms"], index_acc = time_queries(lambda u, f: exact.identify(f)[0], queries)
+        row["prefilter_ms"], prefilter_acc = time_queries(lambda u, f: filtered.identify(f)[0], queries)
+        results.append(row)
+        print(f"{users:>10} {row['histograms']:>10} {row['predict_ms']:>13.2f} {row['model_ms']:>11.2f} "
+              f"{row['index_ms']:>11.2f} {row['prefilter_ms']:>14.2f} "
+              f"{predict_acc:>4.0%}/{model_acc:.0%}/{index_acc:.0%}/{prefilter_acc:.0%}")
+    return results
+
+
+# --- Model Dosya Biçimleri: Gidiş-Dönüş Kontrolü ---
+# OpenCV ile eğitilen model LBPHModel'e alınır; ikili biçimde kaydedilip okunur, YAML olarak dışa
+# aktarılıp hem LBPHFaceRecognizer.read() hem LBPHModel.from_yaml() ile geri okunur. Her yolun
+# predict() sonucu orijinal tanıyıcınınkiyle aynı olmalı; fark varsa AssertionError verilir.
+def check_model_formats(users, samples, queries_per_run=20):
+    faces, ids, queries = make_user_faces(users, samples)
+    queries = queries[:queries_per_run]
+    recognizer = cv2.face.LBPHFaceRecognizer_create(*app.LBPH_PARAMS)
+    recognizer.train(faces, np.array(ids))
+    model = app.LBPHModel.from_recognizer(recognizer)
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmp:
+        binary_path = os.path.join(tmp, "model.bin")
+        yaml_path = os.path.join(tmp, "trainer.yml")
+        model.save(binary_path)
+        from_binary = app.LBPHModel.load(binary_path)
+        assert np.array_equal(from_binary.histograms, model.histograms), "ikili biçim histogramları değiştirdi"
+        assert np.array_equal(from_binary.labels, model.labels), "ikili biçim etiketleri değiştirdi"
+        assert from_binary.params == model.params, "ikili biçim parametreleri değiştirdi"
+
+        model.export_yaml(yaml_path)
+        opencv_reader = cv2.face.LBPHFaceRecognizer_create()
+        opencv_reader.read(yaml_path)
+        from_yaml = app.LBPHModel.from_yaml(yaml_path)
+        sizes = {"binary_bytes": os.path.getsize(binary_path), "yaml_bytes": os.path.getsize(yaml_path)}
+
+    for _, face in queries:
+        expected_id, expected_conf = recognizer.predict(face)
+        for name, predicted in (("LBPHModel", model.predict(face)), ("ikili", from_binary.predict(face)),
+                                ("YAML (OpenCV)", opencv_reader.predict(face)),
+                                ("YAML (LBPHModel)", from_yaml.predict(face))):
+            assert predicted[0] == expected_id and np.isclose(predicted[1], expected_conf, rtol=1e-4, atol=1e-3), \
+                f"{name} predict() sonucu {predicted}, beklenen {(expected_id, expected_conf)}"
+    result = {"users": users, "queries": len(queries), "ok": True, **sizes}
+    print(f"Model biçimleri: {len(queries)} sorguda ikili ve YAML gidiş-dönüş sonuçları aynı "
+          f"(ikili {sizes['binary_bytes'] / 1e3:.0f} kB, YAML {sizes['yaml_bytes'] / 1e3:.0f} kB)")
+    return result
+
+
+# --- Örnek Seçimi: En Az Örnek Kontrolü ---
+# select_samples ne bulanıklık ne de kopya kuralıyla kullanıcı başına COMPACT_MIN_SAMPLES'ın altına
+# inmemeli: tamamı aynı olan örneklerden de en az o kadarı tutulur. Uymazsa AssertionError verilir.
+def check_sample_selection(samples=app.REQUIRED_REGISTER_IMAGES):
+    rng = np.random.default_rng(0)
+    pattern = make_user_pattern(rng, app.FACE_SIZE)
+    face = app.normalize_face(make_user_sample(rng, pattern))
+    varied = [app.normalize_face(make_user_sample(rng, pattern)) for _ in range(samples)]
+    min_keep = min(app.COMPACT_MIN_SAMPLES, samples)
+    cases = {
+        "aynı": [face.copy() for _ in range(samples)],
+        "aynı ve bulanık": [cv2.GaussianBlur(face, (15, 15), 0) for _ in range(samples)],
+        "çeşitli": varied,
+    }
+    result = {}
+    for name, faces in cases.items():
+        kept = app.select_samples(faces)
+        assert len(kept) >= min_keep, f"{name}: {len(faces)} örnekten {len(kept)} tutuldu, en az {min_keep} olmalı"
+        assert kept == sorted(set(kept)), f"{name}: sıralar tekrarlı veya sırasız {kept}"
+        result[name] = len(kept)
+    print("Örnek seçimi: " + ", ".join(f"{name} {count}/{samples}" for name, count in result.items()))
+    return result
+
+
+# --- Önizleme: Eski Yol ve Tamponlu PreviewRenderer ---
+# Eski yol her karede tam çözünürlükte RGB dizisi, PIL görüntüsü ve PhotoImage oluşturur.
+# tracemalloc ile kare başına Python/NumPy ayırmaları, perf_counter ile süre ölçülür.
+# PhotoImage için Tk gerektiği için ekranı olan bir ortamda çalıştırılmalıdır.
+def bench_preview(frames, width, height):
+    import tkinter as tk
+    import tracemalloc
+    from PIL import Image, ImageTk
+
+    root = tk.Tk()
+    root.withdraw()
+    label = tk.Label(root)
+    rng = np.random.default_rng(0)
+    source = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(8)]
+    box = ((width // 3, height // 4, width // 4, width // 4), "Ogrenci 1 42", (0, 255, 0))
+
+    def old_path(frame):
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        imgtk = ImageTk.PhotoImage(image=Image.fromarray(frame_rgb))
+        label.configure(image=imgtk)
+        label.imgtk = imgtk
+
+    renderer = app.PreviewRenderer(label, fps=0)
+    print(f"{'yol':>10} {'ms/kare':>9} {'ayrılan KB/kare':>16}")
+    results = {}
+    for name, fn in (("eski", old_path), ("tamponlu", lambda f: renderer.render(f, [box]))):
+        fn(source[0])  # İlk çağrıdaki tek seferlik ayırmaları ölçüme katma
+        tracemalloc.start()
+        allocated = 0
+        start = time.perf_counter()
+        for i in range(frames):
+            # Kare başına, çağrı sırasında ayrılan en yüksek bellek (geçici diziler dahil)
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            fn(source[i % len(source)])
+            allocated += tracemalloc.get_traced_memory()[1] - current
+        elapsed = time.perf_counter() - start
+        tracemalloc.stop()
+        results[name] = {"ms": elapsed * 1000 / frames, "kb_per_frame": allocated / 1024 / frames}
+        print(f"{name:>10} {results[name]['ms']:>9.2f} {results[name]['kb_per_frame']:>16.1f}")
+    root.destroy()
+    return results
+
+
+# --- Yoklama Olay Deposu ---
+# Geçici bir veritabanına sentetik olaylar toplu yazılır (son N gün, her gün her öğrenci birkaç
+# kez), sonra record() çağrısının arayüze maliyeti, grup yazma hızı ve admin paneli sorguları
+# (gün raporu, öğrenci geçmişi, sayfalar) ölçülür.
+def bench_events(rows, users, days, records, queries):
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmp:
+        store = app.AttendanceStore(os.path.join(tmp, "yoklama.db"), queue_size=records + 1)
+        store._ensure_started(wait=True)
+        now = time.time()
+        conn = store._connect()
+        start = time.perf_counter()
+        for first in range(0, rows, 100000):
+            count = min(100000, rows - first)
+            ts = now - rng.uniform(0, days * 86400, count)
+            user_ids = rng.integers(0, users, count)
+            success = rng.random(count) < 0.9
+            distances = rng.uniform(20, 90, count)
+            with conn:
+                conn.executemany(app.AttendanceStore.INSERT, (
+                    (float(t), time.strftime("%Y-%m-%d", time.localtime(t)), user_name_for(int(u)), int(u),
+                     float(d), "success" if ok else "failed", "login")
+                    for t, u, ok, d in zip(ts, user_ids, success, distances)))
+        conn.close()
+        print(f"{rows} olay {time.perf_counter() - start:.1f} s içinde yazıldı ({users} öğrenci, {days} gün).")
+
+        values = []
+        for i in range(records):
+            begin = time.perf_counter()
+            store.record(user_name_for(i % users), "success", 42.0, i % users)
+            values.append((time.perf_counter() - begin) * 1000)
+        begin = time.perf_counter()
+        store.flush(timeout=60.0)
+        result = {"rows": rows, "users": users, "days": days, "record": summarize(values),
+                  "flush_ms": round((time.perf_counter() - begin) * 1000, 3)}
+
+        today = time.strftime("%Y-%m-%d")
+        middle = max(0, store.attendee_count(today) // 2)
+        for name, fn in (("attendee_count", lambda u: store.attendee_count(today)),
+                         ("attendees_first_page", lambda u: store.attendees(today)),
+                         ("attendees_middle_page", lambda u: store.attendees(today, offset=middle)),
+                         ("history_count", lambda u: store.history_count(u)),
+                         ("history_first_page", lambda u: store.history(u))):
+            values = []
+            for q in range(queries):
+                user = user_name_for(int(rng.integers(0, users)))
+                begin = time.perf_counter()
+                fn(user)
+                values.append((time.perf_counter() - begin) * 1000)
+            result[name] = summarize(values)
+        store.close()
+
+    print(f"record(): ort. {result['record']['mean_ms']:.4f} ms, p90 {result['record']['p90_ms']:.4f} ms; "
+          f"{records} olayın yazılması {result['flush_ms']:.0f} ms")
+    for name in ("attendee_count", "attendees_first_page", "attendees_middle_page",
+                 "history_count", "history_first_page"):
+        print(f"{name:>22}: p50 {result[name]['p50_ms']:8.3f} ms, p90 {result[name]['p90_ms']:8.3f} ms")
+    return result
+
+
+# --- Çok Kameralı Hat Ölçeklenmesi ---
+# Aynı video (yoksa sentetik bir video) birden çok kamera kaynağı gibi olabildiğince hızlı
+# oynatılır; her işçi sayısı için toplam işlenen kare hızı raporlanır. Kare hızı çekirdek
+# sayısına kadar işçi sayısıyla artmalıdır.
+def write_synthetic_video(path, frames=60, width=640, height=480):
+    rng = np.random.default_rng(0)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (width, height))
+    for _ in range(frames):
+        gray = cv2.GaussianBlur(rng.integers(0, 256, (height, width), dtype=np.uint8), (5, 5), 0)
+        writer.write(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+    writer.release()
+    return path
+
+def bench_multicam(cameras, worker_counts, duration, video=None):
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmp:
+        source = os.path.abspath(video) if video else write_synthetic_video(os.path.join(tmp, "sentetik.avi"))
+        results = []
+        print(f"{'işçi':>5} {'toplam kare/sn':>15} {'kamera başına':>14} {'gecikme p50 (ms)':>17} {'atılan %':>9}")
+        for workers in worker_counts:
+            report = app.run_multi_camera([source] * cameras, workers, duration, realtime=False)
+            total_fps = sum(r["fps"] for r in report.values())
+            captured = sum(r["captured"] for r in report.values())
+            dropped = sum(r["dropped"] for r in report.values())
+            latency = float(np.median([r["latency_p50_ms"] for r in report.values()]))
+            results.append({"workers": workers, "cameras": cameras, "total_fps": round(total_fps, 2),
+                            "latency_p50_ms": round(latency, 3), "cameras_report": report})
+            print(f"{workers:>5} {total_fps:>15.1f} {total_fps / cameras:>14.1f} {latency:>17.1f} "
+                  f"{(100.0 * dropped / captured if captured else 0.0):>9.1f}")
+    return results
+
+
+# --- Tam Ölçüm Takımı ---
+# Her kullanıcı sayısı için geçici bir çalışma klasöründe (face_data/, trainer/) sentetik veya
+# verilen bir face_data/ veri kümesiyle: detectMultiScale, train_model, load_trained_data,
+# recognizer.predict, dizinli tanıma ve 1:1 doğrulama süreleri ölçülür. Video verilirse kareler
+# FaceCaptureApp.update_frame üzerinden (giriş modunda) oynatılır ve aşama süreleri toplanır.
+# Sonuçlar commit bilgisiyle birlikte JSON olarak yazılır; iki çalıştırma "compare" ile karşılaştırılır.
+@contextlib.contextmanager
+def workspace():
+    # Uygulamanın göreli yollarını (face_data/, trainer/) geçici bir klasöre yönlendirir
+    saved = {name: getattr(app, name) for name in
+             ("sample_store", "preprocess_cache", "label_registry", "thumbnail_cache", "user_histograms")}
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmp:
+        os.chdir(tmp)
+        try:
+            os.makedirs(app.DATA_DIR)
+            os.makedirs(app.TRAINER_DIR)
+            # Depolar ilk kullanımda geçici klasörde açılır
+            app.sample_store = app.preprocess_cache = app.label_registry = app.thumbnail_cache = None
+            app.user_histograms = app.UserHistogramCache()
+            app.swap_model(None, {})
+            yield tmp
+        finally:
+            os.chdir(old_cwd)
+            for name, value in saved.items():
+                setattr(app, name, value)
+            app.swap_model(None, {})
+
+def user_name_for(u):
+    return f"Ogrenci_{u:05d}"
+
+def populate_store(users, samples, dataset=None):
+    # Depoya örnek yazar; 1:1 doğrulama ve tanıma için (kullanıcı, sorgu yüzü) listesi döndürür
+    if dataset:
+        app.sync_face_data(dataset)
+        store = app.get_sample_store()
+        return [(user, store.get_samples(user)[0]) for user in store.users()]
+    faces, ids, queries = make_user_faces(users, samples)
+    for u in range(users):
+        app.get_sample_store().append(user_name_for(u), faces[u * samples:(u + 1) * samples])
+    return [(user_name_for(u), face) for u, face in queries]
+
+def timings(fn, runs):
+    values = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        values.append((time.perf_counter() - start) * 1000)
+    return summarize(values)
+
+def summarize(values):
+    values = np.asarray(values, dtype=np.float64)
+    return {"runs": len(values), "mean_ms": round(float(values.mean()), 3),
+            "p50_ms": round(float(np.percentile(values, 50)), 3),
+            "p90_ms": round(float(np.percentile(values, 90)), 3), "min_ms": round(float(values.min()), 3)}
+
+def read_video_frames(path, max_frames):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+def bench_detection(video, frames, width, height):
+    if video:
+        source = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) for f in read_video_frames(video, frames)]
+    else:
+        # Sentetik karede yüz yoktur; kaskadın tüm kareyi tarama maliyeti ölçülür
+        rng = np.random.default_rng(0)
+        source = [cv2.GaussianBlur(rng.integers(0, 256, (height, width), dtype=np.uint8), (5, 5), 0)
+                  for _ in range(min(frames, 30))]
+    if not source:
+        return None
+    result = {"frames": len(source), "source": video or f"synthetic {width}x{height}"}
+    for name, detector in (("full", app.FaceDetector(app.get_face_cascade(), scale=1.0, tracking=False)),
+                           ("fast", app.create_face_detector())):
+        values = []
+        for i in range(frames):
+            start = time.perf_counter()
+            detector.detect(source[i % len(source)])
+            values.append((time.perf_counter() - start) * 1000)
+        result[name] = summarize(values)
+    return result
+
+def bench_model(users, samples, runs, queries_per_run, dataset=None):
+    with workspace():
+        queries = populate_store(users, samples, dataset)
+        queries = queries[::max(1, len(queries) // queries_per_run)][:queries_per_run]
+        store = app.get_sample_store()
+        row = {"users": len(store.users()), "samples": store.sample_count()}
+        row["train"] = timings(app.train_model, runs)
+        row["load"] = timings(app.load_trained_data, runs)
+        recognizer = app.get_model()[0]
+        for name, fn in (("predict", lambda user, face: recognizer.predict(face)),
+                         ("index_identify", lambda user, face: app.predict_face(face, recognizer)),
+                         ("verify", lambda user, face: app.user_histograms.verify(face, user))):
+            fn(*queries[0])  # Dizin / önbellek kurulumu ölçüme katılmaz
+            values = []
+            for user, face in queries:
+                start = time.perf_counter()
+                fn(user, face)
+                values.append((time.perf_counter() - start) * 1000)
+            row[name] = summarize(values)
+        return row
+
+
+class VideoCamera:
+    # CameraService yerine geçer: latest() her çağrıda videonun bir sonraki karesini verir
+    def __init__(self, path):
+        self.cap = cv2.VideoCapture(path)
+        self.frame_id = 0
+        self.frame = None
+        self.failed = False
+
+    def acquire(self):
+        return self.cap.isOpened(), True
+
+    def release(self):
+        self.cap.release()
+
+    def latest(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            self.failed = True
+            return self.frame_id, self.frame
+        self.frame_id += 1
+        self.frame = frame
+        return self.frame_id, frame
+
+    def record_first_frame(self, seconds, cold):
+        pass
+
+
+def bench_replay(video, user_name):
+    import tkinter as tk
+
+    class ReplayCaptureApp(app.FaceCaptureApp):
+        # Karar verildikten sonra pencere kapanmaz; doğrulayıcı sıfırlanıp oynatma sürer
+        decisions = []
+
+        def check_login_decision(self):
+            decision = self.login_verifier.decide()
+            if decision is not None:
+                self.decisions.append(decision)
+                self.login_verifier = app.LoginVerifier()
+
+    app.metrics = app.Metrics()
+    root = tk.Tk()
+    root.withdraw()
+    camera = VideoCamera(video)
+    start = time.perf_counter()
+    capture = ReplayCaptureApp(root, 'login', user_name, app.REQUIRED_LOGIN_IMAGES, camera)
+    while capture.is_running:
+        root.update()
+    elapsed = time.perf_counter() - start
+    root.destroy()
+    snapshot = app.metrics.snapshot()
+    return {"video": video, "frames": camera.frame_id, "seconds": round(elapsed, 3),
+            "fps": round(camera.frame_id / elapsed, 1) if elapsed > 0 else 0.0,
+            "decisions": {"accepted": ReplayCaptureApp.decisions.count(True),
+                          "rejected": ReplayCaptureApp.decisions.count(False)},
+            "stages": snapshot["stages"]}
+
+def run_metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"commit": commit, "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+            "opencv": cv2.__version__, "numpy": np.__version__, "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "args": vars(args)}
+
+def bench_suite(args):
+    # Ölçümler geçici klasörde çalışır; verilen yollar önceden mutlak yapılır
+    args.dataset = os.path.abspath(args.dataset) if args.dataset else None
+    args.video = os.path.abspath(args.video) if args.video else None
+    results = {"meta": run_metadata(args)}
+    results["formats"] = check_model_formats(min(args.users), args.samples)
+    results["selection"] = check_sample_selection(args.samples)
+    results["detection"] = bench_detection(args.video, args.detect_frames, 640, 480)
+    if results["detection"]:
+        print(f"Algılama ({results['detection']['source']}): tam {results['detection']['full']['p50_ms']:.2f} ms, "
+              f"hızlı {results['detection']['fast']['p50_ms']:.2f} ms (p50)")
+
+    user_counts = [None] if args.dataset else args.users
+    results["models"] = []
+    for users in user_counts:
+        row = bench_model(users, args.samples, args.runs, args.queries, args.dataset)
+        results["models"].append(row)
+        print(f"{row['users']:>6} kullanıcı / {row['samples']:>6} örnek: eğitim {row['train']['p50_ms']:.0f} ms, "
+              f"yükleme {row['load']['p50_ms']:.0f} ms, predict {row['predict']['p50_ms']:.2f} ms, "
+              f"dizin {row['index_identify']['p50_ms']:.2f} ms, verify {row['verify']['p50_ms']:.2f} ms")
+
+    if args.video:
+        with workspace():
+            user_name = populate_store(args.users[0], args.samples, args.dataset)[0][0]
+            app.train_model()
+            results["replay"] = bench_replay(args.video, user_name)
+        print(f"Oynatma: {results['replay']['frames']} kare, {results['replay']['fps']} kare/s, "
+              f"kararlar {results['replay']['decisions']}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Sonuçlar yazıldı: {args.output}")
+    return results
+
+def flatten(value, prefix=""):
+    if isinstance(value, dict):
+        items = {}
+        for key, item in value.items():
+            items.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+        return items
+    if isinstance(value, list):
+        items = {}
+        for i, item in enumerate(value):
+            key = item.get("users", i) if isinstance(item, dict) else i
+            items.update(flatten(item, f"{prefix}[{key}]"))
+        return items
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and prefix.endswith("_ms"):
+        return {prefix: value}
+    return {}
+
+def compare_results(old_path, new_path):
+    # Sadece süre (…_ms) alanları karşılaştırılır; oran < 1 hızlanma demektir
+    with open(old_path, encoding='utf-8') as f:
+        old = flatten(json.load(f))
+    with open(new_path, encoding='utf-8') as f:
+        new = flatten(json.load(f))
+    print(f"{'ölçüm':<60} {'eski':>10} {'yeni':>10} {'oran':>7}")
+    for key in sorted(old.keys() & new.keys()):
+        ratio = new[key] / old[key] if old[key] else float("nan")
+        print(f"{key:<60} {old[key]:>10.2f} {new[key]:>10.2f} {ratio:>6.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dershane Otomasyonu performans ölçümleri")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    suite_parser = subparsers.add_parser("suite", help="Algılama, eğitim, yükleme ve tanıma ölçümlerini çalıştır, JSON yaz")
+    suite_parser.add_argument("--users", type=int, nargs="+", default=[100, 1000])
+    suite_parser.add_argument("--samples", type=int, default=app.REQUIRED_REGISTER_IMAGES)
+    suite_parser.add_argument("--dataset", help="Sentetik veri yerine bu face_data/ klasörünü kullan")
+    suite_parser.add_argument("--runs", type=int, default=3, help="Eğitim ve yükleme tekrar sayısı")
+    suite_parser.add_argument("--queries", type=int, default=50)
+    suite_parser.add_argument("--detect-frames", type=int, default=100)
+    suite_parser.add_argument("--video", help="Bu video update_frame üzerinden oynatılır (Tk gerekir)")
+    suite_parser.add_argument("--output", default="benchmark_sonuclari.json")
+
+    compare_parser = subparsers.add_parser("compare", help="İki suite sonucunu karşılaştır")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+
+    load_parser = subparsers.add_parser("load", help="face_data/ yüklemesini seri ve paralel karşılaştır")
+    load_parser.add_argument("--users", type=int, nargs="+", default=[50, 200, 800])
+    load_parser.add_argument("--samples", type=int, default=app.REQUIRED_REGISTER_IMAGES)
+    load_parser.add_argument("--workers", type=int, default=app.TRAINING_WORKERS)
+
+    identify_parser = subparsers.add_parser("identify", help="1:N tanıma gecikmesini kullanıcı sayısına göre ölç")
+    identify_parser.add_argument("--users", type=int, nargs="+", default=[100, 1000, 5000])
+    identify_parser.add_argument("--samples", type=int, default=app.REQUIRED_REGISTER_IMAGES)
+    identify_parser.add_argument("--queries", type=int, default=50)
+
+    preview_parser = subparsers.add_parser("preview", help="Önizleme çizim süresi ve bellek ayırmalarını karşılaştır")
+    preview_parser.add_argument("--frames", type=int, default=300)
+    preview_parser.add_argument("--width", type=int, default=640)
+    preview_parser.add_argument("--height", type=int, default=480)
+
+    events_parser = subparsers.add_parser("events", help="Yoklama olay deposu yazma ve rapor sorgularını ölç")
+    events_parser.add_argument("--rows", type=int, default=1000000)
+    events_parser.add_argument("--users", type=int, default=2000)
+    events_parser.add_argument("--days", type=int, default=180)
+    events_parser.add_argument("--records", type=int, default=10000, help="record() ile kuyruğa konan olay sayısı")
+    events_parser.add_argument("--queries", type=int, default=50)
+
+    multicam_parser = subparsers.add_parser("multicam", help="Çok kameralı hattın işçi sayısıyla ölçeklenmesini ölç")
+    multicam_parser.add_argument("--cameras", type=int, default=4)
+    multicam_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, app.MULTI_CAMERA_WORKERS])
+    multicam_parser.add_argument("--duration", type=float, default=10.0, help="Her işçi sayısı için ölçüm süresi (saniye)")
+    multicam_parser.add_argument("--video", help="Kamera yerine oynatılacak video (varsayılan: sentetik)")
+
+    formats_parser = subparsers.add_parser("formats", help="İkili ve YAML model biçimlerini gidiş-dönüş kontrol et")
+    formats_parser.add_argument("--users", type=int, default=20)
+    formats_parser.add_argument("--samples", type=int, default=app.REQUIRED_REGISTER_IMAGES)
+    formats_parser.add_argument("--queries", type=int, default=20)
+
+    selection_parser = subparsers.add_parser("selection", help="Örnek seçiminin en az örnek kuralını kontrol et")
+    selection_parser.add_argument("--samples", type=int, default=app.REQUIRED_REGISTER_IMAGES)
+
+    args = parser.parse_args()
+    if args.command == "suite":
+        bench_suite(args)
+    elif args.command == "compare":
+        compare_results(args.old, args.new)
+    elif args.command == "load":
+        bench_load(args.users, args.samples, args.workers)
+    elif args.command == "identify":
+        bench_identify(args.users, args.samples, args.queries)
+    elif args.command == "preview":
+        bench_preview(args.frames, args.width, args.height)
+    elif args.command == "multicam":
+        bench_multicam(args.cameras, sorted(set(args.workers)), args.duration, args.video)
+    elif args.command == "formats":
+        check_model_formats(args.users, args.samples, args.queries)
+    elif args.command == "selection":
+        check_sample_selection(args.samples)
+    elif args.command == "events":
+        bench_events(args.rows, args.users, args.days, args.records, args.queries)
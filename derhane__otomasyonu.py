@@ -1,17 +1,43 @@
+import argparse
+import csv
+import io
+import zlib
+import json
+import logging
+import multiprocessing
 import tkinter as tk
 from tkinter import messagebox, font as tkFont, Listbox, Scrollbar, Frame
 import cv2
 import os
 import numpy as np
 from PIL import Image, ImageTk
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import shared_memory
 import pickle
+import queue
+import shutil
+import sqlite3
+import struct
+import threading
 import time
 
 # --- Ayarlar ---
 DATA_DIR = "face_data"
 TRAINER_DIR = "trainer"
-TRAINER_FILE = os.path.join(TRAINER_DIR, "trainer.yml")
+TRAINER_FILE = os.path.join(TRAINER_DIR, "trainer.yml") # Sadece dışa aktarma / eski modelleri içe alma için (YAML)
+MODEL_FILE = os.path.join(TRAINER_DIR, "model.bin") # Tek dosyalık eski ikili model (ilk açılışta nesillere taşınır)
+MODEL_DIR = os.path.join(TRAINER_DIR, "models") # Yayınlanan model nesilleri: model-000042.bin + labels-000042.pickle
+MODEL_POINTER_FILE = os.path.join(TRAINER_DIR, "model_current.json") # Etkin nesil; yerine taşınarak (rename) atomik güncellenir
+TRAINER_LOCK_FILE = os.path.join(TRAINER_DIR, "trainer.lock") # Aynı trainer/ klasörünü paylaşan süreçler arası yazma kilidi
 LABELS_FILE = os.path.join(TRAINER_DIR, "labels.pickle")
+SAMPLE_STORE_FILE = os.path.join(TRAINER_DIR, "samples.bin") # Tüm yüz örnekleri tek dosyada (ham uint8 satırlar)
+SAMPLE_INDEX_FILE = os.path.join(TRAINER_DIR, "samples_index.pickle") # Kullanıcı -> satır aralıkları
+PREPROCESS_CACHE_FILE = os.path.join(TRAINER_DIR, "preprocess_cache.pickle") # face_data/ dosyası -> depodaki yeri
+LABEL_REGISTRY_FILE = os.path.join(TRAINER_DIR, "label_registry.bin") # Kalıcı kullanıcı -> ID kayıt defteri
+THUMBNAIL_CACHE_FILE = os.path.join(TRAINER_DIR, "thumbnails.pickle") # Admin paneli küçük resimleri (PNG)
 HAAR_CASCADE_PATH = "haarcascade_frontalface_default.xml" # Bu dosyayı kodla aynı dizine koyun veya tam yolunu belirtin
 
 FONT_FAMILY = "Century Gothic"
@@ -20,11 +46,239 @@ FONT_STYLE = "normal"
 CUSTOM_FONT = (FONT_FAMILY, FONT_SIZE, FONT_STYLE)
 LISTBOX_FONT = (FONT_FAMILY, FONT_SIZE - 4, FONT_STYLE) # Listbox için biraz daha küçük font
 DARK_VIOLET = "#9400D3" # Koyu Menekşe Rengi Hex Kodu
+THUMBNAIL_SIZE = (100, 100) # Admin panelindeki küçük resim boyutu
+DASHBOARD_PAGE_SIZE = 500 # Admin panelinde bir sayfada listelenen kullanıcı sayısı
+DASHBOARD_ROW_HEIGHT = 112 # Admin paneli satır yüksekliği (piksel); sadece görünen satırlar çizilir
 
 CONFIDENCE_THRESHOLD = 65 # LBPH için Eşik Değeri (Düşük olması daha iyi eşleşme demek, %'ye çevirirken 100-conf yaparız. Bu değeri ayarlamanız gerekebilir)
 REQUIRED_REGISTER_IMAGES = 5
 REQUIRED_LOGIN_IMAGES = 1
 ADMIN_USER = "admin" # Admin kullanıcı adı (küçük harf)
+FACE_SIZE = (100, 100) # Saklanan ve tanınan yüz kırpıntılarının sabit boyutu (genişlik, yükseklik)
+FRAME_BUFFER_SIZE = 2 # Kamera halka tamponunda tutulacak kare sayısı (eskiler atılır)
+CAMERA_INDEX = 0
+CAMERA_IDLE_TIMEOUT = 120.0 # Son pencere kapandıktan sonra kamera bu kadar saniye açık tutulur
+PREVIEW_WIDTH = 480 # Önizleme bu genişliğe küçültülerek gösterilir (algılama tam çözünürlükte yapılır)
+PREVIEW_FPS = 15 # Önizleme en fazla bu hızda yenilenir; algılama her yeni karede çalışmaya devam eder
+
+# Canlı döngüde yüz algılama ayarları
+FAST_DETECTION = True # False: her karede tam çözünürlükte algılama (eski davranış)
+DETECTION_SCALE = 0.5 # Kaskad küçültülmüş karede çalışır, kutular tam çözünürlüğe geri ölçeklenir
+DETECTION_MIN_SIZE = (80, 80) # Tam çözünürlükteki en küçük yüz boyutu
+TRACKING_PADDING = 0.5 # Son kutunun etrafında aranacak bölge payı (kutu boyutuna oranla)
+FULL_REDETECT_INTERVAL = 15 # Takip sırasında her N karede bir tüm karede yeniden algılama
+
+# Kayıt sırasında örnek alma zamanlaması
+SAMPLE_MIN_INTERVAL = 0.3 # İki örnek arasında geçmesi gereken en kısa süre (saniye)
+SAMPLE_MIN_CHANGE = 6.0 # Önceki örneğe göre en az ortalama piksel farkı (32x32 küçük resimde, 0-255)
+SAMPLE_MIN_SHIFT = 0.15 # veya yüz kutusunun kutu boyutuna oranla en az bu kadar kayması (poz değişimi)
+SAMPLE_MAX_WAIT = 2.0 # Bu süre boyunca değişim olmazsa yine de örnek alınır (kayıt takılmasın)
+
+# Kayıt örneği kalite kapısı (örnek alınmadan önce)
+SAMPLE_MIN_FACE_SIZE = 100 # Kamera karesindeki yüz kutusunun en kısa kenarı en az bu kadar piksel olmalı
+SAMPLE_MIN_SHARPNESS = 50.0 # Normalleştirilmiş yüzün Laplace varyansı; altındaki örnek bulanık sayılır
+SAMPLE_MIN_DISTANCE = 20.0 # Tutulan örneklere en az LBPH ki-kare mesafesi; daha yakını neredeyse kopya sayılır
+SAMPLE_GATE_RELAX = 4.0 # Bu kadar saniye örnek alınamazsa mesafe şartı aranmaz (kayıt takılmasın)
+
+# Örnek sıkıştırma (--compact-samples)
+COMPACT_MAX_SAMPLES = 20 # Kullanıcı başına tutulacak en fazla örnek (en net ve en çeşitli olanlar)
+COMPACT_MIN_SAMPLES = 3 # Bulanık veya birbirinin kopyası olsalar bile kullanıcı başına en az bu kadar örnek tutulur
+
+# Girişte çok kareli doğrulama (tek predict() yerine)
+LOGIN_MAX_FRAMES = 7 # En fazla bu kadar karenin mesafesi toplanır
+LOGIN_MIN_FRAMES = 3 # Erken karar için gereken en az kare sayısı
+LOGIN_TIME_BUDGET = 2.0 # İlk yüzden itibaren karar için en fazla bu kadar beklenir (saniye)
+LOGIN_EARLY_MARGIN = 10 # Medyan mesafe eşiğin bu kadar altında/üstündeyse erken karar verilir
+LOGIN_MIN_AGREEMENT = 0.6 # Kabul için karelerin en az bu oranı aynı kullanıcıya oy vermeli
+
+# Eğitim verisi yükleme
+TRAINING_WORKERS = os.cpu_count() or 1 # face_data/ çözümlemesi için süreç sayısı (--workers ile değiştirilebilir)
+PARALLEL_MIN_FILES = 64 # Bundan az dosya çözülecekse süreç havuzu açılmaz (açılış maliyeti kazançtan büyük)
+
+# Vektörel kimlik belirleme (LBPH predict() yerine)
+IDENTIFICATION_INDEX = False # True: ön elemeli dizin (yaklaşık); False: LBPHModel.predict() (tam tarama)
+IDENTIFICATION_METRIC = "chisqr" # "chisqr": OpenCV LBPH ile aynı mesafe, "l2": BLAS ile hızlı (eşik yeniden ayarlanmalı)
+INDEX_PREFILTER_USERS = 32 # Önce kullanıcı ortalamalarıyla en yakın bu kadar kullanıcı seçilir (None: kapalı)
+INDEX_PREFILTER_MIN_USERS = 256 # Bundan az kullanıcı varsa ön eleme yapılmaz (tam tarama zaten ucuz)
+INDEX_CHUNK_ROWS = 256 # Satır düzenli ki-kare hesabında önceden ayrılan tamponların satır sayısı
+INDEX_CHUNK_BINS = 16 # Sütun düzenli ki-kare taramasında bir seferde okunan histogram kutusu sayısı
+LBPH_PARAMS = (1, 8, 8, 8) # LBPHFaceRecognizer_create() varsayılanları: (radius, neighbors, grid_x, grid_y)
+
+# 1:1 doğrulama (girişte yazılan isim biliniyorsa)
+VERIFY_CLAIMED_USER = True # False: girişte herkese karşı 1:N tanıma (eski davranış)
+VERIFICATION_CACHE_USERS = 256 # Histogramları bellekte tutulacak en fazla kullanıcı sayısı (LRU)
+
+# Aynı trainer/ klasörünü paylaşan birden çok kiosk
+MODEL_POLL_INTERVAL = 2.0 # Yeni model nesli için işaretçi dosyası bu aralıkla kontrol edilir (saniye, None: kapalı)
+MODEL_KEEP_GENERATIONS = 3 # Diskte tutulan nesil sayısı (eski nesli okumakta olan süreç yarıda kalmasın)
+SAMPLE_KEEP_GENERATIONS = 2 # compact() sonrası diskte tutulan örnek dosyası nesli (eski dizini okuyan kiosklar için)
+TRAINER_LOCK_STALE = 120.0 # Kilit dosyası bu süre boyunca hiç yenilenmezse çökmüş bir süreçten kalmış sayılır (saniye)
+
+# Toplu (ekransız) tanıma
+BATCH_SIZE = 32 # Aynı anda algılama/tanımaya gönderilen kare sayısı
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+# Sürekli yoklama modu (sınıf girişi)
+ATTENDANCE_FILE = "yoklama.csv" # --export-attendance çıktısı
+ATTENDANCE_DB_FILE = "yoklama.db" # Giriş ve yoklama olayları (SQLite, WAL)
+EVENT_QUEUE_SIZE = 10000 # Yazılmayı bekleyen en fazla olay; kuyruk dolarsa yeni olay atılır (arayüz beklemez)
+EVENT_BATCH_SIZE = 500 # Tek işlemde (transaction) yazılan en fazla olay
+EVENT_FLUSH_INTERVAL = 1.0 # Bekleyen olaylar en geç bu kadar saniye sonra diske yazılır
+EVENTS_PAGE_SIZE = 50 # Admin panelindeki yoklama raporunda sayfa başına satır
+ATTENDANCE_DEDUP_WINDOW = 600.0 # Aynı öğrenci bu süre içinde tekrar görülürse yeni kayıt açılmaz (saniye)
+TRACK_IOU_THRESHOLD = 0.3 # Bir kutu, önceki karedeki izle en az bu kadar örtüşüyorsa aynı kişi sayılır
+TRACK_MAX_MISSES = 10 # İz bu kadar kare boyunca görülmezse silinir (kişi kadrajdan çıktı)
+TRACK_MAX_ATTEMPTS = 3 # Tanınamayan bir iz için en fazla bu kadar tahmin yapılır
+TRACK_RETRY_INTERVAL = 5 # Tanınamayan iz için tekrar denemeden önce beklenen kare sayısı
+
+# Çok kameralı mod (her kamera ayrı süreçte, kareler paylaşımlı bellekte)
+MULTI_CAMERA_SLOTS = 4 # Kamera başına paylaşımlı bellek halka tamponundaki kare yuvası sayısı
+MULTI_CAMERA_WORKERS = os.cpu_count() or 1 # Algılama + tanıma süreç sayısı (--workers ile değiştirilebilir)
+MULTI_CAMERA_REALTIME = True # Video dosyası kaynaklar kendi FPS'lerinde oynatılır (False: olabildiğince hızlı)
+MULTI_CAMERA_RECONNECT = 2.0 # Canlı kaynak (kamera/RTSP) koparsa yeniden bağlanmadan önce beklenen süre (saniye)
+
+# Ölçümler
+METRICS_WINDOW = 500 # Her aşama için yüzdelikler son bu kadar ölçümden hesaplanır
+METRICS_EXPORT_INTERVAL = 10.0 # --metrics-file verilirse dosya bu aralıkla yeniden yazılır (saniye)
+METRICS_OVERLAY = False # True: önizlemede FPS ve gecikme yazısı (pencerede F2 ile açılıp kapatılır)
+
+logger = logging.getLogger("dershane")
+
+# --- Aşama Süreleri ve Ölçüm Kaydı ---
+# Kamera → ayna → renk dönüşümü → algılama → tanıma → çizim hattının her aşaması ve model
+# yükleme/eğitim süreleri burada toplanır. Her aşama için son METRICS_WINDOW ölçümün
+# yüzdelikleri (p50/p90/p99) ve toplam sayaç/süre tutulur. Sonuçlar JSON veya Prometheus
+# metin biçiminde dosyaya yazılabilir ya da yerel bir HTTP ucundan okunabilir.
+class LatencyStats:
+    def __init__(self, window=METRICS_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.count += 1
+        self.total_ms += ms
+
+    def summary(self):
+        values = np.asarray(self.samples, dtype=np.float64)
+        p50, p90, p99 = np.percentile(values, (50, 90, 99)) if len(values) else (0.0, 0.0, 0.0)
+        return {"count": self.count, "total_ms": round(self.total_ms, 3),
+                "last_ms": round(float(values[-1]), 3) if len(values) else 0.0,
+                "p50_ms": round(float(p50), 3), "p90_ms": round(float(p90), 3), "p99_ms": round(float(p99), 3)}
+
+
+class Metrics:
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.stages = {}  # aşama adı -> LatencyStats
+        self.counters = {}
+
+    def observe(self, stage, ms):
+        with self.lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = LatencyStats(self.window)
+            stats.add(ms)
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - start) * 1000)
+
+    def increment(self, counter, amount=1):
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def stage_summary(self, stage):
+        with self.lock:
+            stats = self.stages.get(stage)
+            return stats.summary() if stats else None
+
+    def snapshot(self):
+        with self.lock:
+            return {"time": time.time(),
+                    "stages": {name: stats.summary() for name, stats in sorted(self.stages.items())},
+                    "counters": dict(sorted(self.counters.items()))}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = ["# TYPE dershane_stage_ms summary"]
+        for name, summary in snapshot["stages"].items():
+            for quantile, key in (("0.5", "p50_ms"), ("0.9", "p90_ms"), ("0.99", "p99_ms")):
+                lines.append(f'dershane_stage_ms{{stage="{name}",quantile="{quantile}"}} {summary[key]}')
+            lines.append(f'dershane_stage_ms_sum{{stage="{name}"}} {summary["total_ms"]}')
+            lines.append(f'dershane_stage_ms_count{{stage="{name}"}} {summary["count"]}')
+        if snapshot["counters"]:
+            lines.append("# TYPE dershane_events_total counter")
+            for name, value in snapshot["counters"].items():
+                lines.append(f'dershane_events_total{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        # .json uzantılı dosyaya JSON, diğerlerine Prometheus metin biçimi
+        text = self.to_json() if path.lower().endswith(".json") else self.to_prometheus()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def start_file_export(self, path, interval=METRICS_EXPORT_INTERVAL):
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write(path)
+                except OSError as e:
+                    logger.error(f"Hata: Ölçümler {path} dosyasına yazılamadı - {e}")
+
+        threading.Thread(target=run, name="MetricsExport", daemon=True).start()
+
+    def serve(self, port, host="127.0.0.1"):
+        # /metrics: Prometheus metni, /metrics.json: JSON
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, content_type = registry.to_json(), "application/json; charset=utf-8"
+                elif self.path.startswith("/metrics"):
+                    body, content_type = registry.to_prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug("metrics http: " + format % args)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="MetricsHTTP", daemon=True).start()
+        logger.info(f"Ölçümler http://{host}:{port}/metrics adresinden okunabilir.")
+        return server
+
+
+metrics = Metrics()
+
+def set_log_level(level):
+    # Çalışırken günlükleri açıp kapatmak için (ör. set_log_level("WARNING") veya "OFF")
+    if str(level).upper() == "OFF":
+        logger.disabled = True
+        return
+    logger.disabled = False
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
 
 # --- Gerekli Klasörleri Oluştur ---
 if not os.path.exists(DATA_DIR):
@@ -32,92 +286,2472 @@ if not os.path.exists(DATA_DIR):
 if not os.path.exists(TRAINER_DIR):
     os.makedirs(TRAINER_DIR)
 
-# --- OpenCV Yüz Algılayıcı ve Tanıyıcı ---
-if not os.path.exists(HAAR_CASCADE_PATH):
-    messagebox.showerror("Hata", f"{HAAR_CASCADE_PATH} bulunamadı. Lütfen dosyayı temin edin.")
-    exit()
+# --- OpenCV Yüz Algılayıcı ve Tanıyıcı ---
+if not os.path.exists(HAAR_CASCADE_PATH):
+    messagebox.showerror("Hata", f"{HAAR_CASCADE_PATH} bulunamadı. Lütfen dosyayı temin edin.")
+    exit()
+
+# Kaskad (~1 MB XML) ilk algılamada yüklenir; arayüz açılışını bekletmez
+face_cascade = None
+_cascade_lock = threading.Lock()
+# Depolar ve önbellekler de ilk kullanımda açılır: içe aktarma (spawn ile başlayan işçi
+# süreçleri, benchmark, CLI komutları) trainer/ dosyalarını okumaz
+_stores_lock = threading.RLock()
+
+def get_face_cascade():
+    global face_cascade
+    with _cascade_lock:
+        if face_cascade is None:
+            with metrics.time("cascade_load"):
+                face_cascade = cv2.CascadeClassifier(HAAR_CASCADE_PATH)
+        return face_cascade
+
+# --- Süreçler Arası Yazma Kilidi ---
+# Birden çok kiosk aynı trainer/ klasörünü paylaşabilir. Model yayınlama, örnek deposu ve etiket
+# defteri yazmaları bu kilit altında yapılır: kilit dosyası O_EXCL ile oluşturulabilen süreç kilidi
+# alır. Aynı süreç içinde iç içe alınabilir (kayıt sırasında defter ve depo yazmaları gibi).
+# Kilit dosyasına sahibine özgü bir belirteç yazılır; bırakırken dosya sadece belirteç hâlâ bizimse
+# silinir (başkası eski sanıp devraldıysa onun kilidine dokunulmaz). Kilit tutulduğu sürece bir
+# nabız iş parçacığı dosyanın mtime'ını yeniler, böylece delete_user/compact_samples gibi uzun
+# işlemler de kilidi kaybetmez. Eskilik saatlerin karşılaştırılmasıyla değil, bekleyen sürecin
+# kendi monotonik saatiyle ölçülür: dosya (belirteç, mtime) TRAINER_LOCK_STALE boyunca hiç
+# değişmediyse sahibi çökmüş sayılır. Paylaşılan diskteki saat kayması bu yüzden etkilemez.
+class InterProcessLock:
+    def __init__(self, path, stale_after=TRAINER_LOCK_STALE):
+        self.path = path
+        self.stale_after = stale_after
+        self.local = threading.RLock()
+        self.depth = 0
+        self.token = None
+        self._heartbeat = None
+        self._heartbeat_stop = None
+
+    def __enter__(self):
+        self.local.acquire()
+        if self.depth == 0:
+            try:
+                self._acquire_file()
+            except BaseException:
+                self.local.release()
+                raise
+            self._start_heartbeat()
+        self.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.depth -= 1
+        if self.depth == 0:
+            self._stop_heartbeat()
+            try:
+                if self._read_token() == self.token:
+                    os.remove(self.path)
+                else:
+                    logger.warning(f"Uyarı: Kilit başka bir süreç tarafından devralınmış - {self.path}")
+            except FileNotFoundError:
+                pass
+            self.token = None
+        self.local.release()
+
+    def _read_token(self):
+        with open(self.path, 'rb') as f:
+            return f.read().decode(errors='replace')
+
+    def _observe(self):
+        # Kilit dosyasının o anki hâli (belirteç, mtime); dosya yoksa None
+        try:
+            return self._read_token(), os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _acquire_file(self):
+        token = f"{os.getpid()}:{os.urandom(8).hex()}"
+        seen = seen_at = None
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                state = self._observe()
+                now = time.monotonic()
+                if state is None:
+                    continue
+                if state != seen:
+                    seen, seen_at = state, now  # Sahibi canlı (ya da yeni bir sahip var)
+                elif now - seen_at > self.stale_after:
+                    # Belirteç silmeden hemen önce tekrar kontrol edilir; arada devralan olduysa dokunulmaz
+                    if self._observe() == seen:
+                        logger.warning(f"Uyarı: Eski kilit dosyası siliniyor - {self.path} ({seen[0]})")
+                        try:
+                            os.remove(self.path)
+                        except FileNotFoundError:
+                            pass
+                    seen = seen_at = None
+                    continue
+                time.sleep(0.05)
+                continue
+            os.write(fd, token.encode())
+            os.close(fd)
+            self.token = token
+            return
+
+    def _start_heartbeat(self):
+        stop = threading.Event()
+        token = self.token
+        interval = max(self.stale_after / 4, 0.05)
+
+        def beat():
+            while not stop.wait(interval):
+                try:
+                    if self._read_token() != token:
+                        return
+                    os.utime(self.path)
+                except OSError:
+                    return
+
+        self._heartbeat_stop = stop
+        self._heartbeat = threading.Thread(target=beat, name="TrainerLockHeartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def _stop_heartbeat(self):
+        if self._heartbeat is not None:
+            self._heartbeat_stop.set()
+            self._heartbeat.join()
+            self._heartbeat = self._heartbeat_stop = None
+
+
+trainer_lock = InterProcessLock(TRAINER_LOCK_FILE)
+
+def file_signature(path):
+    # Dosya değişti mi? (inode, mtime, boyut); yerine taşınan dosyada inode da değişir. Yoksa None
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def write_file_atomic(path, data):
+    # Önce geçici dosyaya yaz, sonra yerine taşı; okuyan süreçler ya eski ya yeni dosyayı görür
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    for attempt in range(5):
+        try:
+            os.replace(tmp_path, path)
+            return
+        except PermissionError:
+            # Windows: dosyayı o anda okuyan başka bir süreç varsa taşıma kısa süre sonra tekrar denenir
+            if attempt == 4:
+                raise
+            time.sleep(0.05)
+
+# recognizer'ı global yapmak yerine gerektiğinde oluşturalım veya load_trained_data içinde yönetelim
+recognizer = None
+labels = {} # ID -> İsim eşleşmesi için
+model_generation = 0 # Etkin modelin yayın nesli (0: yayınlanmış model yok)
+# recognizer ve labels birlikte değiştirilir; arka plan eğitimi bitince bu kilit altında takas edilir
+model_lock = threading.Lock()
+
+# --- Aktif Modeli Takas Et / Oku ---
+# Girişler get_model() ile aldıkları çifti karar verene kadar kullanır; takas sadece
+# sonraki get_model() çağrılarını etkiler, süren girişler yarıda kesilmez.
+def swap_model(new_recognizer, new_labels, generation=0):
+    global recognizer, labels, model_generation
+    with model_lock:
+        recognizer = new_recognizer
+        labels = new_labels
+        model_generation = generation
+    if IDENTIFICATION_INDEX and new_recognizer is not None:
+        get_identification_index(new_recognizer)  # Dizin takas eden arka plan thread'inde kurulur, ilk tanıma beklemez
+
+def get_model():
+    # Giriş sırasında tanıyıcı ve etiketlerin tutarlı bir çiftini döndür
+    with model_lock:
+        return recognizer, labels
+
+def get_model_generation():
+    with model_lock:
+        return model_generation
+
+# --- Model Nesilleri (Sürümlü Yayın) ---
+# Her eğitim/kayıt modeli yeni bir nesil olarak MODEL_DIR altına yazar (model-NNNNNN.bin ve
+# labels-NNNNNN.pickle), ardından MODEL_POINTER_FILE'ı atomik olarak bu nesle çevirir. Diğer
+# süreçler sadece işaretçi dosyasını izler (ModelWatcher); yarım yazılmış bir model hiçbir zaman
+# görünmez. Son MODEL_KEEP_GENERATIONS nesil diskte tutulur, daha eskileri silinir.
+def read_model_pointer():
+    # {"generation": N, "model": dosya adı veya None, "labels": dosya adı veya None}; yoksa None
+    try:
+        with open(MODEL_POINTER_FILE, 'rb') as f:
+            pointer = json.loads(f.read().decode("utf-8"))
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        logger.error(f"Hata: Model işaretçisi okunamadı - {e}")
+        return None
+    return pointer
+
+def check_model_labels(model_recognizer, model_labels):
+    # Modeldeki her ID'nin etiket dosyasında karşılığı olmalı, yoksa model bozuk sayılır
+    model_ids = set(int(i) for i in np.unique(model_recognizer.labels))
+    if not model_ids.issubset(model_labels.keys()):
+        raise ValueError("Model ve etiket dosyası uyuşmuyor")
+
+def load_model_snapshot(pointer):
+    loaded_recognizer = LBPHModel.load(os.path.join(MODEL_DIR, pointer["model"]))
+    with open(os.path.join(MODEL_DIR, pointer["labels"]), 'rb') as f:
+        loaded_labels = pickle.load(f)
+    check_model_labels(loaded_recognizer, loaded_labels)
+    return loaded_recognizer, loaded_labels
+
+def prune_model_snapshots(generation):
+    if not os.path.isdir(MODEL_DIR):
+        return
+    for filename in os.listdir(MODEL_DIR):
+        stem, _, _ = filename.partition(".")
+        prefix, _, number = stem.rpartition("-")
+        if prefix not in ("model", "labels") or not number.isdigit():
+            continue
+        if int(number) <= generation - MODEL_KEEP_GENERATIONS:
+            try:
+                os.remove(os.path.join(MODEL_DIR, filename))
+            except OSError:
+                pass  # Başka bir süreç hâlâ okuyor olabilir; sonraki yayında tekrar denenir
+
+def publish_model(new_recognizer, new_labels):
+    # Yeni nesli yazar, işaretçiyi ona çevirir ve bu süreçte devreye alır. new_recognizer None ise
+    # boş bir nesil yayınlanır (hiç kullanıcı kalmadı). Takas kilit bırakılmadan yapılır; böylece
+    # arada başka bir sürecin yayınladığı daha yeni nesil eskisiyle ezilmez.
+    with trainer_lock:
+        pointer = read_model_pointer()
+        generation = max(pointer["generation"] if pointer else 0, get_model_generation()) + 1
+        entry = {"generation": generation, "model": None, "labels": None,
+                 "published": time.time(), "pid": os.getpid()}
+        if new_recognizer is not None:
+            os.makedirs(MODEL_DIR, exist_ok=True)
+            entry["model"] = f"model-{generation:06d}.bin"
+            entry["labels"] = f"labels-{generation:06d}.pickle"
+            new_recognizer.save(os.path.join(MODEL_DIR, entry["model"]))
+            write_file_atomic(os.path.join(MODEL_DIR, entry["labels"]),
+                              pickle.dumps(new_labels, protocol=pickle.HIGHEST_PROTOCOL))
+        write_file_atomic(MODEL_POINTER_FILE, json.dumps(entry).encode("utf-8"))
+        swap_model(new_recognizer, new_labels, generation)
+        prune_model_snapshots(generation)
+    logger.info(f"Model nesil {generation} olarak yayınlandı.")
+    return generation
+
+# --- Eski Tek Dosyalık Modeli İlk Nesil Olarak Yayınla ---
+def import_legacy_model():
+    with trainer_lock:
+        if read_model_pointer() is not None:
+            return load_trained_data()  # Başka bir süreç bu arada taşıdı
+        # İkili model yoksa eski YAML modeli okunur
+        try:
+            if os.path.exists(MODEL_FILE):
+                loaded_recognizer = LBPHModel.load(MODEL_FILE)
+            else:
+                logger.info(f"'{TRAINER_FILE}' ikili biçime çevriliyor...")
+                loaded_recognizer = LBPHModel.from_yaml(TRAINER_FILE)
+            with open(LABELS_FILE, 'rb') as f:
+                loaded_labels = pickle.load(f)
+            check_model_labels(loaded_recognizer, loaded_labels)
+        except (cv2.error, ValueError, pickle.UnpicklingError, EOFError) as e:
+            logger.error(f"Hata: Eğitilmiş model bozuk, okunamadı - {e}")
+            swap_model(None, {})
+            return False
+        publish_model(loaded_recognizer, loaded_labels)
+    return True
+
+# --- Eğitilmiş Modeli ve Etiketleri Yükle ---
+def load_trained_data():
+    start = time.perf_counter()
+    pointer = read_model_pointer()
+    if pointer is None:
+        if (os.path.exists(MODEL_FILE) or os.path.exists(TRAINER_FILE)) and os.path.exists(LABELS_FILE):
+            return import_legacy_model()
+        logger.info("Eğitilmiş model bulunamadı.")
+        swap_model(None, {}) # Model yüklenemezse None yapalım
+        return False
+    if pointer["model"] is None:
+        logger.info(f"Eğitilmiş model bulunamadı (nesil {pointer['generation']} boş).")
+        swap_model(None, {}, pointer["generation"])
+        return False
+    try:
+        loaded_recognizer, loaded_labels = load_model_snapshot(pointer)
+    except (OSError, ValueError, pickle.UnpicklingError, EOFError) as e:
+        logger.error(f"Hata: Eğitilmiş model bozuk, okunamadı - {e}")
+        swap_model(None, {})
+        return False
+
+    swap_model(loaded_recognizer, loaded_labels, pointer["generation"])
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    metrics.observe("model_load", elapsed_ms)
+    logger.info(f"Eğitilmiş model (nesil {pointer['generation']}) ve etiketler yüklendi ({elapsed_ms:.0f} ms).")
+    return True
+
+# --- Başka Bir Sürecin Yayınladığı Nesli Devreye Al ---
+# İşaretçi bu süreçteki nesilden yeniyse örnek deposu ve etiket defteri diskten tazelenir, yeni
+# model okunur ve takas edilir. Okuma başarısız olursa eski model kullanılmaya devam eder.
+def refresh_model():
+    global recognizer, labels, model_generation
+    pointer = read_model_pointer()
+    if pointer is None or pointer["generation"] <= get_model_generation():
+        return False
+    start = time.perf_counter()
+    if get_sample_store().refresh():
+        user_histograms.invalidate()
+    get_label_registry().refresh()
+    if pointer["model"] is None:
+        loaded_recognizer, loaded_labels = None, {}
+    else:
+        try:
+            loaded_recognizer, loaded_labels = load_model_snapshot(pointer)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError) as e:
+            logger.error(f"Hata: Model nesil {pointer['generation']} okunamadı, eski model kullanılıyor - {e}")
+            return False
+    with model_lock:
+        if pointer["generation"] <= model_generation:
+            return False  # Bu arada daha yeni bir nesil devreye alındı
+        recognizer, labels, model_generation = loaded_recognizer, loaded_labels, pointer["generation"]
+    metrics.observe("model_reload", (time.perf_counter() - start) * 1000)
+    logger.info(f"Model nesil {pointer['generation']} devreye alındı.")
+    return True
+
+# --- Yüz Kırpıntısını Normalleştir ---
+# Kayıtta saklanan, eğitimde kullanılan ve girişte tanınan her yüz aynı biçimde olmalı:
+# FACE_SIZE boyutunda, histogramı eşitlenmiş gri görüntü.
+def normalize_face(roi_gray):
+    face = cv2.resize(roi_gray, FACE_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.equalizeHist(face)
+
+# --- Paketlenmiş Yüz Örneği Deposu ---
+# Her kayıt örneği için ayrı PNG yerine, normalleştirilmiş sabit boyutlu kırpıntılar tek bir
+# ham dosyada ardışık satırlar olarak tutulur; dizin dosyası kullanıcı -> satır aralıklarını saklar.
+# Okuma np.memmap ile yapılır, eğitim ve admin paneli örnekleri kopyalamadan okur.
+# Yeni örnekler dosyanın sonuna eklenir; silinen kullanıcıların satırları compact() ile temizlenir.
+# Depo başka kiosklarla paylaşılabilir: yazmalar trainer_lock altında, diskteki en son dizin
+# üzerine yapılır; refresh() başka bir sürecin yazdığı dizini okur.
+# compact() açık bir dosyanın yerine yazmaz (Windows'ta memmap ile açık dosya taşınamaz, POSIX'te
+# okuyanlar eski dosyada kalır): sıkıştırılmış satırlar yeni bir nesil dosyasına (samples-NNNNNN.bin)
+# yazılır ve dizin o dosyayı gösterir. Eski dizini okuyan süreçler eski dosyayı okumaya devam eder;
+# son SAMPLE_KEEP_GENERATIONS nesilden eskileri, açık tutan kalmadığında sonraki compact()'ta silinir.
+class SampleStore:
+    VERSION = 2  # 1: dizinde "data_generation" yok, satırlar data_path'te
+
+    def __init__(self, data_path=SAMPLE_STORE_FILE, index_path=SAMPLE_INDEX_FILE, face_size=FACE_SIZE):
+        self.data_path = data_path
+        self.index_path = index_path
+        self.face_size = face_size
+        self.row_bytes = face_size[0] * face_size[1]
+        self.lock = threading.RLock()
+        self._data = None  # Açık memmap (satır sayısı değişince yeniden açılır)
+        self._data_count = 0
+        self._index_signature = None
+        self.index = self._load_index()
+
+    def _empty_index(self):
+        return {"version": self.VERSION, "face_size": self.face_size, "count": 0, "users": {}, "mtimes": {}, "data_generation": 0}
+
+    def _load_index(self):
+        self._index_signature = file_signature(self.index_path)
+        if self._index_signature is None:
+            return self._empty_index()
+        with open(self.index_path, 'rb') as f:
+            index = pickle.load(f)
+        if index.get("version") not in (1, self.VERSION) or tuple(index.get("face_size")) != tuple(self.face_size):
+            raise ValueError(f"{self.index_path} uyumsuz örnek deposu sürümü/boyutu")
+        index.setdefault("mtimes", {})  # Eski dizinlerde kullanıcı değişiklik zamanları yok
+        index.setdefault("data_generation", 0)  # Sürüm 1: satırlar data_path'te (0. nesil)
+        index["version"] = self.VERSION
+        return index
+
+    def _save_index(self):
+        # Önce geçici dosyaya yaz, sonra yerine taşı (yarım yazılmış dizin kalmasın)
+        write_file_atomic(self.index_path, pickle.dumps(self.index, protocol=pickle.HIGHEST_PROTOCOL))
+        self._index_signature = file_signature(self.index_path)
+
+    def _data_file(self, generation=None):
+        # Dizinin gösterdiği (veya verilen nesildeki) örnek dosyasının yolu; 0. nesil data_path'tir
+        generation = self.index["data_generation"] if generation is None else generation
+        if generation == 0:
+            return self.data_path
+        base, ext = os.path.splitext(self.data_path)
+        return f"{base}-{generation:06d}{ext}"
+
+    def _prune_data_files(self):
+        # Eski nesil dosyaları silinir; başka bir süreç hâlâ açık tutuyorsa (Windows) sonra tekrar denenir
+        directory = os.path.dirname(self.data_path) or "."
+        base, ext = os.path.splitext(os.path.basename(self.data_path))
+        for filename in os.listdir(directory):
+            stem, file_ext = os.path.splitext(filename)
+            if file_ext != ext:
+                continue
+            if stem == base:
+                generation = 0
+            elif stem.startswith(base + "-") and stem[len(base) + 1:].isdigit():
+                generation = int(stem[len(base) + 1:])
+            else:
+                continue
+            if generation <= self.index["data_generation"] - SAMPLE_KEEP_GENERATIONS:
+                try:
+                    os.remove(os.path.join(directory, filename))
+                except OSError:
+                    pass
+
+    def refresh(self):
+        # Dizin dosyası başka bir süreç tarafından değiştirildiyse yeniden oku; değiştiyse True
+        with self.lock:
+            if file_signature(self.index_path) == self._index_signature:
+                return False
+            self.index = self._load_index()
+            self._data = None
+            return True
+
+    def _rows(self):
+        count = self.index["count"]
+        if count == 0:
+            return None
+        if self._data is None or self._data_count != count:
+            h, w = self.face_size[1], self.face_size[0]
+            self._data = np.memmap(self._data_file(), dtype=np.uint8, mode='r', shape=(count, h, w))
+            self._data_count = count
+        return self._data
+
+    def users(self):
+        with self.lock:
+            return sorted(self.index["users"].keys())
+
+    def has_user(self, user_name):
+        with self.lock:
+            return user_name in self.index["users"]
+
+    def user_mtime(self, user_name):
+        # Kullanıcının örneklerinin son değiştiği zaman (ns); önbellek anahtarı olarak kullanılır
+        with self.lock:
+            return self.index["mtimes"].get(user_name, 0)
+
+    def sample_count(self, user_name=None):
+        with self.lock:
+            if user_name is None:
+                return sum(end - start for ranges in self.index["users"].values() for start, end in ranges)
+            return sum(end - start for start, end in self.index["users"].get(user_name, []))
+
+    def get_samples(self, user_name):
+        # Kullanıcının örneklerini memmap görünümleri olarak döndürür (kopyalama yok)
+        with self.lock:
+            data = self._rows()
+            samples = []
+            for start, end in self.index["users"].get(user_name, []):
+                samples.extend(data[start:end])
+            return samples
+
+    def _as_block(self, faces):
+        # faces: normalleştirilmiş (FACE_SIZE) uint8 gri görüntüler
+        block = np.ascontiguousarray(np.stack(faces), dtype=np.uint8)
+        h, w = self.face_size[1], self.face_size[0]
+        if block.shape[1:] != (h, w):
+            raise ValueError(f"Örnek boyutu {block.shape[1:]} beklenen {(h, w)} değil")
+        return block
+
+    def append(self, user_name, faces):
+        if not faces:
+            return 0
+        block = self._as_block(faces)
+        with trainer_lock, self.lock:
+            self.refresh()
+            start = self.index["count"]
+            # Dizinde kayıtlı son satırın hemen arkasına yaz (yarım kalmış eski yazmaları ezer)
+            data_file = self._data_file()
+            mode = 'r+b' if os.path.exists(data_file) else 'wb'
+            with open(data_file, mode) as f:
+                f.seek(start * self.row_bytes)
+                f.write(block.tobytes())
+                f.truncate()
+            end = start + len(block)
+            self.index["users"].setdefault(user_name, []).append((start, end))
+            self.index["mtimes"][user_name] = time.time_ns()
+            self.index["count"] = end
+            self._save_index()
+        return len(block)
+
+    def replace_user(self, user_name, faces):
+        # Kullanıcının örneklerini verilenlerle değiştirir; eski satırlar varsa True döner (compact gerekir)
+        return self.replace_many([(user_name, faces)])
+
+    def replace_many(self, items):
+        # items: (kullanıcı adı, örnekler) çiftleri; üreteç de olabilir, bellekte hepsi birden tutulmaz.
+        # Kilit bir kez alınır, satırlar tek dosya açılışıyla eklenir ve dizin en sonda bir kez yazılır
+        # (toplu taşımada kullanıcı başına dizin yazmak O(n²) olur). Boş örnek listesi kullanıcıyı siler.
+        # Herhangi bir kullanıcının eski satırları varsa True döner (compact gerekir).
+        replaced = changed = False
+        with trainer_lock, self.lock:
+            self.refresh()
+            try:
+                data_file = self._data_file()
+                mode = 'r+b' if os.path.exists(data_file) else 'wb'
+                with open(data_file, mode) as f:
+                    count = self.index["count"]
+                    f.seek(count * self.row_bytes)
+                    for user_name, faces in items:
+                        if self.index["users"].pop(user_name, None) is not None:
+                            self.index["mtimes"].pop(user_name, None)
+                            replaced = changed = True
+                        if not faces:
+                            continue
+                        block = self._as_block(faces)
+                        f.write(block.tobytes())
+                        self.index["users"][user_name] = [(count, count + len(block))]
+                        self.index["mtimes"][user_name] = time.time_ns()
+                        count += len(block)
+                        changed = True
+                    f.truncate()
+                self.index["count"] = count
+            except BaseException:
+                # Dizin diske yazılmadı; bellekteki yarım değişiklikleri at (eklenen satırlar sonraki yazmada ezilir)
+                self.index = self._load_index()
+                self._data = None
+                raise
+            if changed:
+                self._save_index()
+        return replaced
+
+    def remove_user(self, user_name):
+        # Satırlar dosyada kalır, sadece dizinden çıkarılır; yer açmak için compact() çağrılmalı
+        with trainer_lock, self.lock:
+            self.refresh()
+            if self.index["users"].pop(user_name, None) is not None:
+                self.index["mtimes"].pop(user_name, None)
+                self._save_index()
+                return True
+            return False
+
+    def compact(self):
+        # Sadece dizinde kayıtlı satırları yeni nesil dosyasına kopyala ve dizini ona çevir
+        with trainer_lock, self.lock:
+            self.refresh()
+            data = self._rows()
+            new_index = self._empty_index()
+            new_index["data_generation"] = self.index["data_generation"] + 1
+            new_path = self._data_file(new_index["data_generation"])
+            with open(new_path, 'wb') as f:
+                count = 0
+                for user_name in sorted(self.index["users"]):
+                    user_start = count
+                    for start, end in self.index["users"][user_name]:
+                        f.write(np.ascontiguousarray(data[start:end]).tobytes())
+                        count += end - start
+                    new_index["users"][user_name] = [(user_start, count)]
+                    new_index["mtimes"][user_name] = self.index["mtimes"].get(user_name, 0)
+                new_index["count"] = count
+                f.flush()
+                os.fsync(f.fileno())
+            self._data = None  # Bu süreçteki memmap kapanır; eski dosya sonraki compact()'ta silinebilir
+            del data
+            self.index = new_index
+            self._save_index()
+            self._prune_data_files()
+
+    def all_samples(self):
+        # Eğitim için (kullanıcı adı, örnek listesi) çiftleri, kullanıcı adına göre sıralı
+        with self.lock:
+            return [(user_name, self.get_samples(user_name)) for user_name in self.users()]
+
+
+sample_store = None
+
+def get_sample_store():
+    global sample_store
+    with _stores_lock:
+        if sample_store is None:
+            sample_store = SampleStore()
+        return sample_store
+
+# --- Küçük Resim Önbelleği ---
+# Admin panelindeki her kullanıcının küçük resmi (ilk örneği) PNG olarak diskte saklanır.
+# Anahtar kullanıcının depodaki değişiklik zamanıdır; örnekleri değişmeyen kullanıcının
+# küçük resmi bir daha üretilmez. get() arka plan thread'inden çağrılır, Tk'ye dokunmaz.
+class ThumbnailCache:
+    def __init__(self, path=THUMBNAIL_CACHE_FILE, store=None, size=THUMBNAIL_SIZE):
+        self.path = path
+        self.store = store or get_sample_store()
+        self.size = size
+        self.lock = threading.Lock()
+        self.entries = None  # isim -> (değişiklik zamanı, PNG baytları); ilk get() ile diskten okunur
+        self.dirty = False
+
+    def _load(self):
+        # self.lock altında çağrılır; panel açılışı (Tk thread'i) dosyayı beklemez
+        if self.entries is not None:
+            return
+        self.entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'rb') as f:
+                    self.entries = pickle.load(f)
+            except (pickle.UnpicklingError, EOFError) as e:
+                logger.error(f"Hata: Küçük resim önbelleği okunamadı, sıfırlanıyor - {e}")
+
+    def get(self, user_name):
+        # PIL küçük resmi; kullanıcının örneği yoksa None
+        mtime = self.store.user_mtime(user_name)
+        with self.lock:
+            self._load()
+            entry = self.entries.get(user_name)
+        if entry is not None and entry[0] == mtime:
+            img = Image.open(io.BytesIO(entry[1]))
+            img.load()
+            return img
+        samples = self.store.get_samples(user_name)
+        if not samples:
+            return None
+        img = Image.fromarray(np.array(samples[0]))
+        img.thumbnail(self.size)
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        with self.lock:
+            self.entries[user_name] = (mtime, buffer.getvalue())
+            self.dirty = True
+        return img
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            # Silinmiş kullanıcıların küçük resimleri atılır
+            active = set(self.store.users())
+            self.entries = {name: entry for name, entry in self.entries.items() if name in active}
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(self.entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+
+thumbnail_cache = None
+
+def get_thumbnail_cache():
+    global thumbnail_cache
+    with _stores_lock:
+        if thumbnail_cache is None:
+            thumbnail_cache = ThumbnailCache()
+        return thumbnail_cache
+
+# --- Ön İşlem Önbelleği ---
+# face_data/ altındaki her resim dosyası için (mtime, boyut) imzasını ve dosyanın depodaki yerini
+# (kullanıcı, kullanıcı örnekleri içindeki sıra) saklar. Değişmeyen dosyalar bir daha açılmaz,
+# çözülmez ve normalleştirilmez; normalleştirilmiş kırpıntı zaten depoda durur.
+class PreprocessCache:
+    def __init__(self, path=PREPROCESS_CACHE_FILE):
+        self.path = path
+        self.entries = {}  # dosya yolu -> (mtime_ns, boyut, kullanıcı, sıra)
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    self.entries = pickle.load(f)
+            except (pickle.UnpicklingError, EOFError) as e:
+                logger.error(f"Hata: Ön işlem önbelleği okunamadı, sıfırlanıyor - {e}")
+
+    def lookup(self, img_path, stat):
+        entry = self.entries.get(img_path)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry
+        return None
+
+    def paths_for_user(self, user_name):
+        return {path for path, entry in self.entries.items() if entry[2] == user_name}
+
+    def paths_by_user(self):
+        # Kullanıcı -> dosya yolları; her kullanıcı için ayrı tarama yapmamak için bir kerede çıkarılır
+        result = {}
+        for path, entry in self.entries.items():
+            result.setdefault(entry[2], set()).add(path)
+        return result
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self.entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+
+preprocess_cache = None
+
+def get_preprocess_cache():
+    global preprocess_cache
+    with _stores_lock:
+        if preprocess_cache is None:
+            preprocess_cache = PreprocessCache()
+        return preprocess_cache
+
+# --- Eski face_data/ Klasöründen Yüz Örneklerini Oku ---
+def list_user_images(user_dir_path):
+    return [os.path.join(user_dir_path, filename) for filename in sorted(os.listdir(user_dir_path))
+            if filename.endswith((".png", ".jpg", ".jpeg"))]
+
+def load_face_image(img_path):
+    # Kayıt sırasında zaten kırpıldığı için tüm resim yüz kabul edilir; ayrıca yüz algılamaya gerek yok
+    try:
+        pil_image = Image.open(img_path).convert("L")
+        image_array = np.array(pil_image, "uint8")
+        return normalize_face(image_array)
+    except Exception as e:
+        logger.error(f"Hata: {img_path} işlenemedi - {e}")
+        return None
+
+def load_face_images(image_paths):
+    # Süreç havuzu işçisi: bir kullanıcı klasörünün dosyalarını çözüp normalleştirir.
+    # Sadece küçük uint8 diziler geri gönderilir (başarısız dosyalar için None).
+    return [load_face_image(img_path) for img_path in image_paths]
+
+def decode_user_images(path_groups, workers=None):
+    # Her grup bir kullanıcı klasörüdür; gruplar süreç havuzuna dağıtılır ve sonuçlar
+    # gönderildikleri sırayla (deterministik) döner
+    workers = TRAINING_WORKERS if workers is None else workers
+    total_files = sum(len(group) for group in path_groups)
+    if workers <= 1 or total_files < PARALLEL_MIN_FILES or len(path_groups) < 2:
+        return [load_face_images(group) for group in path_groups]
+    workers = min(workers, len(path_groups))
+    chunksize = max(1, len(path_groups) // (workers * 4))
+    # Havuz eğitim iş parçacığından, Tk ve kamera iş parçacıkları açıkken kurulur; fork bu
+    # iş parçacıklarının kilitlerini kopyalayıp işçiyi kilitleyebilir, bu yüzden her yerde spawn
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return list(executor.map(load_face_images, path_groups, chunksize=chunksize))
+
+# --- face_data/ Ağacını Paketlenmiş Depoyla Eşitle ---
+# Depoda olmayan veya dosyaları değişmiş her kullanıcı klasörünü depoya yazar. Değişmeyen
+# dosyalar ön işlem önbelleğinden (isabet) alınır; sadece yeni/değişen dosyalar çözülür (ıska).
+# Iskalar kullanıcı klasörü başına süreç havuzunda paralel çözülür, sonuçlar kullanıcı adı
+# sırasıyla birleştirilir. Eski PNG dosyalarına dokunulmaz; taşıma bittikten sonra elle silinebilir.
+def sync_face_data(data_dir=DATA_DIR, store=None, cache=None, progress=None, workers=None):
+    store = store or get_sample_store()
+    cache = cache or get_preprocess_cache()
+    cache.reset_stats()
+    if not os.path.isdir(data_dir):
+        return 0
+
+    # 1. Aşama: sadece stat ile değişen kullanıcıları ve çözülecek dosyaları belirle
+    paths_by_user = cache.paths_by_user()
+    pending = []  # (kullanıcı, dosyalar, önbellek kayıtları, kullanılabilir mi, depodaki örnekler)
+    for user_name in sorted(os.listdir(data_dir)):
+        user_dir_path = os.path.join(data_dir, user_name)
+        if not os.path.isdir(user_dir_path):
+            continue
+        files = [(img_path, os.stat(img_path)) for img_path in list_user_images(user_dir_path)]
+        entries = [cache.lookup(img_path, stat) for img_path, stat in files]
+        stored_samples = store.get_samples(user_name)
+
+        usable = [entry is not None and entry[2] == user_name and entry[3] < len(stored_samples)
+                  for entry in entries]
+        unchanged = (store.has_user(user_name) and all(usable)
+                     and paths_by_user.get(user_name, set()) == {img_path for img_path, _ in files})
+        if unchanged:
+            cache.hits += len(files)
+            continue
+        pending.append((user_name, files, entries, usable, stored_samples))
+
+    # 2. Aşama: ıskaları paralel çöz
+    if progress and pending:
+        progress(f"{len(pending)} kullanıcı klasörü işleniyor...")
+    miss_groups = [[img_path for (img_path, _), ok in zip(files, usable) if not ok]
+                   for _, files, _, usable, _ in pending]
+    decoded_groups = decode_user_images(miss_groups, workers)
+
+    # 3. Aşama: sonuçları kullanıcı adı sırasıyla depoya yaz (tek kilit, tek dizin yazımı)
+    changed_users = 0
+
+    def user_samples_in_order():
+        nonlocal changed_users
+        for (user_name, files, entries, usable, stored_samples), decoded in zip(pending, decoded_groups):
+            decoded = iter(decoded)
+            user_samples = []
+            new_entries = {}
+            for (img_path, stat), entry, ok in zip(files, entries, usable):
+                if ok:
+                    face = np.array(stored_samples[entry[3]])
+                    cache.hits += 1
+                else:
+                    face = next(decoded)
+                    cache.misses += 1
+                if face is not None:
+                    new_entries[img_path] = (stat.st_mtime_ns, stat.st_size, user_name, len(user_samples))
+                    user_samples.append(face)
+
+            for img_path in paths_by_user.get(user_name, ()):
+                del cache.entries[img_path]
+            cache.entries.update(new_entries)
+            if user_samples:
+                changed_users += 1
+                logger.info(f"{user_name}: {len(user_samples)} örnek depoya yazıldı.")
+                yield user_name, user_samples
+
+    replaced = store.replace_many(user_samples_in_order())
+    if replaced:
+        store.compact()  # Değişen kullanıcıların eski satırlarını temizle
+    if changed_users or cache.misses:
+        cache.save()
+    logger.info(f"Eşitleme tamamlandı. {changed_users} kullanıcı güncellendi, depoda toplam {store.sample_count()} örnek var. "
+          f"Önbellek: {cache.hits} isabet, {cache.misses} ıska.")
+    return changed_users
+
+def has_legacy_face_data(data_dir=DATA_DIR, store=None):
+    # Depoya taşınmamış kullanıcı klasörü var mı?
+    store = store or get_sample_store()
+    if not os.path.isdir(data_dir):
+        return False
+    return any(os.path.isdir(os.path.join(data_dir, d)) and not store.has_user(d) for d in os.listdir(data_dir))
+
+# --- Kalıcı Etiket Kayıt Defteri ---
+# Her kullanıcıya bir kez ID verilir ve bu ID bir daha değişmez (os.walk sırasına bağlı değildir).
+# Defter sadece eklenerek büyür: silinen kullanıcının ID'si mezar taşı olarak saklanır ve
+# başka bir kullanıcıya verilmez. Böylece eğitilmiş modeller, önbellekler ve kayıtlar yeniden
+# eğitimden sonra da geçerli kalır. Dosya biçimi: 4 bayt sihirli değer + 2 bayt sürüm + pickle.
+# Defter kiosklar arasında paylaşılabilir; yeni ID'ler trainer_lock altında, diskteki en son
+# defter okunduktan sonra verilir (iki süreç aynı ID'yi iki farklı kullanıcıya vermez).
+class LabelRegistry:
+    MAGIC = b"DLRG"
+    VERSION = 1
+    HEADER = struct.Struct("<4sH")
+
+    def __init__(self, path=LABEL_REGISTRY_FILE, legacy_labels_path=LABELS_FILE):
+        self.path = path
+        self.lock = threading.RLock()
+        self.ids = {}  # isim -> ID (aktif kullanıcılar)
+        self.tombstones = {}  # ID -> isim (silinmiş kullanıcılar)
+        self.next_id = 0
+        self._signature = None
+        if os.path.exists(path):
+            self._load()
+        elif legacy_labels_path and os.path.exists(legacy_labels_path):
+            # İlk çalıştırma: mevcut labels.pickle ID'lerini koru
+            with open(legacy_labels_path, 'rb') as f:
+                legacy_labels = pickle.load(f)
+            self.ids = {name: int(id_) for id_, name in legacy_labels.items()}
+            self.next_id = max(self.ids.values(), default=-1) + 1
+            self.save()
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            magic, version = self.HEADER.unpack(f.read(self.HEADER.size))
+            if magic != self.MAGIC or version != self.VERSION:
+                raise ValueError(f"{self.path} tanınmayan etiket defteri biçimi (sürüm {version})")
+            payload = pickle.load(f)
+        self.ids = payload["ids"]
+        self.tombstones = payload["tombstones"]
+        self.next_id = payload["next_id"]
+        self._signature = file_signature(self.path)
+
+    def refresh(self):
+        # Defter başka bir süreç tarafından değiştirildiyse yeniden oku
+        with self.lock:
+            signature = file_signature(self.path)
+            if signature is not None and signature != self._signature:
+                self._load()
+
+    def save(self):
+        with self.lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.VERSION))
+                pickle.dump({"ids": self.ids, "tombstones": self.tombstones, "next_id": self.next_id},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+            self._signature = file_signature(self.path)
+
+    def get_or_assign(self, user_name):
+        return self.assign_many([user_name])[user_name]
+
+    def assign_many(self, user_names):
+        # İsim -> ID; ID'si olmayanlara sırayla yeni ID verilir. Kilit dosyası bir kez alınır ve defter
+        # en fazla bir kez yazılır (eğitimde kullanıcı başına kaydetmek O(n²) olur).
+        user_names = list(user_names)
+        with self.lock:
+            if all(user_name in self.ids for user_name in user_names):
+                return {user_name: self.ids[user_name] for user_name in user_names}
+        with trainer_lock, self.lock:
+            self.refresh()
+            missing = [user_name for user_name in dict.fromkeys(user_names) if user_name not in self.ids]
+            for user_name in missing:
+                self.ids[user_name] = self.next_id
+                self.next_id += 1
+            if missing:
+                self.save()
+            return {user_name: self.ids[user_name] for user_name in user_names}
+
+    def get(self, user_name):
+        # Kullanıcının ID'si; henüz ID verilmemişse None
+        with self.lock:
+            return self.ids.get(user_name)
+
+    def remove(self, user_name):
+        with trainer_lock, self.lock:
+            self.refresh()
+            user_id = self.ids.pop(user_name, None)
+            if user_id is not None:
+                self.tombstones[user_id] = user_name
+                self.save()
+            return user_id
+
+    def labels(self):
+        # ID -> isim (sadece aktif kullanıcılar)
+        with self.lock:
+            return {user_id: name for name, user_id in self.ids.items()}
+
+
+label_registry = None
+
+def get_label_registry():
+    global label_registry
+    with _stores_lock:
+        if label_registry is None:
+            label_registry = LabelRegistry()
+        return label_registry
+
+# --- Modeli Eğitme Fonksiyonu (Sıfırdan, Tam Yeniden Eğitim) ---
+# Sadece kullanıcı silindiğinde veya model bozuk/eksik olduğunda çağrılmalı.
+# Yeni kayıtlar için enroll_user kullanılır.
+# progress verilirse ilerleme mesajları bu fonksiyona da iletilir (arka plan eğitimi için).
+def train_model(progress=None):
+    store, registry = get_sample_store(), get_label_registry()
+    id_to_label = {} # ID -> isim (bu modeldeki kullanıcılar)
+    face_samples = []
+    ids = []
+    logger.info("Yüz verileri taranıyor ve model eğitiliyor...")
+
+    # face_data/ altına elle eklenen/değiştirilen resimler varsa önce depoya al
+    # (değişmeyen dosyalar önbellekten atlanır, isabet/ıska sayıları raporlanır)
+    with metrics.time("train_sync"):
+        sync_face_data(progress=progress)
+    store.refresh()  # Diğer kioskların yazdığı örnekler de eğitime girsin
+
+    # Örnekler paketlenmiş depodan kopyalanmadan okunur
+    all_samples = store.all_samples()
+    # ID'ler kalıcı defterden gelir; aynı kullanıcı her eğitimde aynı ID'yi alır
+    user_ids = registry.assign_many(user_name for user_name, _ in all_samples)
+    for user_name, user_samples in all_samples:
+        user_id = user_ids[user_name]
+        id_to_label[user_id] = user_name
+
+        logger.debug(f"İşlenen kullanıcı: {user_name}, Kullanıcı ID: {user_id}")
+        if progress:
+            progress(f"İşleniyor: {user_name}")
+
+        face_samples.extend(user_samples)
+        ids.extend([user_id] * len(user_samples))
+
+    if not face_samples or not ids:
+        logger.info("Eğitilecek yüz verisi bulunamadı.")
+        return False
+
+    logger.info("Veriler hazırlandı. Model eğitiliyor...")
+    if progress:
+        progress("Model eğitiliyor...")
+
+    # Tanıyıcıyı ayrı bir nesnede eğit; bu sırada girişler eski modeli kullanmaya devam eder
+    with metrics.time("train"):
+        new_recognizer = LBPHModel.train(face_samples, ids)
+    # Eğitim kilit dışında yapıldı; yayından önce bu arada yapılan kayıt/silmeler modele yansıtılır
+    with trainer_lock:
+        new_recognizer, id_to_label = reconcile_model(new_recognizer, id_to_label)
+        generation = publish_model(new_recognizer, id_to_label) # Kaydet ve hemen devreye al
+    logger.info(f"Etiketler kaydedildi: {id_to_label}")
+    logger.info(f"Model eğitildi (nesil {generation}).")
+    return True
+
+# --- Eğitim Sırasında Başka Kiosklarda Yapılan Değişiklikleri Modele Yansıt ---
+# trainer_lock altında çağrılır. Defterden silinmiş kullanıcıların örnekleri modelden çıkarılır,
+# depoda olup modelde olmayan kullanıcılar artımlı olarak eklenir. Hiç örnek kalmazsa model None.
+def reconcile_model(model_recognizer, model_labels):
+    store, registry = get_sample_store(), get_label_registry()
+    store.refresh()
+    registry.refresh()
+    model_labels = dict(model_labels)
+    user_ids = registry.assign_many(store.users())
+    for user_name, user_id in user_ids.items():
+        if user_id in model_labels:
+            continue
+        user_samples = store.get_samples(user_name)
+        if user_samples:
+            logger.info(f"Eğitim sırasında eklenen kullanıcı modele ekleniyor: {user_name}")
+            model_recognizer = model_recognizer.update(user_samples, [user_id] * len(user_samples))
+            model_labels[user_id] = user_name
+    active = registry.labels()
+    stale_ids = [user_id for user_id in model_labels if user_id not in active]
+    if stale_ids:
+        logger.info(f"Eğitim sırasında silinen kullanıcılar modelden çıkarılıyor: {stale_ids}")
+        model_recognizer = model_recognizer.drop(stale_ids)
+        model_labels = {user_id: name for user_id, name in model_labels.items() if user_id in active}
+    return model_recognizer, model_labels
+
+# --- Artımlı Kayıt (Sadece Yeni Kullanıcının Örneklerini Modele Ekle) ---
+# Güncelleme kilit altında, diskteki en son nesil üzerine yapılır; başka bir kioskun bu arada
+# yayınladığı kayıtlar yeni nesilde kaybolmaz.
+def enroll_user(user_name, progress=None):
+    with trainer_lock:
+        refresh_model()
+        if get_model()[0] is None:
+            load_trained_data()
+        current_recognizer, current_labels = get_model()
+        if current_recognizer is not None:
+            user_samples = get_sample_store().get_samples(user_name)
+            if not user_samples:
+                logger.info(f"{user_name} için eklenecek yüz verisi bulunamadı.")
+                return False
+
+            # Kullanıcı zaten kayıtlıysa defterdeki ID'si, değilse yeni bir ID kullanılır
+            user_id = get_label_registry().get_or_assign(user_name)
+            logger.info(f"{user_name} modele ekleniyor. Kullanıcı ID: {user_id}, Örnek sayısı: {len(user_samples)}")
+            if progress:
+                progress(f"Modele ekleniyor: {user_name}")
+            try:
+                # Aktif modele dokunmadan yeni bir kopya oluşturulur; girişler eski modeli kullanmaya devam eder
+                with metrics.time("enroll_update"):
+                    new_recognizer = current_recognizer.update(user_samples, [user_id] * len(user_samples))
+            except (cv2.error, ValueError) as e:
+                logger.error(f"Hata: Artımlı güncelleme başarısız, tam eğitim yapılıyor - {e}")
+            else:
+                new_labels = dict(current_labels)
+                new_labels[user_id] = user_name
+                generation = publish_model(new_recognizer, new_labels)
+                logger.info(f"Model güncellendi (nesil {generation}).")
+                return True
+        else:
+            # Model yoksa veya bozuksa artımlı güncelleme yapılamaz, tam eğitime düş
+            logger.info("Geçerli model yok, tam eğitim yapılıyor...")
+    # Tam eğitim uzun sürebilir, kilit dışında yapılır
+    return train_model(progress)
+
+# --- Kullanıcı Silme (Tam Yeniden Eğitim Gerektirir) ---
+def delete_user(user_name, progress=None):
+    store, cache = get_sample_store(), get_preprocess_cache()
+    # Defter ve depo birlikte değişir; başka bir kioskun eğitimi ikisinin arasını görmez
+    with trainer_lock:
+        get_label_registry().remove(user_name)  # ID'si mezar taşı olur, başka kullanıcıya verilmez
+        if store.remove_user(user_name):
+            store.compact()
+            logger.info(f"{user_name} kullanıcısının yüz verileri silindi.")
+    # Taşınmış eski PNG klasörü de varsa sil (yeniden taşınmasın)
+    user_dir_path = os.path.join(DATA_DIR, user_name)
+    if os.path.isdir(user_dir_path):
+        shutil.rmtree(user_dir_path)
+    user_histograms.invalidate(user_name)
+    stale_paths = cache.paths_for_user(user_name)
+    if stale_paths:
+        for img_path in stale_paths:
+            del cache.entries[img_path]
+        cache.save()
+
+    # LBPH modelinden örnek çıkarılamadığı için model sıfırdan eğitilir
+    if not train_model(progress):
+        # Hiç kullanıcı kalmadıysa eski modeli temizle ve boş bir nesil yayınla
+        with trainer_lock:
+            for path in (MODEL_FILE, TRAINER_FILE, LABELS_FILE):
+                if os.path.exists(path):
+                    os.remove(path)
+            publish_model(None, {})
+    return True
+
+# --- Örnek Sıkıştırma (Kopyaları At, Modeli Küçült) ---
+# Kalite kapısından önce kaydedilmiş kullanıcılarda birbirinin neredeyse aynısı olan örnekler
+# modelde gereksiz histogram olarak durur; predict() süresi ve model boyutu örnek sayısıyla
+# doğrusal artar. Her kullanıcının örnekleri netliğe göre sıralanır ve tutulanlara LBPH
+# mesafesi SAMPLE_MIN_DISTANCE'tan yakın olanlar atılır (en fazla COMPACT_MAX_SAMPLES tutulur).
+# face_data/ klasöründen taşınmış kullanıcılarda atılan örneklerin PNG dosyaları da silinir;
+# yoksa bir sonraki eşitleme onları geri getirirdi. Sonra model yeniden eğitilir ve model
+# boyutu, predict() süresi ve isabet oranı öncesi/sonrası raporlanır.
+def select_samples(samples, min_distance=SAMPLE_MIN_DISTANCE, max_samples=COMPACT_MAX_SAMPLES,
+                   min_sharpness=SAMPLE_MIN_SHARPNESS, min_keep=COMPACT_MIN_SAMPLES, params=LBPH_PARAMS):
+    # Tutulacak örneklerin sıraları (artan)
+    histograms = np.vstack([lbph_histogram(sample, *params) for sample in samples])
+    sharpness = np.array([face_sharpness(np.asarray(sample)) for sample in samples])
+    kept = []
+    duplicates = []  # Kopya sayılıp atılanlar (en az min_keep tutmak için geri alınabilir)
+    for i in np.argsort(-sharpness, kind='stable'):
+        if len(kept) >= max_samples:
+            break
+        if sharpness[i] < min_sharpness and len(kept) >= min_keep:
+            continue
+        if kept and chi_square_distances(histograms[kept], histograms[i]).min() < min_distance:
+            duplicates.append(int(i))
+            continue
+        kept.append(int(i))
+    # Kopya kuralı da min_keep'in altına inemez: eksik kalırsa atılanlardan tutulanlara en uzak olan eklenir
+    while len(kept) < min(min_keep, max_samples) and duplicates:
+        nearest = [chi_square_distances(histograms[kept], histograms[i]).min() for i in duplicates]
+        kept.append(duplicates.pop(int(np.argmax(nearest))))
+    return sorted(kept)
+
+def model_size_bytes(model_recognizer):
+    return int(model_recognizer.histograms.nbytes + model_recognizer.labels.nbytes) if model_recognizer else 0
+
+def time_predictions(model_recognizer, queries):
+    # (ortalama predict() süresi ms, isabet oranı); queries: (kullanıcı ID, yüz) listesi
+    if model_recognizer is None or not queries:
+        return 0.0, 0.0
+    start = time.perf_counter()
+    hits = sum(model_recognizer.predict(face)[0] == user_id for user_id, face in queries)
+    return (time.perf_counter() - start) * 1000 / len(queries), hits / len(queries)
+
+def compact_samples(dry_run=False, min_distance=SAMPLE_MIN_DISTANCE, max_samples=COMPACT_MAX_SAMPLES,
+                    query_count=200, progress=None):
+    store, registry, cache = get_sample_store(), get_label_registry(), get_preprocess_cache()
+    sync_face_data(progress=progress)  # face_data/ altındaki her şey önce normalleştirilip depoya alınır
+    if get_model()[0] is None:
+        load_trained_data()
+    old_model = get_model()[0]
+
+    # Öncesi/sonrası karşılaştırması için her iki modelde de aynı (rastgele seçilmiş) sorgu yüzleri
+    # kullanılır; yüzler sıkıştırmadan önce kopyalanır
+    rng = np.random.default_rng(0)
+    users = store.users()
+    refs = [(user_name, i) for user_name in users for i in range(store.sample_count(user_name))]
+    if len(refs) > query_count:
+        refs = [refs[i] for i in sorted(rng.choice(len(refs), query_count, replace=False))]
+    queries = [(registry.get(user_name), np.array(store.get_samples(user_name)[i]))
+               for user_name, i in refs]
+
+    report = {"users": len(users), "samples_before": store.sample_count(), "samples_after": 0,
+              "files_removed": 0, "dry_run": dry_run}
+    # Seçim (histogram hesabı) kilit dışında yapılır; kilit sadece dosya/dizin değişiklikleri için alınır
+    plans = {}  # kullanıcı -> (örnek sayısı, tutulacak sıralar)
+    for user_name in users:
+        samples = store.get_samples(user_name)
+        if not samples:
+            continue
+        kept = select_samples(samples, min_distance, max_samples)
+        report["samples_after"] += len(kept)
+        if len(kept) < len(samples):
+            logger.info(f"{user_name}: {len(samples)} örnekten {len(kept)} tanesi tutuluyor.")
+            plans[user_name] = (len(samples), kept)
+
+    if plans and not dry_run:
+        paths_by_user = cache.paths_by_user()
+        with trainer_lock:
+            for user_name, (sample_count, kept) in plans.items():
+                samples = store.get_samples(user_name)
+                if len(samples) != sample_count:
+                    continue  # Bu arada yeniden kaydedildi; bir sonraki sıkıştırmaya kalır
+                if progress:
+                    progress(f"Sıkıştırılıyor: {user_name}")
+                # Taşınmış PNG dosyaları: atılan örneklerinkiler silinir, tutulanların sırası güncellenir
+                new_position = {old: new for new, old in enumerate(kept)}
+                for img_path in paths_by_user.get(user_name, ()):
+                    mtime_ns, size, _, position = cache.entries[img_path]
+                    if position in new_position:
+                        cache.entries[img_path] = (mtime_ns, size, user_name, new_position[position])
+                    else:
+                        del cache.entries[img_path]
+                        if os.path.exists(img_path):
+                            os.remove(img_path)
+                            report["files_removed"] += 1
+                store.replace_user(user_name, [np.array(samples[i]) for i in kept])
+                user_histograms.invalidate(user_name)
+            store.compact()
+            cache.save()
+
+    report["model_bytes_before"] = model_size_bytes(old_model)
+    report["predict_ms_before"], report["accuracy_before"] = time_predictions(old_model, queries)
+    if dry_run or not plans:
+        new_model = old_model
+    else:
+        train_model(progress)
+        new_model = get_model()[0]
+    report["model_bytes_after"] = model_size_bytes(new_model) if not dry_run else None
+    report["predict_ms_after"], report["accuracy_after"] = time_predictions(new_model, queries)
+
+    logger.info(f"Örnekler: {report['samples_before']} -> {report['samples_after']} "
+                f"({report['users']} kullanıcı, {report['files_removed']} PNG silindi)"
+                f"{' [deneme, değişiklik yapılmadı]' if dry_run else ''}")
+    if not dry_run:
+        logger.info(f"Model boyutu: {report['model_bytes_before'] / 1e6:.2f} MB -> {report['model_bytes_after'] / 1e6:.2f} MB, "
+                    f"predict(): {report['predict_ms_before']:.2f} ms -> {report['predict_ms_after']:.2f} ms, "
+                    f"isabet: %{report['accuracy_before'] * 100:.0f} -> %{report['accuracy_after'] * 100:.0f}")
+    return report
+
+# --- Arka Plan Eğitim İşçisi ---
+# Eğitim işleri Tk ana döngüsünü dondurmamak için ayrı bir thread'de sırayla çalıştırılır.
+# İşçi Tk'ye doğrudan dokunmaz; ilerleme ve sonuç olayları events kuyruğuna konur,
+# MainApp bu kuyruğu after() ile yoklar.
+USER_TRAINING_JOBS = ('enroll', 'delete')  # Sonucu pencereyle bildirilen (kullanıcının başlattığı) işler
+
+class TrainingWorker:
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.events = queue.Queue()
+        self.busy = False
+        self.thread = threading.Thread(target=self._run, name="TrainingWorker", daemon=True)
+        self.thread.start()
+
+    def submit_enroll(self, user_name):
+        self.jobs.put(('enroll', user_name))
+
+    def submit_delete(self, user_name):
+        self.jobs.put(('delete', user_name))
+
+    def submit_load(self):
+        self.jobs.put(('load', None))
+
+    def _run(self):
+        while True:
+            kind, user_name = self.jobs.get()
+            self.busy = True
+            self.events.put(('started', kind, user_name))
+
+            def progress(message):
+                self.events.put(('progress', kind, message))
+
+            try:
+                if kind == 'enroll':
+                    ok = enroll_user(user_name, progress)
+                elif kind == 'delete':
+                    ok = delete_user(user_name, progress)
+                else:
+                    # 'load' (açılış): kaskad, depo ve model arayüzü bekletmeden burada yüklenir.
+                    # Depoya taşınmamış eski face_data/ klasörleri de bu işin içinde taşınır: taşıma
+                    # bitene kadar has_user() o kullanıcıları bilmez (giriş yerine kayıt önerilirdi),
+                    # bu yüzden arayüz 'load' bitene kadar kapalı kalır.
+                    get_face_cascade()
+                    ok = load_trained_data()
+                    if has_legacy_face_data():
+                        progress("Eski yüz verileri taşınıyor...")
+                        # Eski model PNG'lerden eğitildiği için taşınan veriyle tam yeniden eğitilir
+                        if sync_face_data(progress=progress):
+                            ok = train_model(progress)
+            except Exception as e:
+                logger.error(f"Hata: Arka plan eğitimi başarısız - {e}")
+                ok = False
+            self.busy = not self.jobs.empty()
+            self.events.put(('done', kind, ok))
+
+
+# --- Model Nesli İzleyici ---
+# Aynı trainer/ klasörünü paylaşan diğer kiosklarda yapılan kayıtları görmek için işaretçi
+# dosyasının imzası (os.stat) MODEL_POLL_INTERVAL aralıkla kontrol edilir; dosya değişmediği
+# sürece model okunmaz. Yeni nesil refresh_model() ile takas edilir, süren girişler etkilenmez.
+class ModelWatcher:
+    def __init__(self, interval=MODEL_POLL_INTERVAL, on_change=None):
+        self.interval = interval
+        self.on_change = on_change  # Yeni nesil devreye alınınca bu thread'den çağrılır (Tk'ye dokunmamalı)
+        self.stopped = threading.Event()
+        self.signature = file_signature(MODEL_POINTER_FILE)
+        self.thread = threading.Thread(target=self._run, name="ModelWatcher", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            signature = file_signature(MODEL_POINTER_FILE)
+            if signature == self.signature:
+                continue
+            self.signature = signature
+            try:
+                changed = refresh_model()
+            except Exception as e:
+                logger.error(f"Hata: Yeni model nesli devreye alınamadı - {e}")
+                continue
+            if changed:
+                metrics.increment("model_reloads")
+                if self.on_change:
+                    self.on_change(get_model_generation())
+
+    def stop(self):
+        self.stopped.set()
+
+
+# --- LBPH Histogramı (NumPy) ---
+# OpenCV'nin LBPH tanıyıcısının kullandığı uzamsal histogramın aynısı: çembersel (genişletilmiş) LBP
+# kodları çift doğrusal aradeğerlemeyle hesaplanır, görüntü grid_x * grid_y hücreye bölünür ve
+# her hücrenin 2^neighbors kutulu histogramı hücre piksel sayısına bölünerek art arda eklenir.
+def lbph_histogram(face, radius=1, neighbors=8, grid_x=8, grid_y=8):
+    src = np.asarray(face, dtype=np.float32)
+    rows, cols = src.shape
+    center = src[radius:rows - radius, radius:cols - radius]
+    codes = np.zeros(center.shape, dtype=np.int64)
+    eps = np.finfo(np.float32).eps
+
+    def shifted(dy, dx):
+        return src[radius + dy:rows - radius + dy, radius + dx:cols - radius + dx]
+
+    for n in range(neighbors):
+        x = np.float32(radius * np.cos(2.0 * np.pi * n / neighbors))
+        y = np.float32(-radius * np.sin(2.0 * np.pi * n / neighbors))
+        fx, fy = int(np.floor(x)), int(np.floor(y))
+        cx, cy = int(np.ceil(x)), int(np.ceil(y))
+        tx, ty = np.float32(x - fx), np.float32(y - fy)
+        t = ((1 - tx) * (1 - ty) * shifted(fy, fx) + tx * (1 - ty) * shifted(fy, cx)
+             + (1 - tx) * ty * shifted(cy, fx) + tx * ty * shifted(cy, cx))
+        codes += ((t > center) | (np.abs(t - center) < eps)).astype(np.int64) << n
+
+    num_patterns = 2 ** neighbors
+    cell_h = codes.shape[0] // grid_y
+    cell_w = codes.shape[1] // grid_x
+    codes = codes[:cell_h * grid_y, :cell_w * grid_x]
+    cell_row = np.arange(codes.shape[0]) // cell_h
+    cell_col = np.arange(codes.shape[1]) // cell_w
+    cell = cell_row[:, None] * grid_x + cell_col[None, :]
+    hist = np.bincount((cell * num_patterns + codes).ravel(), minlength=grid_x * grid_y * num_patterns)
+    return (hist / float(cell_h * cell_w)).astype(np.float32)
+
+
+# --- Vektörel Kimlik Belirleme Dizini ---
+# Dizin modelin sütun düzenli histogram matrisinin bir görünümüdür (kopya yoktur):
+#  - identify(): mesafeler chi_square_scan ile hesaplanır (ki-kare veya L2); kullanıcı sayısı
+#    INDEX_PREFILTER_MIN_USERS'ı geçerse önce kullanıcı ortalamalarına (merkez) göre en yakın
+#    INDEX_PREFILTER_USERS kullanıcı seçilir, sadece onların örnekleri taranır (yaklaşık arama).
+# 1:1 doğrulama (girişte kullanıcı adı biliniyorsa) bu dizinle değil UserHistogramCache ile yapılır.
+# Ki-kare mesafesi OpenCV'nin HISTCMP_CHISQR_ALT'ı ile aynıdır, CONFIDENCE_THRESHOLD aynen geçerlidir.
+def chi_square_distances(matrix, query, chunk_rows=INDEX_CHUNK_ROWS):
+    # Satır düzenli küçük kümeler (bir kullanıcının örnekleri, kalite kapısı) için; ara sonuçlar
+    # chunk_rows satırlık önceden ayrılmış iki tamponda hesaplanır
+    distances = np.empty(len(matrix), dtype=np.float64)
+    diff = np.empty((min(chunk_rows, len(matrix)), np.shape(matrix)[1]), dtype=np.float32)
+    total = np.empty_like(diff)
+    for start in range(0, len(matrix), chunk_rows):
+        block = matrix[start:start + chunk_rows]
+        d, t = diff[:len(block)], total[:len(block)]
+        np.subtract(block, query, out=d)
+        np.add(block, query, out=t)
+        np.multiply(d, d, out=d)
+        # a + b ~ 0 ise pay da ~0'dır; OpenCV gibi terim yok sayılmış olur
+        np.maximum(t, np.finfo(np.float32).eps, out=t)
+        np.divide(d, t, out=d)
+        distances[start:start + len(block)] = 2.0 * d.sum(axis=1, dtype=np.float64)
+    return distances
+
+# Model histogramları sütun düzeninde (kutu x örnek) tutulur. Ki-kare mesafesi
+#   2 * sum((a - q)^2 / (a + q)) = 2 * (sum(a) + sum(q) - 4 * sum(a * q / (a + q)))
+# biçiminde yazılırsa son toplamın sadece sorgunun sıfır olmayan kutularında (LBPH'te ~%20)
+# hesaplanması yeter. O kutuların satırları INDEX_CHUNK_BINS'lik gruplar halinde önceden ayrılmış
+# iki tampona alınır: geçici bellek örnek sayısıyla doğrusaldır, tüm matris hiç kopyalanmaz.
+def chi_square_scan(columns, sums, query, cols=None, chunk_bins=INDEX_CHUNK_BINS):
+    # columns: (kutu, örnek) C-sıralı; sums: örnek başına histogram toplamı; cols: sadece bu örnekler
+    support = np.flatnonzero(query > np.finfo(np.float32).eps)
+    count = columns.shape[1] if cols is None else len(cols)
+    acc = np.zeros(count, dtype=np.float64)
+    block = np.empty((min(chunk_bins, len(support)), count), dtype=np.float32)
+    total = np.empty_like(block)
+    for start in range(0, len(support), chunk_bins):
+        bins = support[start:start + chunk_bins]
+        a, t = block[:len(bins)], total[:len(bins)]
+        if cols is None:
+            np.take(columns, bins, axis=0, out=a)
+        else:
+            a[...] = columns[np.ix_(bins, cols)]
+        q = query[bins, None]
+        np.add(a, q, out=t)
+        np.multiply(a, q, out=a)
+        np.divide(a, t, out=a)
+        acc += a.sum(axis=0, dtype=np.float64)
+    base = sums if cols is None else sums[cols]
+    return 2.0 * (base + float(query.sum(dtype=np.float64)) - 4.0 * acc)
+
+
+class IdentificationIndex:
+    def __init__(self, model, metric=IDENTIFICATION_METRIC, prefilter_users=INDEX_PREFILTER_USERS,
+                 prefilter_min_users=INDEX_PREFILTER_MIN_USERS):
+        self.model = model
+        self.params = model.params  # (radius, neighbors, grid_x, grid_y)
+        self.metric = metric
+        self.columns = model.columns  # (kutu, örnek) görünümü
+        self.ids = model.labels
+        self.user_ids, user_of_row = np.unique(self.ids, return_inverse=True)
+        self.prefilter_users = prefilter_users if len(self.user_ids) >= prefilter_min_users else None
+        self.sq_norms = np.einsum('ij,ij->j', self.columns, self.columns) if metric == "l2" else None
+        self.centroids = None
+        if self.prefilter_users:
+            # Kullanıcı -> örnek sütunları; merkezler kutu grupları halinde toplanır (matris kopyalanmaz)
+            order = np.argsort(user_of_row, kind='stable')
+            counts = np.bincount(user_of_row)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            self.user_rows = [order[start:start + count] for start, count in zip(starts, counts)]
+            self.centroids = np.empty((self.columns.shape[0], len(self.user_ids)), dtype=np.float32)
+            for start in range(0, self.columns.shape[0], 1024):
+                block = np.take(self.columns[start:start + 1024], order, axis=1)
+                self.centroids[start:start + 1024] = np.add.reduceat(block, starts, axis=1) / counts
+            self.centroid_sums = self.centroids.sum(axis=0, dtype=np.float64)
+
+    @classmethod
+    def from_recognizer(cls, lbph_recognizer, **kwargs):
+        return cls(LBPHModel.from_recognizer(lbph_recognizer), **kwargs)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def describe(self, face):
+        return lbph_histogram(face, *self.params)
+
+    def _distances(self, query, cols=None):
+        if self.metric == "l2":
+            columns = self.columns if cols is None else self.columns[:, cols]
+            norms = self.sq_norms if cols is None else self.sq_norms[cols]
+            return np.sqrt(np.maximum(norms + float(query @ query) - 2.0 * (query @ columns), 0.0))
+        return chi_square_scan(self.columns, self.model.sums, query, cols)
+
+    def _candidate_rows(self, query):
+        if self.centroids is None:
+            return None
+        if self.metric == "l2":
+            centroid_dist = np.linalg.norm(self.centroids - query[:, None], axis=0)
+        else:
+            centroid_dist = chi_square_scan(self.centroids, self.centroid_sums, query)
+        nearest = np.argpartition(centroid_dist, min(self.prefilter_users, len(centroid_dist) - 1))[:self.prefilter_users]
+        return np.concatenate([self.user_rows[i] for i in nearest])
+
+    def identify(self, face):
+        # (ID, mesafe) döndürür; recognizer.predict() ile aynı biçimde
+        if not len(self.ids):
+            return -1, float("inf")
+        query = self.describe(face)
+        cols = self._candidate_rows(query)
+        distances = self._distances(query, cols)
+        best = int(np.argmin(distances))
+        row = best if cols is None else int(cols[best])
+        return int(self.ids[row]), float(distances[best])
+
+
+# --- İkili LBPH Modeli ---
+# OpenCV LBPH modeli YAML olarak yazar/okur; binlerce kullanıcıda onlarca MB metin ayrıştırmak
+# açılışı saniyelerce bekletir. Eğitim yine OpenCV ile yapılır, ardından histogramlar ve etiketler
+# bu sınıfa alınır ve ham float32/int32 diziler olarak tek dosyaya yazılır:
+# başlık (sihirli değer, sürüm, parametreler, boyutlar) + etiketler + histogramlar + CRC32.
+# Histogramlar sürüm 2'den beri sütun düzenindedir (kutu x örnek); predict() chi_square_scan ile
+# sorgunun sıfır olmayan kutularının satırlarını okur ve OpenCV predict()'ten hızlıdır.
+# Okuma tek read() ve np.frombuffer ile kopyasız yapılır; CRC tutmazsa model bozuk sayılır.
+# YAML sadece dışa aktarma (export_yaml) ve eski trainer.yml dosyalarını içe almak için kalır.
+class LBPHModel:
+    MAGIC = b"DLBP"
+    VERSION = 2  # 1: satır düzeni (okunurken bir kez çevrilir)
+    HEADER = struct.Struct("<4sHiiiiII")  # sihirli değer, sürüm, radius, neighbors, grid_x, grid_y, satır, boyut
+    CHECKSUM = struct.Struct("<I")
+
+    def __init__(self, histograms, labels, params=LBPH_PARAMS):
+        self.params = tuple(int(p) for p in params)
+        self.labels = np.asarray(labels, dtype=np.int32).ravel()
+        histograms = np.asarray(histograms, dtype=np.float32).reshape(len(self.labels), -1)
+        # Sütun düzeni esas alınır; histograms (örnek x kutu) onun kopyasız bir görünümüdür.
+        # Sütun düzeninin devriği verilirse (load, update, drop) kopya yapılmaz.
+        self.columns = np.ascontiguousarray(histograms.T)
+        self.histograms = self.columns.T
+        self._sums = None
+
+    @classmethod
+    def from_recognizer(cls, lbph_recognizer):
+        params = (lbph_recognizer.getRadius(), lbph_recognizer.getNeighbors(),
+                  lbph_recognizer.getGridX(), lbph_recognizer.getGridY())
+        columns = np.column_stack([np.asarray(h, dtype=np.float32).ravel() for h in lbph_recognizer.getHistograms()])
+        return cls(columns.T, lbph_recognizer.getLabels(), params)
+
+    @property
+    def sums(self):
+        # Örnek başına histogram toplamı; ilk predict()'te bir kez hesaplanır
+        if self._sums is None:
+            self._sums = self.columns.sum(axis=0, dtype=np.float64)
+        return self._sums
+
+    @classmethod
+    def train(cls, faces, ids, params=LBPH_PARAMS):
+        lbph_recognizer = cv2.face.LBPHFaceRecognizer_create(*params)
+        lbph_recognizer.train(faces, np.array(ids))
+        return cls.from_recognizer(lbph_recognizer)
+
+    def update(self, faces, ids):
+        # Yeni örnekler eklenmiş yeni bir model döndürür (mevcut model değişmez)
+        added = LBPHModel.train(faces, ids, self.params)
+        return LBPHModel(np.hstack([self.columns, added.columns]).T,
+                         np.concatenate([self.labels, added.labels]), self.params)
+
+    def drop(self, ids):
+        # Verilen ID'lerin örnekleri çıkarılmış yeni bir model döndürür; hiç örnek kalmazsa None
+        keep = ~np.isin(self.labels, np.asarray(list(ids), dtype=np.int32))
+        if not keep.any():
+            return None
+        return LBPHModel(self.columns[:, keep].T, self.labels[keep], self.params)
+
+    def predict(self, face):
+        # recognizer.predict() ile aynı sonuç: en yakın örneğin (ID, ki-kare mesafesi)
+        distances = chi_square_scan(self.columns, self.sums, lbph_histogram(face, *self.params))
+        best = int(np.argmin(distances))
+        return int(self.labels[best]), float(distances[best])
+
+    def save(self, path):
+        header = self.HEADER.pack(self.MAGIC, self.VERSION, *self.params, *self.histograms.shape)
+        payload = [np.ascontiguousarray(self.labels).tobytes(), self.columns.tobytes()]
+        checksum = zlib.crc32(payload[1], zlib.crc32(payload[0], zlib.crc32(header)))
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.writelines(payload)
+            f.write(self.CHECKSUM.pack(checksum))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < cls.HEADER.size + cls.CHECKSUM.size:
+            raise ValueError(f"{path} eksik model dosyası")
+        magic, version, radius, neighbors, grid_x, grid_y, rows, dim = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version not in (1, cls.VERSION):
+            raise ValueError(f"{path} tanınmayan model biçimi (sürüm {version})")
+        body_end = len(data) - cls.CHECKSUM.size
+        if body_end != cls.HEADER.size + rows * 4 + rows * dim * 4:
+            raise ValueError(f"{path} model dosyası boyutu uyuşmuyor")
+        if zlib.crc32(memoryview(data)[:body_end]) != cls.CHECKSUM.unpack_from(data, body_end)[0]:
+            raise ValueError(f"{path} model sağlama toplamı (CRC32) tutmuyor")
+        labels = np.frombuffer(data, dtype=np.int32, count=rows, offset=cls.HEADER.size)
+        histograms = np.frombuffer(data, dtype=np.float32, count=rows * dim, offset=cls.HEADER.size + rows * 4)
+        histograms = histograms.reshape(rows, dim) if version == 1 else histograms.reshape(dim, rows).T
+        return cls(histograms, labels, (radius, neighbors, grid_x, grid_y))
+
+    @classmethod
+    def from_yaml(cls, path):
+        lbph_recognizer = cv2.face.LBPHFaceRecognizer_create()
+        lbph_recognizer.read(path)
+        return cls.from_recognizer(lbph_recognizer)
+
+    def export_yaml(self, path):
+        # OpenCV'nin LBPHFaceRecognizer.write() ile aynı düzen: alanlar "opencv_lbphfaces" haritası
+        # altında yazılır, yoksa read() dosyayı kabul etmez
+        fs = cv2.FileStorage(path, cv2.FILE_STORAGE_WRITE)
+        radius, neighbors, grid_x, grid_y = self.params
+        fs.startWriteStruct("opencv_lbphfaces", cv2.FILE_NODE_MAP)
+        fs.write("threshold", float(np.finfo(np.float64).max))
+        fs.write("radius", radius)
+        fs.write("neighbors", neighbors)
+        fs.write("grid_x", grid_x)
+        fs.write("grid_y", grid_y)
+        fs.startWriteStruct("histograms", cv2.FILE_NODE_SEQ)
+        for histogram in self.histograms:
+            fs.write("", np.ascontiguousarray(histogram).reshape(1, -1))
+        fs.endWriteStruct()
+        fs.write("labels", self.labels.reshape(-1, 1))
+        fs.startWriteStruct("labelsInfo", cv2.FILE_NODE_SEQ)
+        fs.endWriteStruct()
+        fs.endWriteStruct()
+        fs.release()
+
+
+_index_lock = threading.Lock()
+_index_cache = (None, None)  # (tanıyıcı, dizin): model takas edilince dizin yeniden kurulur
+
+def get_identification_index(model_recognizer):
+    global _index_cache
+    with _index_lock:
+        cached_recognizer, index = _index_cache
+        if cached_recognizer is not model_recognizer:
+            start = time.perf_counter()
+            index = IdentificationIndex(model_recognizer)
+            _index_cache = (model_recognizer, index)
+            metrics.observe("index_build", (time.perf_counter() - start) * 1000)
+            logger.info(f"Kimlik dizini kuruldu: {len(index)} histogram, {len(index.user_ids)} kullanıcı, "
+                  f"{(time.perf_counter() - start) * 1000:.0f} ms")
+        return index
+
+def predict_face(face, model_recognizer):
+    # Normalleştirilmiş yüz için (ID, mesafe); IDENTIFICATION_INDEX kapalıysa LBPHModel.predict() (tam tarama)
+    if IDENTIFICATION_INDEX:
+        return get_identification_index(model_recognizer).identify(face)
+    return model_recognizer.predict(face)
+
+
+# --- Kullanıcı Başına Histogram Önbelleği (1:1 Doğrulama) ---
+# Girişte kullanıcı adı zaten bilindiği için yüz herkese karşı aranmaz; sadece o kullanıcının
+# depodaki örneklerinin LBPH histogramlarıyla karşılaştırılır. Histogramlar ilk girişte
+# örneklerden hesaplanır ve en son kullanılan VERIFICATION_CACHE_USERS kullanıcı için bellekte
+# tutulur. Kullanıcının depodaki satırları değişirse (yeniden kayıt, compact) yeniden hesaplanır.
+# Maliyet kayıtlı kullanıcı sayısından bağımsızdır.
+class UserHistogramCache:
+    def __init__(self, store=None, max_users=VERIFICATION_CACHE_USERS, params=LBPH_PARAMS):
+        self._store = store  # None: ilk kullanımda get_sample_store()
+        self.max_users = max_users
+        self.params = params
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # isim -> (depo satır aralıkları, histogram matrisi)
+        self.hits = 0
+        self.misses = 0
+
+    def histograms(self, user_name):
+        # Kullanıcının örnek histogramları (satır başına bir örnek); örneği yoksa None
+        store = self._store or get_sample_store()
+        with store.lock:
+            ranges = tuple(store.index["users"].get(user_name, ()))
+            samples = store.get_samples(user_name) if ranges else []
+        with self.lock:
+            entry = self.entries.get(user_name)
+            if entry is not None and entry[0] == ranges:
+                self.entries.move_to_end(user_name)
+                self.hits += 1
+                return entry[1]
+        if not samples:
+            return None
+        matrix = np.vstack([lbph_histogram(sample, *self.params) for sample in samples])
+        with self.lock:
+            self.misses += 1
+            self.entries[user_name] = (ranges, matrix)
+            self.entries.move_to_end(user_name)
+            while len(self.entries) > self.max_users:
+                self.entries.popitem(last=False)
+        return matrix
+
+    def verify(self, face, user_name):
+        # Yüzün kullanıcının örneklerine en küçük ki-kare mesafesi; kullanıcı yoksa sonsuz
+        matrix = self.histograms(user_name)
+        if matrix is None:
+            return float("inf")
+        return float(chi_square_distances(matrix, lbph_histogram(face, *self.params)).min())
+
+    def invalidate(self, user_name=None):
+        with self.lock:
+            if user_name is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(user_name, None)
+
+
+user_histograms = UserHistogramCache()
+
+
+# --- Küçültülmüş ve Bölge Takipli Yüz Algılayıcı ---
+# Kaskad küçültülmüş gri karede çalıştırılır ve kutular tam çözünürlüğe geri ölçeklenir.
+# Tek bir yüz bulunduktan sonra sadece son kutunun etrafındaki genişletilmiş bölgede aranır;
+# her FULL_REDETECT_INTERVAL karede bir (veya bölgede yüz kaybolursa) tüm kare yeniden taranır.
+# scale=1.0 ve tracking=False ile eski (tam kare, tam çözünürlük) algılama elde edilir.
+class FaceDetector:
+    def __init__(self, cascade, scale=DETECTION_SCALE, tracking=True,
+                 min_size=DETECTION_MIN_SIZE, padding=TRACKING_PADDING,
+                 redetect_interval=FULL_REDETECT_INTERVAL):
+        self.cascade = cascade
+        self.scale = scale
+        self.tracking = tracking
+        self.min_size = min_size
+        self.padding = padding
+        self.redetect_interval = redetect_interval
+        self.last_box = None
+        self.frames_since_full = 0
+        self.timings = deque(maxlen=300)  # Son karelerin algılama süreleri (ms)
+
+    def _detect_scaled(self, gray, offset_x=0, offset_y=0):
+        if self.scale != 1.0:
+            small = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        else:
+            small = gray
+        min_w = max(1, int(self.min_size[0] * self.scale))
+        min_h = max(1, int(self.min_size[1] * self.scale))
+        faces = self.cascade.detectMultiScale(small, scaleFactor=1.1, minNeighbors=5, minSize=(min_w, min_h))
+        boxes = []
+        for (x, y, w, h) in faces:
+            boxes.append((int(x / self.scale) + offset_x, int(y / self.scale) + offset_y,
+                          int(w / self.scale), int(h / self.scale)))
+        return boxes
+
+    def _detect_in_roi(self, gray):
+        (x, y, w, h) = self.last_box
+        pad_w = int(w * self.padding)
+        pad_h = int(h * self.padding)
+        x0 = max(0, x - pad_w)
+        y0 = max(0, y - pad_h)
+        x1 = min(gray.shape[1], x + w + pad_w)
+        y1 = min(gray.shape[0], y + h + pad_h)
+        return self._detect_scaled(gray[y0:y1, x0:x1], x0, y0)
+
+    def detect(self, gray):
+        start = time.perf_counter()
+        faces = None
+        if self.tracking and self.last_box is not None and self.frames_since_full < self.redetect_interval:
+            faces = self._detect_in_roi(gray)
+            self.frames_since_full += 1
+            if len(faces) != 1:
+                faces = None  # Bölgede yüz kayboldu, tüm kareye dön
+        if faces is None:
+            faces = self._detect_scaled(gray)
+            self.frames_since_full = 0
+
+        # Sadece tek yüz varken takip edilir; birden fazla yüz her karede tam taranır
+        self.last_box = faces[0] if len(faces) == 1 else None
+        self.timings.append((time.perf_counter() - start) * 1000)
+        return faces
+
+    def average_ms(self):
+        if not self.timings:
+            return 0.0
+        return sum(self.timings) / len(self.timings)
+
+    def reset(self):
+        self.last_box = None
+        self.frames_since_full = 0
+        self.timings.clear()
+
+
+def create_face_detector(tracking=True):
+    # tracking=False: küçültme korunur ama her kare tam taranır (bölge takibinde ikinci bir yüz
+    # yeniden algılamaya kadar görülmez; girişte "birden fazla yüz" kontrolü her oy karesinde yapılmalı)
+    if FAST_DETECTION:
+        return FaceDetector(get_face_cascade(), tracking=tracking)
+    return FaceDetector(get_face_cascade(), scale=1.0, tracking=False)
+
+
+# --- Algılama Süresi Ölçümü (Öncesi / Sonrası) ---
+# Aynı kareler üzerinde eski tam çözünürlüklü algılama ile hızlı algılamayı karşılaştırır.
+# source: video dosyası yolu veya kamera indeksi
+def measure_detection(source, max_frames=300):
+    cap = cv2.VideoCapture(source)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2GRAY))
+    cap.release()
+    if not frames:
+        logger.error(f"Hata: {source} kaynağından kare okunamadı.")
+        return None
+
+    results = {}
+    for name, detector in (("tam_kare", FaceDetector(get_face_cascade(), scale=1.0, tracking=False)),
+                           ("hizli", FaceDetector(get_face_cascade()))):
+        for gray in frames:
+            detector.detect(gray)
+        results[name] = detector.average_ms()
+        logger.info(f"{name}: kare başına ortalama algılama süresi {results[name]:.2f} ms ({len(frames)} kare)")
+    if results["hizli"] > 0:
+        logger.info(f"Hızlanma: {results['tam_kare'] / results['hizli']:.1f}x")
+    return results
+
+
+# --- Toplu (Ekransız) Tanıma ---
+# Sınıf fotoğrafları ve kayıtlı videolar üzerinden sonradan yoklama almak için kamera ve Tk
+# gerektirmeyen giriş noktası. Kareler resim klasörlerinden/dosyalarından veya video
+# dosyalarından okunur, BATCH_SIZE'lık gruplar halinde thread havuzunda algılanır ve tanınır
+# (OpenCV çağrıları GIL'i bıraktığı için thread'ler paralel çalışır). Sonuçlar CSV veya JSONL yazılır.
+BATCH_RESULT_FIELDS = ["source", "frame", "time_ms", "x", "y", "w", "h", "label_id", "name", "distance", "recognized"]
+
+def iter_source_frames(sources, frame_step=1):
+    # (kaynak, kare no, zaman ms, BGR kare) üretir
+    for source in sources:
+        if os.path.isdir(source):
+            image_paths = [os.path.join(source, f) for f in sorted(os.listdir(source))
+                           if f.lower().endswith(IMAGE_EXTENSIONS)]
+        elif source.lower().endswith(IMAGE_EXTENSIONS):
+            image_paths = [source]
+        else:
+            image_paths = None
+
+        if image_paths is not None:
+            for img_path in image_paths:
+                frame = cv2.imread(img_path)
+                if frame is None:
+                    logger.error(f"Hata: {img_path} okunamadı.")
+                    continue
+                yield img_path, 0, 0.0, frame
+            continue
+
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            logger.error(f"Hata: {source} açılamadı.")
+            continue
+        frame_index = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if frame_index % frame_step == 0:
+                yield source, frame_index, cap.get(cv2.CAP_PROP_POS_MSEC), frame
+            frame_index += 1
+        cap.release()
+
+def recognize_faces(gray, boxes, model=None):
+    # Verilen yüz kutularını tek seferde tanır; her kutu için bir sözlük döndürür
+    current_recognizer, current_labels = model or get_model()
+    results = []
+    for (x, y, w, h) in boxes:
+        id_, conf = predict_face(normalize_face(gray[y:y + h, x:x + w]), current_recognizer)
+        recognized = conf <= CONFIDENCE_THRESHOLD and id_ in current_labels
+        results.append({"x": x, "y": y, "w": w, "h": h, "label_id": int(id_),
+                        "name": current_labels.get(id_, "Bilinmiyor") if recognized else "Bilinmiyor",
+                        "distance": round(float(conf), 2), "recognized": recognized})
+    return results
+
+def recognize_frame(frame, model=None):
+    # Bir karedeki tüm yüzleri algılar ve tanır; her yüz için bir sözlük döndürür.
+    # Kayıt örnekleri aynalanmış kameradan alındığı için canlı yollardaki gibi (AttendanceApp,
+    # recognition_worker) tanıma aynalanmış karede yapılır; kutular asıl kareye geri çevrilir.
+    gray = cv2.flip(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), 1)
+    detector = FaceDetector(get_face_cascade(), tracking=False)
+    results = recognize_faces(gray, detector.detect(gray), model)
+    for result in results:
+        result["x"] = int(gray.shape[1] - result["x"] - result["w"])
+    return results
+
+def recognize_batch(sources, output_path, batch_size=BATCH_SIZE, frame_step=1, workers=None):
+    if get_model()[0] is None and not load_trained_data():
+        logger.error("Hata: Eğitilmiş model bulunamadı.")
+        return None
+    model = get_model()  # Tüm çalışma boyunca aynı model kullanılır
+    workers = TRAINING_WORKERS if workers is None else workers
+    as_jsonl = output_path.lower().endswith((".jsonl", ".json"))
+
+    frames = faces = recognized = 0
+    start = time.perf_counter()
+    with open(output_path, 'w', newline='', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="BatchRecognizer") as executor:
+        writer = None if as_jsonl else csv.DictWriter(out, fieldnames=BATCH_RESULT_FIELDS)
+        if writer:
+            writer.writeheader()
+
+        def flush(batch):
+            nonlocal faces, recognized
+            for (source, frame_index, time_ms, _), results in zip(batch, executor.map(
+                    lambda item: recognize_frame(item[3], model), batch)):
+                for result in results:
+                    row = {"source": source, "frame": frame_index, "time_ms": round(time_ms, 1), **result}
+                    if writer:
+                        writer.writerow(row)
+                    else:
+                        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    faces += 1
+                    recognized += result["recognized"]
+
+        batch = []
+        for item in iter_source_frames(sources, frame_step):
+            batch.append(item)
+            frames += 1
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+    elapsed = time.perf_counter() - start
+    summary = {"frames": frames, "faces": faces, "recognized": recognized, "seconds": round(elapsed, 3),
+               "fps": round(frames / elapsed, 1) if elapsed > 0 else 0.0}
+    logger.info(f"Toplu tanıma tamamlandı: {frames} kare, {faces} yüz, {recognized} tanındı, "
+          f"{elapsed:.2f} s ({summary['fps']} kare/s). Sonuçlar: {output_path}")
+    return summary
+
+
+# --- Çok Yüzlü İz Takibi ---
+# Sürekli yoklamada her karedeki her yüzü tanımak yerine yüzler kareler arasında izlenir.
+# Yeni kutu, önceki izlerle kutu örtüşmesine (IoU) göre açgözlü eşleştirilir; eşleşmeyen kutu
+# yeni iz açar ve sadece yeni (veya henüz tanınamamış) izler tanıyıcıya gönderilir.
+# Böylece her öğrenci kadrajda kaldığı sürece bir kez tahmin edilir.
+def box_iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / float(aw * ah + bw * bh - inter)
+
+
+class FaceTrack:
+    def __init__(self, track_id, box):
+        self.track_id = track_id
+        self.box = box
+        self.misses = 0
+        self.age = 0  # İz açıldığından beri geçen kare sayısı
+        self.attempts = 0
+        self.last_attempt = None
+        self.result = None  # Son tanıma sonucu (recognize_faces sözlüğü)
+
+    @property
+    def recognized(self):
+        return self.result is not None and self.result["recognized"]
+
+    def needs_prediction(self, max_attempts=TRACK_MAX_ATTEMPTS, retry_interval=TRACK_RETRY_INTERVAL):
+        if self.recognized or self.attempts >= max_attempts:
+            return False
+        return self.last_attempt is None or self.age - self.last_attempt >= retry_interval
+
+
+class FaceTracker:
+    def __init__(self, iou_threshold=TRACK_IOU_THRESHOLD, max_misses=TRACK_MAX_MISSES):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.tracks = []
+        self.next_id = 0
+
+    def update(self, boxes):
+        # Kutuları izlere eşleştirir, görünen izleri döndürür
+        pairs = sorted(((box_iou(track.box, box), t, b) for t, track in enumerate(self.tracks)
+                        for b, box in enumerate(boxes)), reverse=True)
+        matched_tracks = set()
+        matched_boxes = set()
+        for iou, t, b in pairs:
+            if iou < self.iou_threshold:
+                break
+            if t in matched_tracks or b in matched_boxes:
+                continue
+            matched_tracks.add(t)
+            matched_boxes.add(b)
+            self.tracks[t].box = boxes[b]
+            self.tracks[t].misses = 0
+
+        for t, track in enumerate(self.tracks):
+            track.age += 1
+            if t not in matched_tracks:
+                track.misses += 1
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+
+        for b, box in enumerate(boxes):
+            if b not in matched_boxes:
+                self.tracks.append(FaceTrack(self.next_id, box))
+                self.next_id += 1
+        return [track for track in self.tracks if track.misses == 0]
+
+    def reset(self):
+        self.tracks = []
+
+
+# --- Giriş ve Yoklama Olay Deposu ---
+# Her giriş kararı ve yoklama kaydı SQLite veritabanına (WAL kipi) bir olay olarak yazılır.
+# Tk thread'i sadece sınırlı kuyruğa koyar (put_nowait); arka plandaki yazıcı veritabanını açar,
+# şemayı kurar ve olayları EVENT_BATCH_SIZE'lık gruplar halinde tek işlemde yazar. Kuyruk dolarsa olay atılır ve
+# "events_dropped" sayacı artar; arayüz hiçbir zaman diski beklemez.
+# (day, decision, user) ve (user, ts) indeksleri sayesinde "bugün gelenler" ve "öğrenci geçmişi"
+# sorguları milyonlarca satırda da sayfa sayfa milisaniyeler içinde döner.
+class AttendanceStore:
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY,
+            ts REAL NOT NULL,
+            day TEXT NOT NULL,
+            user TEXT NOT NULL,
+            user_id INTEGER,
+            distance REAL,
+            decision TEXT NOT NULL,
+            source TEXT NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS events_user_ts ON events (user, ts)",
+        "CREATE INDEX IF NOT EXISTS events_day_decision_user ON events (day, decision, user, ts)",
+    )
+    INSERT = ("INSERT INTO events (ts, day, user, user_id, distance, decision, source) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+    def __init__(self, path=ATTENDANCE_DB_FILE, queue_size=EVENT_QUEUE_SIZE, batch_size=EVENT_BATCH_SIZE,
+                 flush_interval=EVENT_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.local = threading.local()  # Her thread kendi okuma bağlantısını kullanır
+        self.lock = threading.Lock()
+        self.thread = None  # Yazıcı ilk olayda/sorguda başlar; veritabanını o açar
+        self.ready = threading.Event()  # Şema hazır (veya açılış başarısız) olunca işaretlenir
+        self.setup_error = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _ensure_started(self, wait=False):
+        # Açılış, WAL geçişi ve şema yazıcı thread'inde yapılır; Tk thread'i diski beklemez.
+        # wait=True: şema hazır olana kadar bekle (sorgular için)
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="AttendanceWriter", daemon=True)
+                self.thread.start()
+        if wait:
+            self.ready.wait()
+            if self.setup_error is not None:
+                raise self.setup_error
+
+    def _setup(self):
+        try:
+            conn = self._connect()
+            with conn:
+                for statement in self.SCHEMA:
+                    conn.execute(statement)
+            return conn
+        except sqlite3.Error as e:
+            self.setup_error = e
+            logger.error(f"Hata: Olay veritabanı açılamadı - {e}")
+            return None
+        finally:
+            self.ready.set()
+
+    def record(self, user, decision, distance=None, user_id=None, source="login", ts=None):
+        # Tk thread'inden çağrılabilir; beklemez. Olay kuyruğa alındıysa True
+        self._ensure_started()
+        ts = time.time() if ts is None else ts
+        day = time.strftime("%Y-%m-%d", time.localtime(ts))
+        event = (ts, day, user, None if user_id is None else int(user_id),
+                 None if distance is None else float(distance), decision, source)
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            metrics.increment("events_dropped")
+            logger.warning(f"Uyarı: Olay kuyruğu dolu, olay atıldı - {user} {decision}")
+            return False
+
+    def _run(self):
+        conn = self._setup()  # None ise olaylar yazılamaz ama kuyruk ve flush() beklemeleri boşaltılır
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            # Grup dolana, süre bitene veya flush/kapatma işareti gelene kadar topla
+            while len(batch) < self.batch_size and isinstance(batch[-1], tuple):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            rows = [item for item in batch if isinstance(item, tuple)]
+            if rows and conn is None:
+                logger.error(f"Hata: {len(rows)} olay yazılamadı - veritabanı açık değil")
+            elif rows:
+                start = time.perf_counter()
+                try:
+                    with conn:
+                        conn.executemany(self.INSERT, rows)
+                    metrics.observe("event_write", (time.perf_counter() - start) * 1000)
+                    metrics.increment("events_written", len(rows))
+                except sqlite3.Error as e:
+                    logger.error(f"Hata: {len(rows)} olay yazılamadı - {e}")
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()  # flush() bekleyenler
+                elif item is None:
+                    stopping = True
+        if conn is not None:
+            conn.close()
+
+    def flush(self, timeout=5.0):
+        # Kuyruktaki olaylar yazılana kadar bekler (rapor öncesi ve kapanışta)
+        if self.thread is None:
+            return True
+        written = threading.Event()
+        try:
+            self.queue.put(written, timeout=timeout)
+        except queue.Full:
+            return False
+        return written.wait(timeout)
+
+    def close(self, timeout=5.0):
+        if self.thread is None:
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.error("Hata: Olay kuyruğu kapanışta boşalmadı, bekleyen olaylar yazılamadı.")
+            return
+        self.thread.join(timeout)
+
+    def _reader(self):
+        self._ensure_started(wait=True)
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = sqlite3.connect(self.path, timeout=10.0)
+        return conn
+
+    def attendees(self, day, offset=0, limit=EVENTS_PAGE_SIZE):
+        # O gün başarılı girişi olanlar: (kullanıcı, ilk zaman, son zaman, giriş sayısı), isme göre
+        return self._reader().execute(
+            "SELECT user, MIN(ts), MAX(ts), COUNT(*) FROM events WHERE day = ? AND decision = 'success' "
+            "GROUP BY user ORDER BY user LIMIT ? OFFSET ?", (day, limit, offset)).fetchall()
+
+    def attendee_count(self, day):
+        return self._reader().execute(
+            "SELECT COUNT(DISTINCT user) FROM events WHERE day = ? AND decision = 'success'", (day,)).fetchone()[0]
+
+    def history(self, user, offset=0, limit=EVENTS_PAGE_SIZE):
+        # Öğrencinin olayları, en yeniden eskiye: (zaman, karar, mesafe, kaynak)
+        return self._reader().execute(
+            "SELECT ts, decision, distance, source FROM events WHERE user = ? ORDER BY ts DESC LIMIT ? OFFSET ?",
+            (user, limit, offset)).fetchall()
+
+    def history_count(self, user):
+        return self._reader().execute("SELECT COUNT(*) FROM events WHERE user = ?", (user,)).fetchone()[0]
+
+    def day_events(self, day):
+        # Günün tüm olayları, zamana göre (dışa aktarma için)
+        return self._reader().execute(
+            "SELECT ts, user, user_id, distance, decision, source FROM events WHERE day = ? ORDER BY ts",
+            (day,)).fetchall()
+
 
-face_cascade = cv2.CascadeClassifier(HAAR_CASCADE_PATH)
-# recognizer'ı global yapmak yerine gerektiğinde oluşturalım veya load_trained_data içinde yönetelim
-recognizer = None
-labels = {} # ID -> İsim eşleşmesi için
+attendance_store = AttendanceStore()
 
-# --- Eğitilmiş Modeli ve Etiketleri Yükle ---
-def load_trained_data():
-    global labels, recognizer
-    if os.path.exists(TRAINER_FILE) and os.path.exists(LABELS_FILE):
-        # LBPH tanıyıcıyı burada oluştur ve eğitilmiş veriyi oku
-        recognizer = cv2.face.LBPHFaceRecognizer_create()
-        recognizer.read(TRAINER_FILE)
-        with open(LABELS_FILE, 'rb') as f:
-            labels = pickle.load(f)
-        print("Eğitilmiş model ve etiketler yüklendi.")
-        return True
-    print("Eğitilmiş model bulunamadı.")
-    recognizer = None # Model yüklenemezse None yapalım
-    return False
-
-# --- Modeli Eğitme Fonksiyonu ---
-def train_model():
-    global recognizer # Eğitilen modeli global değişkene de atayalım
-    current_id = 0
-    label_ids = {} # isim -> ID
-    face_samples = []
-    ids = []
-    print("Yüz verileri taranıyor ve model eğitiliyor...")
-
-    base_dir = DATA_DIR
-    for root_dir, dirs, files in os.walk(base_dir):
-        for dir_name in dirs: # Her bir kullanıcı klasörü
-            user_name = dir_name
-            user_label = user_name # Etiket olarak klasör adını (kullanıcı adını) kullanıyoruz
-
-            if user_label not in label_ids:
-                label_ids[user_label] = current_id
-                current_id += 1
-            user_id = label_ids[user_label]
-
-            user_dir_path = os.path.join(root_dir, dir_name)
-            print(f"İşlenen klasör: {user_dir_path}, Kullanıcı ID: {user_id}")
-
-            for filename in os.listdir(user_dir_path):
-                if filename.endswith((".png", ".jpg", ".jpeg")):
-                    img_path = os.path.join(user_dir_path, filename)
-                    try:
-                        pil_image = Image.open(img_path).convert("L")
-                        image_array = np.array(pil_image, "uint8")
-                        faces = face_cascade.detectMultiScale(image_array, scaleFactor=1.1, minNeighbors=5)
-
-                        # Eğitim için tüm gri resmi veya sadece yüzü kullanabilirsiniz.
-                        # Kayıt sırasında kırpılmışsa tüm resmi kullanmak yeterli.
-                        face_samples.append(image_array)
-                        ids.append(user_id)
-                        # print(f"  -> {filename} eklendi. ID: {user_id}") # Çok fazla log üretebilir
-
-                    except Exception as e:
-                        print(f"Hata: {img_path} işlenemedi - {e}")
+ATTENDANCE_FIELDS = ["time", "name", "label_id", "distance", "source"]
 
-    if not face_samples or not ids:
-        print("Eğitilecek yüz verisi bulunamadı.")
-        return False
+def export_attendance(day, path=ATTENDANCE_FILE, store=None):
+    # Günün başarılı girişleri ve yoklama kayıtları CSV olarak yazılır
+    store = store or attendance_store
+    store.flush()
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=ATTENDANCE_FIELDS)
+        writer.writeheader()
+        for ts, user, user_id, distance, decision, source in store.day_events(day):
+            if decision != "success":
+                continue
+            writer.writerow({"time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)), "name": user,
+                             "label_id": user_id, "distance": distance, "source": source})
+            count += 1
+    return count
 
-    print("Veriler hazırlandı. Model eğitiliyor...")
-    id_to_label = {v: k for k, v in label_ids.items()}
-    with open(LABELS_FILE, 'wb') as f:
-        pickle.dump(id_to_label, f)
-    print(f"Etiketler kaydedildi: {id_to_label}")
-
-    # Tanıyıcıyı oluştur ve eğit
-    recognizer = cv2.face.LBPHFaceRecognizer_create()
-    recognizer.train(face_samples, np.array(ids))
-    recognizer.write(TRAINER_FILE) # Eğitilmiş modeli kaydet
-    print(f"Model eğitildi ve '{TRAINER_FILE}' olarak kaydedildi.")
-    load_trained_data() # Yeni eğitilen modeli hemen yükle (global recognizer ve labels güncellenir)
-    return True
+# --- Yoklama Kaydı ---
+# Tanınan her öğrenci için olay deposuna bir yoklama kaydı yazılır. Aynı öğrenci
+# ATTENDANCE_DEDUP_WINDOW saniye içinde tekrar tanınırsa (kadrajdan çıkıp geri girse bile)
+# yeni kayıt açılmaz.
+class AttendanceLog:
+    def __init__(self, store=None, dedup_window=ATTENDANCE_DEDUP_WINDOW):
+        self.store = store or attendance_store
+        self.dedup_window = dedup_window
+        self.last_seen = {}  # isim -> son kayıt zamanı (monotonic)
+        self.lock = threading.Lock()
+
+    def record(self, result, now=None, source="attendance"):
+        # Yeni kayıt yazıldıysa satırı, tekrar ise None döndürür
+        now = time.monotonic() if now is None else now
+        name = result["name"]
+        with self.lock:
+            last = self.last_seen.get(name)
+            if last is not None and now - last < self.dedup_window:
+                return None
+            self.last_seen[name] = now
+        ts = time.time()
+        self.store.record(name, "success", result["distance"], result["label_id"], source=source, ts=ts)
+        return {"time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)), "name": name,
+                "label_id": result["label_id"], "distance": result["distance"]}
+
+
+# --- Kayıt Örneği Zamanlayıcısı ---
+# Bir sonraki kayıt örneğinin ne zaman alınacağına arayüzü bekletmeden karar verir:
+# son örnekten bu yana SAMPLE_MIN_INTERVAL geçmiş olmalı ve yüz görünümü (küçük resim farkı)
+# veya konumu/pozu (kutu kayması) yeterince değişmiş olmalı. Böylece birbirinin aynısı
+# beş kare yerine daha çeşitli örnekler toplanır.
+class SampleScheduler:
+    def __init__(self, min_interval=SAMPLE_MIN_INTERVAL, min_change=SAMPLE_MIN_CHANGE,
+                 min_shift=SAMPLE_MIN_SHIFT, max_wait=SAMPLE_MAX_WAIT):
+        self.min_interval = min_interval
+        self.min_change = min_change
+        self.min_shift = min_shift
+        self.max_wait = max_wait
+        self.last_time = None
+        self.last_thumb = None
+        self.last_box = None
+
+    def _thumbnail(self, roi_gray):
+        return cv2.resize(roi_gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def should_capture(self, roi_gray, box, now=None):
+        now = time.monotonic() if now is None else now
+        if self.last_time is None:
+            return True
+        elapsed = now - self.last_time
+        if elapsed < self.min_interval:
+            return False
+        if elapsed >= self.max_wait:
+            return True
+
+        change = float(np.mean(np.abs(self._thumbnail(roi_gray) - self.last_thumb)))
+        (x, y, w, h) = box
+        (lx, ly, lw, lh) = self.last_box
+        shift = max(abs(x - lx), abs(y - ly), abs(w - lw)) / max(lw, 1)
+        return change >= self.min_change or shift >= self.min_shift
+
+    def mark_captured(self, roi_gray, box, now=None):
+        self.last_time = time.monotonic() if now is None else now
+        self.last_thumb = self._thumbnail(roi_gray)
+        self.last_box = box
+
+
+# --- Kayıt Örneği Kalite Kapısı ---
+# Zamanlayıcının seçtiği kare örnek olarak tutulmadan önce kontrol edilir: yüz yeterince büyük
+# mü (uzaktan alınan yüz büyütülünce bulanıklaşır), net mi (normalleştirilmiş yüzün Laplace
+# varyansı) ve daha önce tutulan örneklerden yeterince farklı mı (LBPH ki-kare mesafesi; neredeyse
+# aynı örnekler modelde gereksiz histogram olur). Reddetme nedeni kullanıcıya gösterilir.
+def face_sharpness(face):
+    return float(cv2.Laplacian(face, cv2.CV_64F).var())
+
+class SampleQualityGate:
+    def __init__(self, min_face_size=SAMPLE_MIN_FACE_SIZE, min_sharpness=SAMPLE_MIN_SHARPNESS,
+                 min_distance=SAMPLE_MIN_DISTANCE, relax_after=SAMPLE_GATE_RELAX, params=LBPH_PARAMS):
+        self.min_face_size = min_face_size
+        self.min_sharpness = min_sharpness
+        self.min_distance = min_distance
+        self.relax_after = relax_after
+        self.params = params
+        self.histograms = []  # Tutulan örneklerin histogramları
+        self.pending = None
+        self.last_accept = None
+
+    def check(self, face, box, now=None):
+        # face: normalleştirilmiş yüz. (uygun mu, reddetme nedeni) döndürür
+        now = time.monotonic() if now is None else now
+        if self.last_accept is None:
+            self.last_accept = now
+        if min(box[2], box[3]) < self.min_face_size:
+            metrics.increment("sample_rejected_size")
+            return False, "Kameraya biraz yaklaşın"
+        if face_sharpness(face) < self.min_sharpness:
+            metrics.increment("sample_rejected_blur")
+            return False, "Görüntü bulanık, sabit durun"
+        histogram = lbph_histogram(face, *self.params)
+        if self.histograms and now - self.last_accept < self.relax_after:
+            distance = chi_square_distances(np.vstack(self.histograms), histogram).min()
+            if distance < self.min_distance:
+                metrics.increment("sample_rejected_duplicate")
+                return False, "Başınızı hafifçe çevirin"
+        self.pending = histogram
+        return True, None
+
+    def accept(self, now=None):
+        self.histograms.append(self.pending)
+        self.pending = None
+        self.last_accept = time.monotonic() if now is None else now
+
+
+# --- Çok Kareli Giriş Doğrulayıcı ---
+# Girişte ilk karedeki tek predict() sonucuna göre karar vermek yerine, ardışık karelerin
+# (ID, mesafe) sonuçları toplanır. En çok oy alan ID'nin medyan mesafesi eşikle karşılaştırılır;
+# sonuç açıkça iyi veya kötüyse LOGIN_MIN_FRAMES karede erken karar verilir, değilse
+# LOGIN_MAX_FRAMES kareye veya LOGIN_TIME_BUDGET süresine kadar beklenir.
+class LoginVerifier:
+    def __init__(self, threshold=CONFIDENCE_THRESHOLD, max_frames=LOGIN_MAX_FRAMES, min_frames=LOGIN_MIN_FRAMES,
+                 time_budget=LOGIN_TIME_BUDGET, early_margin=LOGIN_EARLY_MARGIN, min_agreement=LOGIN_MIN_AGREEMENT):
+        self.threshold = threshold
+        self.max_frames = max_frames
+        self.min_frames = min_frames
+        self.time_budget = time_budget
+        self.early_margin = early_margin
+        self.min_agreement = min_agreement
+        self.frames = []  # Kare başına (ID, mesafe)
+        self.start_time = None
+
+    def add(self, id_, conf, now=None):
+        now = time.monotonic() if now is None else now
+        if self.start_time is None:
+            self.start_time = now
+        self.frames.append((int(id_), float(conf)))
+
+    def distances(self):
+        return [conf for _, conf in self.frames]
+
+    def summary(self):
+        # (en çok oy alan ID, o ID'nin medyan mesafesi, oy oranı); henüz kare yoksa None
+        if not self.frames:
+            return None
+        votes = {}
+        for id_, conf in self.frames:
+            votes.setdefault(id_, []).append(conf)
+        # Oy sayısı eşitse medyan mesafesi küçük olan kazanır
+        best_id = min(votes, key=lambda i: (-len(votes[i]), float(np.median(votes[i]))))
+        return best_id, float(np.median(votes[best_id])), len(votes[best_id]) / len(self.frames)
+
+    def decide(self, now=None):
+        # True: kabul, False: ret, None: daha fazla kare gerekli
+        result = self.summary()
+        if result is None:
+            return None
+        _, median, agreement = result
+        accepted = median <= self.threshold and agreement >= self.min_agreement
+        if len(self.frames) >= self.min_frames:
+            if accepted and median <= self.threshold - self.early_margin:
+                return True
+            if median > self.threshold + self.early_margin:
+                return False
+        now = time.monotonic() if now is None else now
+        if len(self.frames) >= self.max_frames or now - self.start_time >= self.time_budget:
+            return accepted
+        return None
+
+
+# --- Kamera Yakalama Thread'i ---
+# Kamera okuma (cap.read) Tk döngüsünden ayrılır. Okunan kareler küçük, sınırlı bir halka
+# tampona yazılır; tampon doluysa en eski kare atılır. Arayüz her zaman en son kareyi okur,
+# böylece algılama ne kadar yavaş olursa olsun gecikme en fazla birkaç kare olur.
+class FrameGrabber:
+    def __init__(self, cap, buffer_size=FRAME_BUFFER_SIZE):
+        self.cap = cap
+        self.buffer = deque(maxlen=buffer_size)
+        self.lock = threading.Lock()
+        self.frame_id = 0  # Okunan son karenin sıra numarası
+        self.failed = False
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="FrameGrabber", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while self.running:
+            start = time.perf_counter()
+            ret, frame = self.cap.read()
+            metrics.observe("capture", (time.perf_counter() - start) * 1000)
+            if not ret:
+                self.failed = True
+                break
+            with self.lock:
+                self.frame_id += 1
+                self.buffer.append((self.frame_id, frame))
+
+    def latest(self):
+        # (sıra numarası, kare) döndürür; henüz kare yoksa (0, None)
+        with self.lock:
+            if not self.buffer:
+                return 0, None
+            return self.buffer[-1]
+
+    def stop(self):
+        self.running = False
+        if self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1.0)
+
+
+# --- Kalıcı Kamera Servisi ---
+# Her giriş/kayıt penceresi için kamerayı açıp kapatmak yerine MainApp tek bir servis tutar.
+# Kamera ilk kullanımda açılır, FrameGrabber ile sürekli okunur ve pencereler en son kareyi
+# buradan alır. Son pencere bıraktıktan CAMERA_IDLE_TIMEOUT saniye sonra kimse almadıysa kapatılır.
+# Her oturumun ilk kareye kadar geçen süresi (soğuk/sıcak açılış) ölçülüp saklanır.
+class CameraService:
+    def __init__(self, index=CAMERA_INDEX, idle_timeout=CAMERA_IDLE_TIMEOUT):
+        self.index = index
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        self.cap = None
+        self.grabber = None
+        self.users = 0
+        self.idle_timer = None
+        self.first_frame_times = deque(maxlen=100)  # (saniye, soğuk açılış mı)
+
+    def acquire(self):
+        # Kamerayı kullanıma al; (açıldı mı, bu çağrıda yeni mi açıldı) döndürür
+        with self.lock:
+            if self.idle_timer:
+                self.idle_timer.cancel()
+                self.idle_timer = None
+            cold = self.grabber is None or self.grabber.failed
+            if cold:
+                self._close()
+                cap = cv2.VideoCapture(self.index)
+                if not cap.isOpened():
+                    cap.release()
+                    return False, cold
+                self.cap = cap
+                self.grabber = FrameGrabber(cap)
+                logger.info("Kamera açıldı.")
+            self.users += 1
+            return True, cold
+
+    def release(self):
+        with self.lock:
+            self.users = max(0, self.users - 1)
+            if self.users == 0 and self.grabber is not None and self.idle_timer is None:
+                self.idle_timer = threading.Timer(self.idle_timeout, self._close_if_idle)
+                self.idle_timer.daemon = True
+                self.idle_timer.start()
+
+    def latest(self):
+        grabber = self.grabber
+        return grabber.latest() if grabber else (0, None)
+
+    @property
+    def failed(self):
+        grabber = self.grabber
+        return grabber is None or grabber.failed
+
+    def record_first_frame(self, seconds, cold):
+        self.first_frame_times.append((seconds, cold))
+        metrics.observe("first_frame_cold" if cold else "first_frame_warm", seconds * 1000)
+        logger.info(f"İlk kare süresi: {seconds * 1000:.0f} ms ({'soğuk' if cold else 'sıcak'} açılış)")
+
+    def _close_if_idle(self):
+        with self.lock:
+            self.idle_timer = None
+            if self.users == 0:
+                self._close()
+                logger.info("Kamera boşta kaldığı için kapatıldı.")
+
+    def _close(self):
+        if self.grabber:
+            self.grabber.stop()
+            self.grabber = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def close(self):
+        with self.lock:
+            if self.idle_timer:
+                self.idle_timer.cancel()
+                self.idle_timer = None
+            self._close()
+
+
+# --- Önizleme Çizici ---
+# Her karede yeni RGB dizisi, PIL görüntüsü ve tam çözünürlükte PhotoImage oluşturmak yerine
+# önceden ayrılmış tamponlar yeniden kullanılır: kare PREVIEW_WIDTH genişliğine küçültülür,
+# kutu/isim/mesafe bu küçük kareye çizilir, RGBA tampona çevrilir ve aynı PhotoImage'a
+# paste() edilir. PIL görüntüsü RGBA tamponla belleği paylaşır (kopya yok).
+# Önizleme PREVIEW_FPS ile sınırlıdır; algılama hızından bağımsızdır.
+class PreviewRenderer:
+    def __init__(self, label, width=PREVIEW_WIDTH, fps=PREVIEW_FPS):
+        self.label = label
+        self.width = width
+        self.interval = 1.0 / fps if fps else 0.0
+        self.last_shown = 0.0
+        self.scale = 1.0
+        self.small = None  # Küçültülmüş BGR kare (üstüne çizim yapılır)
+        self.rgba = None
+        self.image = None
+        self.photo = None
+        self.timings = deque(maxlen=300)  # Son önizlemelerin çizim süreleri (ms)
+
+    def due(self, now=None):
+        now = time.perf_counter() if now is None else now
+        return now - self.last_shown >= self.interval
+
+    def _allocate(self, frame):
+        h, w = frame.shape[:2]
+        self.scale = min(1.0, self.width / float(w))
+        size = (max(1, int(w * self.scale)), max(1, int(h * self.scale)))
+        self.small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self.rgba = np.empty((size[1], size[0], 4), dtype=np.uint8)
+        self.image = Image.frombuffer("RGBA", size, self.rgba, "raw", "RGBA", 0, 1)
+        self.photo = ImageTk.PhotoImage(image=self.image)
+        self.label.configure(image=self.photo)
+        self.label.imgtk = self.photo  # Referansı sakla!
+
+    def render(self, frame, overlays=(), status_text=""):
+        # overlays: (kutu, yazı, BGR renk) üçlüleri; kutular tam çözünürlük koordinatlarında
+        # status_text: sol üst köşeye yazılan ölçüm özeti (boşsa yazılmaz)
+        start = time.perf_counter()
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.width / float(w))
+        if self.small is None or self.small.shape[:2] != (max(1, int(h * scale)), max(1, int(w * scale))):
+            self._allocate(frame)
+        cv2.resize(frame, (self.small.shape[1], self.small.shape[0]), dst=self.small, interpolation=cv2.INTER_AREA)
+        for (x, y, bw, bh), text, color in overlays:
+            x0, y0 = int(x * self.scale), int(y * self.scale)
+            x1, y1 = int((x + bw) * self.scale), int((y + bh) * self.scale)
+            cv2.rectangle(self.small, (x0, y0), (x1, y1), color, 2)
+            if text:
+                cv2.putText(self.small, text, (x0, max(12, y0 - 6)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+        if status_text:
+            cv2.putText(self.small, status_text, (6, 16), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 255), 1)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2RGBA, dst=self.rgba)
+        self.photo.paste(self.image)
+        self.last_shown = start
+        self.timings.append((time.perf_counter() - start) * 1000)
+
+    def average_ms(self):
+        if not self.timings:
+            return 0.0
+        return sum(self.timings) / len(self.timings)
 
 
 class FaceCaptureApp:
-    def __init__(self, parent_window, mode, user_name, required_images):
+    def __init__(self, parent_window, mode, user_name, required_images, camera):
         self.parent_window = parent_window
         self.mode = mode  # 'register' or 'login'
         self.user_name = user_name
@@ -127,6 +2761,25 @@ class FaceCaptureApp:
         self.detected_name = "Bilinmiyor"
         self.confidence_score = 0
         self.login_handled = False  # Giriş durumu işlendi mi kontrolü
+        self.camera = camera
+        self.camera_acquired = False
+        self.cold_start = False
+        self.session_start = None  # İlk kare süresi ölçümü için
+        self.last_frame_id = 0  # Son işlenen karenin numarası (aynı kareyi iki kez işlememek için)
+        # Girişte yüz görülen her kare bir oydur; ikinci yüzü kaçırmamak için bölge takibi kullanılmaz
+        self.detector = create_face_detector(tracking=(mode != 'login'))
+        self.sample_scheduler = SampleScheduler()
+        self.quality_gate = SampleQualityGate()
+        self.login_verifier = LoginVerifier()
+        # 1:1 doğrulamada iddia edilen kullanıcının kalıcı ID'si (1:N tanımada None)
+        self.claimed_id = None
+        if mode == 'login' and VERIFY_CLAIMED_USER:
+            self.claimed_id = get_label_registry().get(user_name)
+        # Kayıt örnekleri bellekte toplanır, depoya arayüz thread'i dışında yazılır
+        self.image_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SampleWriter")
+        self.pending_writes = []
+        self.collected_samples = []
+        self.registration_done = False
 
         self.capture_window = tk.Toplevel(parent_window)
         self.capture_window.title("Yüz Tanıma")
@@ -149,6 +2802,13 @@ class FaceCaptureApp:
 
         self.video_label = tk.Label(self.capture_window, bg="black")
         self.video_label.pack(pady=10)
+        self.preview = PreviewRenderer(self.video_label)
+        self.flipped = None  # Yeniden kullanılan ayna ve gri kare tamponları
+        self.gray = None
+        self.overlays = []
+        self.frame_times = deque(maxlen=30)  # FPS hesabı için son karelerin zamanları
+        self.show_metrics = METRICS_OVERLAY
+        self.capture_window.bind("<F2>", self.toggle_metrics)
 
         self.info_label = tk.Label(self.capture_window, text="Kameraya bakın...", font=CUSTOM_FONT, fg=DARK_VIOLET, bg="white")
         self.info_label.pack(pady=10)
@@ -164,102 +2824,114 @@ class FaceCaptureApp:
 
         self.capture_window.protocol("WM_DELETE_WINDOW", self.stop_capture)
 
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
+        self.session_start = time.perf_counter()
+        self.camera_acquired, self.cold_start = self.camera.acquire()
+        if not self.camera_acquired:
             messagebox.showerror("Kamera Hatası", "Kamera açılamadı!", parent=self.capture_window)
             self.cleanup()
             return
 
-        if self.mode == 'login' and recognizer is None:
+        if self.mode == 'login' and get_model()[0] is None:
             if not load_trained_data():
                 messagebox.showerror("Hata", "Giriş yapılamıyor. Eğitilmiş model bulunamadı.", parent=self.capture_window)
                 self.cleanup()
                 return
 
         # --- KAMERA AÇILDI MESAJI ---
+        # Sabit bekleme yok; ilk kare gelene kadar update_frame bu mesajı gösterir
         self.info_label.config(text="Kamera açılıyor, lütfen bekleyin...")
-        self.capture_window.after(1000, self.start_capture)  # 1 saniye sonra başla
+        self.start_capture()
 
     def start_capture(self):
-        self.info_label.config(text="Kameraya bakın...")
+        # Pencere açılmadan önce okunmuş kareler kullanılmaz
+        self.last_frame_id = self.camera.latest()[0]
         self.is_running = True
         self.update_frame()
 
     def update_frame(self):
         if not self.is_running:
+            self.cleanup()
             return
 
-        ret, frame = self.cap.read()
-        frame = cv2.flip(frame, 1)
-
-        if not ret:
+        if self.camera.failed:
             self.stop_capture()
+            self.cleanup()
+            return
+
+        frame_id, frame = self.camera.latest()
+        if frame is None or frame_id == self.last_frame_id:
+            # Yeni kare henüz gelmedi, arayüzü bekletmeden tekrar dene
+            self.capture_window.after(5, self.update_frame)
             return
+        self.last_frame_id = frame_id
+        if self.session_start is not None:
+            self.camera.record_first_frame(time.perf_counter() - self.session_start, self.cold_start)
+            self.session_start = None
+        frame_start = time.perf_counter()
+        self.frame_times.append(frame_start)
+        with metrics.time("flip"):
+            self.flipped = cv2.flip(frame, 1, dst=self.flipped)
 
         try:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(80, 80))
+            with metrics.time("convert"):
+                gray = self.gray = cv2.cvtColor(self.flipped, cv2.COLOR_BGR2GRAY, dst=self.gray)
+            with metrics.time("detect"):
+                faces = self.detector.detect(gray)
 
             status_message = "Kameraya Ortalanın"
-            current_name = "Bilinmiyor"
-            current_conf_percent = 0
-
-            # Önce görüntüyü göster
-            img = Image.fromarray(frame_rgb)
-            imgtk = ImageTk.PhotoImage(image=img)
-            self.video_label.imgtk = imgtk
-            self.video_label.configure(image=imgtk)
+            self.overlays = [(tuple(box), "", (0, 0, 255)) for box in faces] if len(faces) > 1 else []
 
             if len(faces) == 1:
                 (x, y, w, h) = faces[0]
-                cv2.rectangle(frame_rgb, (x, y), (x + w, y + h), (0, 255, 0), 2)
+                self.overlays = [((x, y, w, h), "", (0, 255, 0))]
                 roi_gray = gray[y:y + h, x:x + w]
 
                 if self.mode == 'register':
                     self.progress_label.config(text=f"{self.captured_images}/{self.required_images} yüz verisi")
-                    if self.captured_images < self.required_images:
-                        user_dir = os.path.join(DATA_DIR, self.user_name)
-                        os.makedirs(user_dir, exist_ok=True)
-                        img_name = f"{self.user_name}_{time.time()}.png"
-                        img_path = os.path.join(user_dir, img_name)
-                        cv2.imwrite(img_path, roi_gray)
-                        self.captured_images += 1
-                        self.progress_label.config(text=f"{self.captured_images}/{self.required_images} yüz verisi")
-                        time.sleep(0.3)
-
-                    if self.captured_images >= self.required_images:
-                        self.parent_window.event_generate("<<RegistrationComplete>>")
-                        self.capture_window.after(2000, self.fade_and_close)
+                    box = (x, y, w, h)
+                    if (self.captured_images < self.required_images
+                            and self.sample_scheduler.should_capture(roi_gray, box)):
+                        face = normalize_face(roi_gray)
+                        accepted, reason = self.quality_gate.check(face, box)
+                        if accepted:
+                            self.collected_samples.append(face)
+                            self.quality_gate.accept()
+                            self.sample_scheduler.mark_captured(roi_gray, box)
+                            self.captured_images += 1
+                            self.progress_label.config(text=f"{self.captured_images}/{self.required_images} yüz verisi")
+                        else:
+                            status_message = reason
+
+                    if self.captured_images >= self.required_images and not self.registration_done:
+                        self.registration_done = True
+                        self.pending_writes.append(
+                            self.image_writer.submit(get_sample_store().append, self.user_name, self.collected_samples))
+                        self.finish_registration()
 
                 elif self.mode == 'login' and not self.login_handled:
+                    # Eğitim sürerken bile tutarlı (eski) model çifti kullanılır
+                    recognizer, labels = get_model()
                     if recognizer is not None:
                         try:
-                            id_, conf = recognizer.predict(roi_gray)
+                            with metrics.time("predict"):
+                                if self.claimed_id is not None:
+                                    # Yazılan isim biliniyor: sadece o kullanıcının örnekleriyle karşılaştır
+                                    id_ = self.claimed_id
+                                    conf = user_histograms.verify(normalize_face(roi_gray), self.user_name)
+                                else:
+                                    id_, conf = predict_face(normalize_face(roi_gray), recognizer)
                         except Exception:
                             self.result_label.config(text="Hata: Yüz tanıma başarısız.", fg="red")
                             self.login_handled = True
                             self.capture_window.after(2000, self.fade_and_close)
                             return
-
-                        current_conf_percent = round(conf)
-
-                        if conf <= CONFIDENCE_THRESHOLD and id_ in labels:
-                            current_name = labels[id_]
-                            self.detected_name = current_name
-                            self.confidence_score = conf
-                            self.result_label.config(text=f"Tanınan: {current_name} (Mesafe: {current_conf_percent})",
-                                                     fg="green")
-                            self.parent_window.event_generate("<<LoginSuccess>>")
-                            self.login_handled = True
-                            self.capture_window.after(2000, self.fade_and_close)
-                        else:
-                            self.result_label.config(
-                                text=f"Giriş Başarısız. Tanınan: {current_name}, Mesafe: {current_conf_percent}",
-                                fg="red")
-                            self.parent_window.event_generate("<<LoginFailed>>")
-                            self.login_handled = True
-                            self.capture_window.after(2000, self.fade_and_close)
+                        self.login_verifier.add(id_, conf)
+                        name = self.user_name if self.claimed_id is not None else labels.get(id_, "?")
+                        if conf > CONFIDENCE_THRESHOLD:
+                            name = "?"
+                        self.overlays = [((x, y, w, h), f"{name.replace('_', ' ')} {conf:.0f}", (0, 255, 0))]
+                        self.progress_label.config(
+                            text=f"Doğrulanıyor... ({len(self.login_verifier.frames)}/{self.login_verifier.max_frames})")
                     else:
                         self.result_label.config(text="Hata: Eğitilmiş model yüklenemedi.", fg="red")
                         self.capture_window.after(2000, self.fade_and_close)
@@ -269,8 +2941,18 @@ class FaceCaptureApp:
             else:
                 self.result_label.config(text="")
 
+            if self.mode == 'login' and not self.login_handled:
+                # Yüz kaybolsa bile süre dolunca toplanan karelerle karar verilir
+                self.check_login_decision()
+
             self.info_label.config(text=status_message)
 
+            # Kutular önizlemeden önce çizilir; önizleme algılamadan bağımsız hızda yenilenir
+            if self.preview.due():
+                with metrics.time("render"):
+                    self.preview.render(self.flipped, self.overlays, self.metrics_text())
+            metrics.observe("frame", (time.perf_counter() - frame_start) * 1000)
+
         except Exception as e:
             self.info_label.config(text=f"HATA: {e}", fg="red")
             self.stop_capture()
@@ -281,6 +2963,59 @@ class FaceCaptureApp:
         else:
             self.cleanup()
 
+    def metrics_text(self):
+        # Önizleme üstüne yazılan FPS / gecikme özeti (METRICS_OVERLAY veya F2)
+        if not self.show_metrics or len(self.frame_times) < 2:
+            return ""
+        fps = (len(self.frame_times) - 1) / max(1e-6, self.frame_times[-1] - self.frame_times[0])
+        frame_stats = metrics.stage_summary("frame") or {"p50_ms": 0.0, "p99_ms": 0.0}
+        detect_stats = metrics.stage_summary("detect") or {"p50_ms": 0.0}
+        return (f"{fps:.0f} FPS  kare p50 {frame_stats['p50_ms']:.0f} / p99 {frame_stats['p99_ms']:.0f} ms  "
+                f"algilama {detect_stats['p50_ms']:.0f} ms")
+
+    def toggle_metrics(self, event=None):
+        self.show_metrics = not self.show_metrics
+
+    def check_login_decision(self):
+        decision = self.login_verifier.decide()
+        if decision is None:
+            return
+        labels = {self.claimed_id: self.user_name} if self.claimed_id is not None else get_model()[1]
+        id_, median, agreement = self.login_verifier.summary()
+        self.confidence_score = median
+        current_conf_percent = round(median)
+        distances = ", ".join(f"{d:.0f}" for d in self.login_verifier.distances())
+        logger.info(f"Giriş doğrulama: ID {id_}, medyan mesafe {median:.1f}, uyum %{agreement * 100:.0f}, "
+              f"kare mesafeleri [{distances}]")
+        self.login_handled = True
+        if decision and id_ in labels:
+            self.detected_name = labels[id_]
+            self.result_label.config(text=f"Tanınan: {self.detected_name} (Mesafe: {current_conf_percent})",
+                                     fg="green")
+            metrics.increment("login_success")
+            attendance_store.record(self.detected_name, "success", median, id_)
+            self.parent_window.event_generate("<<LoginSuccess>>")
+        else:
+            self.result_label.config(
+                text=f"Giriş Başarısız. Tanınan: Bilinmiyor, Mesafe: {current_conf_percent}",
+                fg="red")
+            metrics.increment("login_failed")
+            attendance_store.record(self.user_name, "failed", median, id_)
+            self.parent_window.event_generate("<<LoginFailed>>")
+        self.capture_window.after(2000, self.fade_and_close)
+
+    def finish_registration(self):
+        # Tüm örnekler diske yazılmadan eğitim başlatılmaz; yazmalar bitene kadar bekletmeden yokla
+        if not all(f.done() for f in self.pending_writes):
+            self.capture_window.after(20, self.finish_registration)
+            return
+        failed = [f for f in self.pending_writes if f.exception() is not None]
+        if failed:
+            self.result_label.config(text="Hata: Yüz verileri kaydedilemedi.", fg="red")
+        else:
+            self.parent_window.event_generate("<<RegistrationComplete>>")
+        self.capture_window.after(2000, self.fade_and_close)
+
     def fade_and_close(self):
         def fade_out(alpha):
             if alpha <= 0:
@@ -308,20 +3043,872 @@ class FaceCaptureApp:
                 self.parent_window.event_generate("<<CaptureCancelled>>")
 
     def cleanup(self):
-        if self.cap and self.cap.isOpened():
-            self.cap.release()
+        self.image_writer.shutdown(wait=False)
+        if self.detector.timings:
+            logger.info(f"Ortalama algılama süresi: {self.detector.average_ms():.2f} ms/kare "
+                  f"({len(self.detector.timings)} kare)")
+            self.detector.reset()
+        if self.preview.timings:
+            logger.info(f"Ortalama önizleme süresi: {self.preview.average_ms():.2f} ms/kare "
+                  f"({len(self.preview.timings)} kare)")
+        if self.camera_acquired:
+            # Kamera kapatılmaz, bir sonraki pencere için servise bırakılır
+            self.camera_acquired = False
+            self.camera.release()
         try:
             self.capture_window.grab_release()
             self.capture_window.destroy()
         except tk.TclError:
             pass
 
+# --- Sürekli Yoklama Penceresi ---
+# Ad girilmeden çalışır: her karede tüm yüzler algılanır, izlenir ve sadece yeni izler tek
+# seferde tanınır. Tanınan öğrenciler yoklama dosyasına (tekrarlar ayıklanarak) yazılır.
+class AttendanceApp:
+    def __init__(self, parent_window, camera, log=None):
+        self.parent_window = parent_window
+        self.camera = camera
+        self.log = log or AttendanceLog()
+        self.detector = FaceDetector(get_face_cascade(), tracking=False)
+        self.tracker = FaceTracker()
+        self.is_running = False
+        self.camera_acquired = False
+        self.last_frame_id = 0
+        self.predictions = 0  # Toplam predict() çağrısı (kare başına değil, iz başına)
+
+        self.window = tk.Toplevel(parent_window)
+        self.window.title("Yoklama Modu")
+        self.window.configure(bg="white")
+        self.window.geometry("900x580")
+        self.window.transient(parent_window)
+
+        self.video_label = tk.Label(self.window, bg="black")
+        self.video_label.pack(side="left", padx=10, pady=10)
+        self.preview = PreviewRenderer(self.video_label)
+        self.flipped = None
+        self.gray = None
+
+        side_frame = Frame(self.window, bg="white")
+        side_frame.pack(side="right", fill=tk.BOTH, expand=True, padx=10, pady=10)
+        tk.Label(side_frame, text="Gelenler", font=CUSTOM_FONT, fg=DARK_VIOLET, bg="white").pack(pady=5)
+        self.event_list = Listbox(side_frame, font=LISTBOX_FONT)
+        self.event_list.pack(fill=tk.BOTH, expand=True)
+        self.info_label = tk.Label(side_frame, text="Kamera açılıyor, lütfen bekleyin...", font=LISTBOX_FONT,
+                                   bg="white", fg="grey")
+        self.info_label.pack(pady=5)
+        tk.Button(side_frame, text="Kapat", command=self.stop, font=CUSTOM_FONT, bg="grey", fg="white").pack(pady=5)
+        self.window.protocol("WM_DELETE_WINDOW", self.stop)
+
+        if get_model()[0] is None and not load_trained_data():
+            messagebox.showerror("Hata", "Yoklama başlatılamıyor. Eğitilmiş model bulunamadı.", parent=self.window)
+            self.cleanup()
+            return
+        self.camera_acquired = self.camera.acquire()[0]
+        if not self.camera_acquired:
+            messagebox.showerror("Kamera Hatası", "Kamera açılamadı!", parent=self.window)
+            self.cleanup()
+            return
+
+        self.last_frame_id = self.camera.latest()[0]
+        self.is_running = True
+        self.update_frame()
+
+    def update_frame(self):
+        if not self.is_running:
+            self.cleanup()
+            return
+        if self.camera.failed:
+            self.info_label.config(text="Kamera bağlantısı kesildi.", fg="red")
+            self.stop()
+            return
+
+        frame_id, frame = self.camera.latest()
+        if frame is None or frame_id == self.last_frame_id:
+            self.window.after(5, self.update_frame)
+            return
+        self.last_frame_id = frame_id
+        frame_start = time.perf_counter()
+        self.flipped = cv2.flip(frame, 1, dst=self.flipped)
+
+        try:
+            gray = self.gray = cv2.cvtColor(self.flipped, cv2.COLOR_BGR2GRAY, dst=self.gray)
+            with metrics.time("attendance_detect"):
+                visible = self.tracker.update(self.detector.detect(gray))
+
+            # Sadece tahmin bekleyen izler tek seferde tanınır
+            pending = [track for track in visible if track.needs_prediction()]
+            if pending:
+                model = get_model()
+                if model[0] is not None:
+                    with metrics.time("attendance_predict"):
+                        results = recognize_faces(gray, [t.box for t in pending], model)
+                    for track, result in zip(pending, results):
+                        track.result = result
+                        track.attempts += 1
+                        track.last_attempt = track.age
+                        self.predictions += 1
+                        if result["recognized"]:
+                            row = self.log.record(result)
+                            if row:
+                                metrics.increment("attendance_recorded")
+                                self.event_list.insert(0, f"{row['time'][11:]}  {row['name'].replace('_', ' ')}")
+
+            if self.preview.due():
+                overlays = []
+                for track in visible:
+                    if track.recognized:
+                        text = f"{track.result['name'].replace('_', ' ')} {track.result['distance']:.0f}"
+                        overlays.append((track.box, text, (0, 255, 0)))
+                    else:
+                        overlays.append((track.box, "?", (0, 0, 255)))
+                with metrics.time("attendance_render"):
+                    self.preview.render(self.flipped, overlays)
+            metrics.observe("attendance_frame", (time.perf_counter() - frame_start) * 1000)
+            self.info_label.config(text=f"{len(visible)} yüz, {self.predictions} tanıma", fg="grey")
+        except Exception as e:
+            self.info_label.config(text=f"HATA: {e}", fg="red")
+            self.stop()
+            return
+
+        self.window.after(10, self.update_frame)
+
+    def stop(self):
+        if self.is_running:
+            self.is_running = False  # update_frame bir sonraki turda temizler
+        else:
+            self.cleanup()
+
+    def cleanup(self):
+        if self.camera_acquired:
+            self.camera_acquired = False
+            self.camera.release()
+        self.tracker.reset()
+        try:
+            self.window.destroy()
+        except tk.TclError:
+            pass
+
+
+# --- Çok Kameralı Hat ---
+# Tek bir bilgisayar birden çok girişe hizmet eder:
+#  - Her kamera kaynağı (indeks, video dosyası veya RTSP gibi bir URL) ayrı bir süreçte okunur.
+#    Kareler, kameranın paylaşımlı bellekteki halka tamponunun boş bir yuvasına doğrudan
+#    cap.read() ile yazılır (pickle/kopya yok). İşçilere sadece küçük bir (kamera, yuva, sıra,
+#    zaman) mesajı gönderilir. Boş yuva yoksa kare okunur ama atılır: işçiler yetişemiyorsa
+#    gecikme birikmez, en yeni kareler işlenir. Halka tamponlarını ana süreç oluşturur ve
+#    stop() ile siler; bir kamera süreci sonlandırılsa da paylaşımlı bellek sızmaz.
+#  - Algılama ve tanıma MULTI_CAMERA_WORKERS süreçli havuzda yapılır; her işçi kendi kaskadını ve
+#    modelini yükler, yeni model nesillerini ModelWatcher ile alır. İşçi kareyi yuvadan gri
+#    görüntüye dönüştürdüğü anda yuvayı kameraya geri verir.
+#  - Sonuçlar hafif bir toplayıcıya (arayüz süreci) döner; tanınanlar AttendanceLog ile kaydedilir.
+# Süreçler "spawn" ile başlatılır (Tk açıkken fork güvenli değildir, Windows'ta da aynı davranış).
+def open_video_source(source):
+    return cv2.VideoCapture(int(source) if isinstance(source, str) and source.isdigit() else source)
+
+def attach_shared_memory(name):
+    # Halka tamponlarını ana süreç (MultiCameraPipeline) oluşturur ve siler; kamera ve işçi
+    # süreçleri sadece bağlanır. spawn ile başlayan çocuklar ana sürecin kaynak izleyicisini
+    # paylaşır: 3.13+'ta izlenmeden bağlanılır, öncekilerde aynı adın tekrar kaydı zararsızdır.
+    # Kayıttan çıkarmak (unregister) sahibinin kaydını da silerdi.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+def camera_process(camera_id, source, slots, free_slots, control, tasks, results, stop_event,
+                   realtime=MULTI_CAMERA_REALTIME):
+    cv2.setNumThreads(1)
+    is_file = isinstance(source, str) and os.path.isfile(source)
+    cap = open_video_source(source)
+    ret, first = cap.read() if cap.isOpened() else (False, None)
+    if not ret:
+        results.put(('error', camera_id, f"Kaynak açılamadı: {source}"))
+        cap.release()
+        return
+
+    # Kare boyutu bildirilir; ana süreç halka tamponunu oluşturup adını control kuyruğundan gönderir
+    results.put(('ready', camera_id, first.shape))
+    name = None
+    while name is None and not stop_event.is_set():
+        try:
+            name = control.get(timeout=0.2)
+        except queue.Empty:
+            pass
+    if name is None:
+        cap.release()
+        return
+    shm = attach_shared_memory(name)
+    ring = np.ndarray((slots,) + first.shape, dtype=np.uint8, buffer=shm.buf)
+    scratch = first  # Boş yuva yokken okunan (atılacak) kareler buraya yazılır
+    fps = cap.get(cv2.CAP_PROP_FPS) if is_file else 0
+    interval = 1.0 / fps if realtime and fps and fps > 0 else 0.0
+    seq = captured = dropped = 0
+    next_frame = stats_time = time.monotonic()
+    target = image = None
+    try:
+        while not stop_event.is_set():
+            try:
+                slot = free_slots.get_nowait()
+            except queue.Empty:
+                slot = None
+            target = ring[slot] if slot is not None else scratch
+            ret, image = cap.read(target)
+            if not ret:
+                if slot is not None:
+                    free_slots.put(slot)
+                if is_file:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Dosya kaynak başa sarılır (test/deneme yayını)
+                    continue
+                # Canlı kaynak koptu: biraz bekleyip yeniden bağlan
+                results.put(('error', camera_id, f"Kaynak koptu, yeniden bağlanılıyor: {source}"))
+                cap.release()
+                stop_event.wait(MULTI_CAMERA_RECONNECT)
+                cap = open_video_source(source)
+                continue
+            if image is not target:
+                # Çözücü tampona yazmadıysa (ör. çözünürlük değişti) kare kopyalanır veya atılır
+                if image.shape != target.shape:
+                    if slot is not None:
+                        free_slots.put(slot)
+                    dropped += 1
+                    continue
+                np.copyto(target, image)
+            captured += 1
+            if slot is None:
+                dropped += 1
+            else:
+                seq += 1
+                tasks.put((camera_id, shm.name, first.shape, slot, seq, time.time()))
+
+            now = time.monotonic()
+            if now - stats_time >= 1.0:
+                results.put(('stats', camera_id, captured, dropped))
+                stats_time = now
+            if interval:
+                next_frame += interval
+                delay = next_frame - time.monotonic()
+                if delay > 0:
+                    stop_event.wait(delay)
+                else:
+                    next_frame = time.monotonic()
+    finally:
+        cap.release()
+        target = image = ring = None  # Paylaşımlı belleğe bakan görünümler bırakılmadan close() edilemez
+        shm.close()  # Silme (unlink) ana sürecin işi; süreç sonlandırılsa bile bellek sızmaz
+
+def recognition_worker(worker_id, tasks, results, free_slots, stop_event):
+    cv2.setNumThreads(1)  # Paralellik süreç sayısından gelir; OpenCV iş parçacıkları çekirdekleri paylaşmasın
+    detector = FaceDetector(get_face_cascade(), tracking=False)
+    load_trained_data()
+    watcher = ModelWatcher() if MODEL_POLL_INTERVAL else None
+    attached = {}  # paylaşımlı bellek adı -> SharedMemory
+    buffers = {}  # kare boyutu -> (gri, aynalanmış gri) yeniden kullanılan tamponlar
+    results.put(('worker_ready', worker_id, None))
+    try:
+        while not stop_event.is_set():
+            try:
+                camera_id, name, shape, slot, seq, capture_ts = tasks.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            start = time.perf_counter()
+            try:
+                shm = attached.get(name)
+                if shm is None:
+                    shm = attached[name] = attach_shared_memory(name)
+                frame_bytes = int(np.prod(shape))
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * frame_bytes)
+                gray, mirrored = buffers.get(shape, (None, None))
+                # Yuvadan tek okuma: gri dönüşüm; ardından yuva hemen kameraya geri verilir
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray)
+                del frame
+            except FileNotFoundError:
+                continue  # Kamera süreci kapandı
+            finally:
+                free_slots[camera_id].put(slot)
+            # Kayıt örnekleri aynalanmış kareden alındığı için tanıma da aynalanmış karede yapılır
+            mirrored = cv2.flip(gray, 1, dst=mirrored)
+            buffers[shape] = (gray, mirrored)
+
+            try:
+                boxes = detector.detect(mirrored)
+                model = get_model()
+                if boxes and model[0] is not None:
+                    faces = recognize_faces(mirrored, boxes, model)
+                else:
+                    faces = [{"x": x, "y": y, "w": w, "h": h, "label_id": -1, "name": "Bilinmiyor",
+                              "distance": float("inf"), "recognized": False} for (x, y, w, h) in boxes]
+            except Exception as e:
+                logger.error(f"Hata: İşçi {worker_id}, kamera {camera_id} karesi işlenemedi - {e}")
+                continue
+            results.put(('result', camera_id, seq, capture_ts, faces,
+                         (time.perf_counter() - start) * 1000, worker_id))
+    finally:
+        if watcher:
+            watcher.stop()
+        for shm in attached.values():
+            shm.close()
+
+
+class MultiCameraPipeline:
+    def __init__(self, sources, workers=None, slots=MULTI_CAMERA_SLOTS, realtime=MULTI_CAMERA_REALTIME):
+        self.sources = list(sources)
+        self.workers = max(1, MULTI_CAMERA_WORKERS if workers is None else workers)
+        self.slots = slots
+        self.realtime = realtime
+        self.context = multiprocessing.get_context("spawn")
+        self.processes = []
+        self.stop_event = None
+        self.results = None
+        self.cameras = {camera_id: {"source": source, "state": "başlatılıyor", "captured": 0, "dropped": 0,
+                                    "processed": 0, "faces": 0, "latency": LatencyStats(), "rate": deque(maxlen=120)}
+                        for camera_id, source in enumerate(self.sources)}
+        self.ready_workers = 0
+        self.segments = {}  # kamera -> SharedMemory (sahibi bu süreç; stop() siler)
+
+    def start(self):
+        ctx = self.context
+        self.stop_event = ctx.Event()
+        self.tasks = ctx.Queue()
+        self.results = ctx.Queue()
+        self.free_slots = [ctx.Queue() for _ in self.sources]
+        self.controls = [ctx.Queue() for _ in self.sources]  # Halka tamponu adı kamera sürecine buradan gider
+        for free in self.free_slots:
+            for slot in range(self.slots):
+                free.put(slot)
+        for worker_id in range(self.workers):
+            self.processes.append(ctx.Process(
+                target=recognition_worker, name=f"RecognitionWorker-{worker_id}", daemon=True,
+                args=(worker_id, self.tasks, self.results, self.free_slots, self.stop_event)))
+        for camera_id, source in enumerate(self.sources):
+            self.processes.append(ctx.Process(
+                target=camera_process, name=f"Camera-{camera_id}", daemon=True,
+                args=(camera_id, source, self.slots, self.free_slots[camera_id], self.controls[camera_id],
+                      self.tasks, self.results, self.stop_event, self.realtime)))
+        for process in self.processes:
+            process.start()
+        logger.info(f"Çok kameralı hat başladı: {len(self.sources)} kamera, {self.workers} işçi süreci.")
+
+    def poll(self, max_messages=1000):
+        # Toplayıcı: bekleyen mesajları işler; kare sonuçlarını (kamera, yüzler) listesi olarak döndürür
+        frames = []
+        for _ in range(max_messages):
+            try:
+                message = self.results.get_nowait()
+            except queue.Empty:
+                break
+            kind, camera_id = message[0], message[1]
+            if kind == 'worker_ready':
+                self.ready_workers += 1
+                continue
+            camera = self.cameras[camera_id]
+            if kind == 'ready':
+                shape = message[2]
+                camera["state"] = f"{shape[1]}x{shape[0]}"
+                if camera_id not in self.segments:
+                    self.segments[camera_id] = shared_memory.SharedMemory(
+                        create=True, size=int(np.prod(shape)) * self.slots)
+                self.controls[camera_id].put(self.segments[camera_id].name)
+            elif kind == 'error':
+                camera["state"] = "hata"
+                logger.error(f"Hata: Kamera {camera_id} - {message[2]}")
+            elif kind == 'stats':
+                camera["captured"], camera["dropped"] = message[2], message[3]
+            elif kind == 'result':
+                _, _, seq, capture_ts, faces, worker_ms, _ = message
+                latency_ms = (time.time() - capture_ts) * 1000
+                camera["processed"] += 1
+                camera["faces"] += len(faces)
+                camera["latency"].add(latency_ms)
+                camera["rate"].append(time.monotonic())
+                metrics.observe("multicam_latency", latency_ms)
+                metrics.observe("multicam_worker", worker_ms)
+                frames.append((camera_id, faces))
+        return frames
+
+    def camera_fps(self, camera_id, window=2.0):
+        stamps = self.cameras[camera_id]["rate"]
+        now = time.monotonic()
+        recent = [t for t in stamps if now - t <= window]
+        return len(recent) / window
+
+    def stop(self, timeout=5.0):
+        if self.stop_event is None:
+            return
+        self.stop_event.set()
+        deadline = time.monotonic() + timeout
+        # Çocuk süreçler kuyruğa yazdıkları bitmeden çıkamaz; beklerken kuyruk boşaltılır
+        while any(p.is_alive() for p in self.processes) and time.monotonic() < deadline:
+            self.poll()
+            time.sleep(0.05)
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+            process.join(1.0)
+        self.processes = []
+        self.stop_event = None
+        # Segmentler bu süreçte oluşturuldu; çocuklar sonlandırılmış olsa da burada silinir
+        for shm in self.segments.values():
+            shm.close()
+            shm.unlink()
+        self.segments = {}
+
+
+# --- Çok Kameralı Toplayıcı Penceresi ---
+# Görüntü göstermez; her kamera için işlenen kare hızı, uçtan uca gecikme ve atılan kare
+# sayısı ile tüm girişlerden gelen yoklama kayıtlarını listeler.
+class MultiCameraApp:
+    def __init__(self, root, pipeline, log=None):
+        self.root = root
+        self.pipeline = pipeline
+        self.log = log or AttendanceLog()
+        self.root.title("Dershane Otomasyonu - Çok Kameralı Yoklama")
+        self.root.geometry("700x500")
+        self.root.configure(bg="white")
+
+        tk.Label(root, text="Kameralar", font=CUSTOM_FONT, fg=DARK_VIOLET, bg="white").pack(pady=5)
+        self.camera_labels = {}
+        for camera_id in pipeline.cameras:
+            label = tk.Label(root, text="", font=LISTBOX_FONT, bg="white", anchor="w")
+            label.pack(fill="x", padx=10)
+            self.camera_labels[camera_id] = label
+        self.worker_label = tk.Label(root, text="", font=LISTBOX_FONT, bg="white", fg="grey")
+        self.worker_label.pack(pady=5)
+        tk.Label(root, text="Gelenler", font=CUSTOM_FONT, fg=DARK_VIOLET, bg="white").pack(pady=5)
+        self.event_list = Listbox(root, font=LISTBOX_FONT)
+        self.event_list.pack(fill=tk.BOTH, expand=True, padx=10)
+        tk.Button(root, text="Kapat", command=self.close, font=CUSTOM_FONT, bg="grey", fg="white").pack(pady=10)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.pipeline.start()
+        self.last_stats = 0.0
+        self.poll()
+
+    def poll(self):
+        for camera_id, faces in self.pipeline.poll():
+            for face in faces:
+                if face["recognized"]:
+                    row = self.log.record(face, source=f"kamera{camera_id}")
+                    if row:
+                        metrics.increment("attendance_recorded")
+                        self.event_list.insert(0, f"{row['time'][11:]}  Kamera {camera_id}  "
+                                                  f"{row['name'].replace('_', ' ')}")
+        now = time.monotonic()
+        if now - self.last_stats >= 0.5:
+            self.last_stats = now
+            for camera_id, camera in self.pipeline.cameras.items():
+                latency = camera["latency"].summary()
+                self.camera_labels[camera_id].config(
+                    text=f"Kamera {camera_id} ({camera['source']}, {camera['state']}): "
+                         f"{self.pipeline.camera_fps(camera_id):.1f} kare/sn, gecikme p50 {latency['p50_ms']:.0f} ms / "
+                         f"p90 {latency['p90_ms']:.0f} ms, atılan {camera['dropped']}/{camera['captured']}")
+            self.worker_label.config(text=f"{self.pipeline.ready_workers}/{self.pipeline.workers} işçi hazır")
+        self.root.after(20, self.poll)
+
+    def close(self):
+        self.pipeline.stop()
+        self.root.destroy()
+
+
+def run_multi_camera(sources, workers=None, duration=None, realtime=MULTI_CAMERA_REALTIME):
+    # duration verilirse arayüzsüz çalışır ve kamera başına işlenen kare hızını raporlar
+    pipeline = MultiCameraPipeline(sources, workers, realtime=realtime)
+    if duration is None:
+        root = tk.Tk()
+        MultiCameraApp(root, pipeline)
+        root.mainloop()
+        return None
+    log = AttendanceLog()
+    pipeline.start()
+    try:
+        # İşçiler model/kaskad yüklerken geçen süre ölçüme katılmaz
+        while pipeline.ready_workers < pipeline.workers and any(p.is_alive() for p in pipeline.processes):
+            pipeline.poll()
+            time.sleep(0.05)
+        for camera in pipeline.cameras.values():
+            camera["processed"] = 0
+        start = time.monotonic()
+        while time.monotonic() - start < duration:
+            for camera_id, faces in pipeline.poll():
+                for face in faces:
+                    if face["recognized"] and log.record(face, source=f"kamera{camera_id}"):
+                        logger.info(f"Kamera {camera_id}: {face['name']}")
+            time.sleep(0.01)
+        elapsed = time.monotonic() - start
+        pipeline.poll()
+    finally:
+        pipeline.stop()
+    report = {}
+    for camera_id, camera in pipeline.cameras.items():
+        latency = camera["latency"].summary()
+        report[camera_id] = {"source": camera["source"], "fps": round(camera["processed"] / elapsed, 2),
+                             "captured": camera["captured"], "dropped": camera["dropped"],
+                             "latency_p50_ms": latency["p50_ms"], "latency_p90_ms": latency["p90_ms"]}
+        logger.info(f"Kamera {camera_id} ({camera['source']}): {report[camera_id]['fps']:.1f} kare/sn işlendi, "
+                    f"gecikme p50 {latency['p50_ms']:.0f} ms, atılan {camera['dropped']}/{camera['captured']}")
+    return report
+
+
+# --- Admin Paneli ---
+# Kullanıcı listesi açılışta bir kez depodan alınır (dosya sistemi taranmaz); arama ve sayfalama
+# bu liste üzerinde yapılır. Tuval sanallaştırılmıştır: sadece görünen satırlar (ve bir satır
+# pay) çizilir, kaydırınca görünmez olanlar silinir. Küçük resimler arka plan thread'inde
+# ThumbnailCache'ten alınır; PhotoImage'lar sadece görünen satırlar için Tk thread'inde oluşturulur.
+class AdminDashboard:
+    def __init__(self, parent_window, store=None, thumbnails=None, page_size=DASHBOARD_PAGE_SIZE,
+                 row_height=DASHBOARD_ROW_HEIGHT, on_delete=None):
+        self.store = store or get_sample_store()
+        self.thumbnails = thumbnails or get_thumbnail_cache()
+        self.on_delete = on_delete  # Kullanıcı adıyla çağrılır (silme ve yeniden eğitim arka planda)
+        self.page_size = page_size
+        self.row_height = row_height
+        self.all_users = self.store.users()
+        self.filtered = self.all_users
+        self.page = 0
+        self.rows = {}  # satır no -> (kullanıcı, tuval öğeleri, resim öğesi)
+        self.photos = {}  # kullanıcı -> PhotoImage (sadece görünen satırlar)
+        self.requested = set()  # Küçük resmi istenmiş kullanıcılar
+        self.loaded = {}  # kullanıcı -> PIL küçük resim (None: örnek yok)
+        self.results = queue.Queue()
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ThumbnailWorker")
+        self.closed = False
+
+        self.window = tk.Toplevel(parent_window)
+        self.window.title("Admin Paneli - Kayıtlı Kullanıcılar ve Yüz Verileri")
+        self.window.geometry("600x600")
+        self.window.configure(bg="white")
+        self.window.transient(parent_window)
+        self.window.grab_set()
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        tk.Label(self.window, text="Kayıtlı Kullanıcılar ve Yüz Örnekleri",
+                 font=(FONT_FAMILY, FONT_SIZE, "bold"), bg="white", fg=DARK_VIOLET).pack(pady=10)
+
+        search_frame = Frame(self.window, bg="white")
+        search_frame.pack(fill="x", padx=10)
+        tk.Label(search_frame, text="Ara:", font=LISTBOX_FONT, bg="white").pack(side="left")
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *_: self.apply_filter())
+        tk.Entry(search_frame, textvariable=self.search_var, font=LISTBOX_FONT).pack(side="left", fill="x", expand=True, padx=5)
+
+        main_frame = Frame(self.window, bg="white")
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.canvas = tk.Canvas(main_frame, bg="white", highlightthickness=0)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar = Scrollbar(main_frame, orient="vertical", command=self.on_scroll)
+        scrollbar.pack(side=tk.RIGHT, fill="y")
+        self.scrollbar = scrollbar
+        self.canvas.configure(yscrollcommand=self.on_yscroll)
+        self.canvas.bind("<Configure>", lambda event: self.render_visible())
+        if on_delete:
+            self.canvas.bind("<Double-Button-1>", self.on_double_click)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.window.bind_all(sequence, self.on_mouse_wheel)
+
+        nav_frame = Frame(self.window, bg="white")
+        nav_frame.pack(pady=5)
+        tk.Button(nav_frame, text="<", command=lambda: self.change_page(-1), font=LISTBOX_FONT).pack(side="left")
+        self.page_label = tk.Label(nav_frame, text="", font=LISTBOX_FONT, bg="white")
+        self.page_label.pack(side="left", padx=10)
+        tk.Button(nav_frame, text=">", command=lambda: self.change_page(1), font=LISTBOX_FONT).pack(side="left")
+
+        tk.Button(self.window, text="Kapat", command=self.close, font=CUSTOM_FONT,
+                  bg="grey", fg="white").pack(pady=10, side="bottom")
+        tk.Button(self.window, text="Yoklama Kayıtları", command=lambda: AttendanceReport(self.window),
+                  font=LISTBOX_FONT, bg="white", fg=DARK_VIOLET).pack(side="bottom")
+        if on_delete:
+            tk.Label(self.window, text="Kullanıcıyı silmek için satırına çift tıklayın.",
+                     font=("Arial", 8), bg="white", fg="grey").pack(side="bottom")
+
+        self.refresh()
+        self.poll_thumbnails()
+
+    def page_count(self):
+        return max(1, -(-len(self.filtered) // self.page_size))
+
+    def page_users(self):
+        start = self.page * self.page_size
+        return self.filtered[start:start + self.page_size]
+
+    def apply_filter(self):
+        text = self.search_var.get().strip().lower()
+        if text:
+            self.filtered = [u for u in self.all_users if text in u.replace('_', ' ').lower()]
+        else:
+            self.filtered = self.all_users
+        self.page = 0
+        self.refresh()
+
+    def change_page(self, step):
+        page = min(max(0, self.page + step), self.page_count() - 1)
+        if page != self.page:
+            self.page = page
+            self.refresh()
+
+    def refresh(self):
+        self.canvas.delete("all")
+        self.rows.clear()
+        self.photos.clear()
+        users = self.page_users()
+        self.page_label.config(text=f"Sayfa {self.page + 1}/{self.page_count()} ({len(self.filtered)} kullanıcı)")
+        self.canvas.configure(scrollregion=(0, 0, 1, max(1, len(users) * self.row_height)))
+        self.canvas.yview_moveto(0)
+        if not users:
+            text = "Hiç kayıtlı kullanıcı bulunamadı." if not self.all_users else "Aramayla eşleşen kullanıcı yok."
+            self.canvas.create_text(10, 10, text=text, font=LISTBOX_FONT, anchor="nw")
+        self.render_visible()
+
+    def on_scroll(self, *args):
+        self.canvas.yview(*args)
+        self.render_visible()
+
+    def on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+
+    def on_mouse_wheel(self, event):
+        # Windows/MacOS için delta, Linux için num (4 yukarı, 5 aşağı)
+        if event.num == 4:
+            delta = -1
+        elif event.num == 5:
+            delta = 1
+        else:
+            delta = -1 * int(event.delta / 120)
+        if delta != 0:
+            self.canvas.yview_scroll(delta, "units")
+            self.render_visible()
+
+    def render_visible(self):
+        users = self.page_users()
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.row_height)
+        first = max(0, int(top // self.row_height) - 1)
+        last = min(len(users), int((top + height) // self.row_height) + 2)
+
+        # Görünmeyen satırları sil
+        for row in [r for r in self.rows if r < first or r >= last]:
+            user, items, _ = self.rows.pop(row)
+            for item in items:
+                self.canvas.delete(item)
+            self.photos.pop(user, None)
+
+        width = max(self.canvas.winfo_width(), 200)
+        for row in range(first, last):
+            if row in self.rows:
+                continue
+            user = users[row]
+            y = row * self.row_height
+            items = [self.canvas.create_rectangle(5, y + 4, width - 5, y + self.row_height - 4, outline="black"),
+                     self.canvas.create_text(15, y + self.row_height // 2, text=user.replace('_', ' '),
+                                             font=LISTBOX_FONT, anchor="w")]
+            image_item = self.canvas.create_text(width - 15, y + self.row_height // 2, text="...",
+                                                 font=("Arial", 8), anchor="e")
+            items.append(image_item)
+            self.rows[row] = (user, items, image_item)
+            if user in self.loaded:
+                self.show_thumbnail(row)
+            elif user not in self.requested:
+                self.requested.add(user)
+                self.worker.submit(self.load_thumbnail, user)
+
+    def on_double_click(self, event):
+        users = self.page_users()
+        row = int(self.canvas.canvasy(event.y) // self.row_height)
+        if not 0 <= row < len(users):
+            return
+        user = users[row]
+        if user == ADMIN_USER:
+            messagebox.showwarning("Silinemez", "Admin kullanıcısı silinemez.", parent=self.window)
+            return
+        if not messagebox.askyesno("Kullanıcıyı Sil", f"'{user.replace('_', ' ')}' kullanıcısının tüm yüz verileri "
+                                   "silinecek ve model yeniden eğitilecek. Emin misiniz?", parent=self.window):
+            return
+        self.on_delete(user)
+        # Liste hemen güncellenir; depodan silme ve eğitim arka planda sürer
+        self.all_users = [u for u in self.all_users if u != user]
+        self.filtered = [u for u in self.filtered if u != user]
+        self.page = min(self.page, self.page_count() - 1)
+        self.loaded.pop(user, None)
+        self.refresh()
+
+    def load_thumbnail(self, user):
+        # Arka plan thread'i: Tk'ye dokunmaz, sonucu kuyruğa koyar
+        try:
+            img = self.thumbnails.get(user)
+        except Exception as e:
+            logger.error(f"HATA: {user} küçük resmi oluşturulamadı - {e}")
+            img = None
+        self.results.put((user, img))
+
+    def show_thumbnail(self, row):
+        user, items, image_item = self.rows[row]
+        img = self.loaded[user]
+        x, y = self.canvas.coords(image_item)
+        self.canvas.delete(image_item)
+        if img is None:
+            new_item = self.canvas.create_text(x, y, text="[Resim Yok]", font=("Arial", 8), anchor="e")
+        else:
+            photo = ImageTk.PhotoImage(img)
+            self.photos[user] = photo  # Referansı sakla!
+            new_item = self.canvas.create_image(x, y, image=photo, anchor="e")
+        items[-1] = new_item
+        self.rows[row] = (user, items, new_item)
+
+    def poll_thumbnails(self):
+        if self.closed:
+            return
+        try:
+            while True:
+                user, img = self.results.get_nowait()
+                self.loaded[user] = img
+                for row, (row_user, _, _) in list(self.rows.items()):
+                    if row_user == user:
+                        self.show_thumbnail(row)
+        except queue.Empty:
+            pass
+        self.window.after(50, self.poll_thumbnails)
+
+    def close(self):
+        self.closed = True
+        self.worker.shutdown(wait=False, cancel_futures=True)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.window.unbind_all(sequence)
+        # Yeni üretilen küçük resimler arka planda diske yazılır
+        threading.Thread(target=self.thumbnails.save, name="ThumbnailSave", daemon=True).start()
+        try:
+            self.window.grab_release()
+            self.window.destroy()
+        except tk.TclError:
+            pass
+
+
+# --- Yoklama Raporu ---
+# Admin panelinden açılır. "Gün" görünümü o gün giriş yapan öğrencileri, "Geçmiş" görünümü bir
+# öğrencinin tüm olaylarını listeler. Her sayfa indeksli tek bir LIMIT/OFFSET sorgusudur;
+# tablonun tamamı hiçbir zaman belleğe alınmaz. Gün listesinde çift tıklama geçmişi açar.
+class AttendanceReport:
+    def __init__(self, parent_window, store=None, page_size=EVENTS_PAGE_SIZE):
+        self.parent_window = parent_window
+        self.store = store or attendance_store
+        self.page_size = page_size
+        self.mode = 'day'  # 'day': gün raporu, 'user': öğrenci geçmişi
+        self.key = time.strftime("%Y-%m-%d")
+        self.page = 0
+        self.total = 0
+        self.page_rows = []
+
+        self.window = tk.Toplevel(parent_window)
+        self.window.title("Yoklama Kayıtları")
+        self.window.geometry("600x600")
+        self.window.configure(bg="white")
+        self.window.transient(parent_window)
+        self.window.grab_set()
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        query_frame = Frame(self.window, bg="white")
+        query_frame.pack(fill="x", padx=10, pady=10)
+        tk.Label(query_frame, text="Gün:", font=LISTBOX_FONT, bg="white").pack(side="left")
+        self.day_var = tk.StringVar(value=self.key)
+        tk.Entry(query_frame, textvariable=self.day_var, font=LISTBOX_FONT, width=11).pack(side="left", padx=5)
+        tk.Button(query_frame, text="Gelenler", command=self.show_day, font=LISTBOX_FONT).pack(side="left")
+        tk.Label(query_frame, text="Öğrenci:", font=LISTBOX_FONT, bg="white").pack(side="left", padx=(15, 0))
+        self.user_var = tk.StringVar()
+        tk.Entry(query_frame, textvariable=self.user_var, font=LISTBOX_FONT, width=14).pack(side="left", padx=5)
+        tk.Button(query_frame, text="Geçmiş", command=lambda: self.show_user(), font=LISTBOX_FONT).pack(side="left")
+
+        list_frame = Frame(self.window, bg="white")
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10)
+        scrollbar = Scrollbar(list_frame, orient="vertical")
+        scrollbar.pack(side=tk.RIGHT, fill="y")
+        self.listbox = Listbox(list_frame, font=LISTBOX_FONT, yscrollcommand=scrollbar.set)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.listbox.yview)
+        self.listbox.bind("<Double-Button-1>", self.on_double_click)
+
+        nav_frame = Frame(self.window, bg="white")
+        nav_frame.pack(pady=5)
+        tk.Button(nav_frame, text="<", command=lambda: self.change_page(-1), font=LISTBOX_FONT).pack(side="left")
+        self.page_label = tk.Label(nav_frame, text="", font=LISTBOX_FONT, bg="white")
+        self.page_label.pack(side="left", padx=10)
+        tk.Button(nav_frame, text=">", command=lambda: self.change_page(1), font=LISTBOX_FONT).pack(side="left")
+
+        tk.Button(self.window, text="Kapat", command=self.close, font=CUSTOM_FONT,
+                  bg="grey", fg="white").pack(pady=10, side="bottom")
+
+        self.store.flush(timeout=1.0)  # Az önceki girişler de listede görünsün
+        self.refresh()
+
+    def show_day(self):
+        self.mode, self.key, self.page = 'day', self.day_var.get().strip(), 0
+        self.refresh()
+
+    def show_user(self, user=None):
+        user = user or self.user_var.get().strip().replace(' ', '_')
+        if not user:
+            return
+        self.user_var.set(user.replace('_', ' '))
+        self.mode, self.key, self.page = 'user', user, 0
+        self.refresh()
+
+    def on_double_click(self, event):
+        selection = self.listbox.curselection()
+        if self.mode == 'day' and selection:
+            self.show_user(self.page_rows[selection[0]][0])
+
+    def page_count(self):
+        return max(1, -(-self.total // self.page_size))
+
+    def change_page(self, step):
+        page = min(max(0, self.page + step), self.page_count() - 1)
+        if page != self.page:
+            self.page = page
+            self.refresh()
+
+    def refresh(self):
+        offset = self.page * self.page_size
+        start = time.perf_counter()
+        try:
+            if self.mode == 'day':
+                self.total = self.store.attendee_count(self.key)
+                self.page_rows = self.store.attendees(self.key, offset, self.page_size)
+                lines = [f"{user.replace('_', ' ')}   {time.strftime('%H:%M', time.localtime(first))}"
+                         f" - {time.strftime('%H:%M', time.localtime(last))}   ({count} giriş)"
+                         for user, first, last, count in self.page_rows]
+                title = f"{self.key}: {self.total} öğrenci"
+            else:
+                self.total = self.store.history_count(self.key)
+                self.page_rows = self.store.history(self.key, offset, self.page_size)
+                lines = [f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))}   "
+                         f"{'Giriş' if decision == 'success' else 'Başarısız'}   "
+                         f"{'-' if distance is None else f'{distance:.0f}'}   {source}"
+                         for ts, decision, distance, source in self.page_rows]
+                title = f"{self.key.replace('_', ' ')}: {self.total} kayıt"
+        except sqlite3.Error as e:
+            logger.error(f"Hata: Yoklama sorgusu başarısız - {e}")
+            self.total, self.page_rows, lines, title = 0, [], [], "Sorgu başarısız"
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        metrics.observe("report_query", elapsed_ms)
+
+        self.listbox.delete(0, tk.END)
+        for line in lines:
+            self.listbox.insert(tk.END, line)
+        if not lines:
+            self.listbox.insert(tk.END, "Kayıt bulunamadı.")
+        self.page_label.config(text=f"{title} - Sayfa {self.page + 1}/{self.page_count()} ({elapsed_ms:.0f} ms)")
+
+    def close(self):
+        try:
+            self.window.grab_release()
+            self.window.destroy()
+            self.parent_window.grab_set()  # Admin paneli tekrar kipli olsun
+        except tk.TclError:
+            pass
+
+
 # --- Ana Uygulama Penceresi ---
 class MainApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Dershane Otomasyonu - Giriş")
-        self.root.geometry("500x350")
+        self.root.geometry("500x440")
         self.root.configure(bg="white")
         self.root.resizable(False, False)
 
@@ -349,6 +3936,14 @@ class MainApp:
         self.action_button = tk.Button(root, text="Giriş Yap / Kayıt Ol", command=self.handle_action, font=CUSTOM_FONT, bg=DARK_VIOLET, fg="white")
         self.action_button.pack(pady=20)
 
+        # Ad girmeden tüm sınıfı tanıyan sürekli yoklama modu
+        self.attendance_button = tk.Button(root, text="Yoklama Modu", command=self.start_attendance, font=LISTBOX_FONT, bg="white", fg=DARK_VIOLET)
+        self.attendance_button.pack(pady=5)
+
+        # Arka plan eğitim durumu
+        self.status_label = tk.Label(root, text="", font=LISTBOX_FONT, bg="white", fg="grey")
+        self.status_label.pack(pady=5)
+
         # Giriş yapan kullanıcıyı saklamak için
         self.current_login_user = None
 
@@ -358,8 +3953,27 @@ class MainApp:
         self.root.bind("<<LoginFailed>>", self.on_login_failed)
         self.root.bind("<<CaptureCancelled>>", self.on_capture_cancelled)
 
-        # Başlangıçta modeli yükle
-        load_trained_data()
+        # Girişler arasında açık kalan kamera
+        self.camera = CameraService()
+
+        # F3: günlükleri çalışırken aç/kapat
+        self.root.bind("<F3>", lambda event: set_log_level("INFO" if logger.disabled else "OFF"))
+
+        # Eğitim işlerini arka planda çalıştıran işçi
+        self.training_worker = TrainingWorker()
+        self.root.after(100, self.poll_training_events)
+
+        # Diğer kiosklarda yayınlanan model nesilleri arka planda devreye alınır
+        self.model_watcher = None
+        if MODEL_POLL_INTERVAL:
+            self.model_watcher = ModelWatcher(
+                on_change=lambda generation: self.training_worker.events.put(('reloaded', 'watch', generation)))
+
+        # Kaskad ve model arka planda yüklenir; hazır olana kadar giriş düğmeleri kapalı
+        self.action_button.config(state="disabled")
+        self.attendance_button.config(state="disabled")
+        self.status_label.config(text="Sistem hazırlanıyor...", fg="grey")
+        self.training_worker.submit_load()
 
 
     def handle_action(self):
@@ -369,8 +3983,7 @@ class MainApp:
         # Önce Admin kontrolü
         if name.lower() == ADMIN_USER and not surname:
             user_name = ADMIN_USER
-            admin_dir = os.path.join(DATA_DIR, ADMIN_USER)
-            if not os.path.exists(admin_dir):
+            if not get_sample_store().has_user(ADMIN_USER):
                 # Admin ilk kez kayıt oluyor
                 messagebox.showinfo("Admin Kayıt", f"'{ADMIN_USER}' olarak ilk kayıt işlemi yapılacak. Lütfen {REQUIRED_REGISTER_IMAGES} adet yüz verisi sağlayın.", parent=self.root)
                 self.start_capture('register', user_name, REQUIRED_REGISTER_IMAGES)
@@ -387,9 +4000,8 @@ class MainApp:
             # Kullanıcı adını oluştur (Türkçe karakterleri de koruyabiliriz veya değiştirebiliriz)
             # Şimdilik boşlukları alt çizgi yapalım
             user_name = f"{name}_{surname}".replace(" ", "_")
-            user_dir = os.path.join(DATA_DIR, user_name)
 
-            if os.path.exists(user_dir):
+            if get_sample_store().has_user(user_name):
                 # Kullanıcı var, giriş yapmayı dene
                 self.start_capture('login', user_name, REQUIRED_LOGIN_IMAGES)
             else:
@@ -407,24 +4019,75 @@ class MainApp:
         # Giriş yapan kullanıcıyı sakla
         self.current_login_user = user_name if mode == 'login' else None
 
-        self.capture_app = FaceCaptureApp(self.root, mode, user_name, num_images)
+        self.capture_app = FaceCaptureApp(self.root, mode, user_name, num_images, self.camera)
+
+
+    def start_attendance(self):
+        self.attendance_app = AttendanceApp(self.root, self.camera)
 
 
     def on_registration_complete(self, event):
-        print("Ana pencere: Kayıt tamamlandı sinyali alındı.")
-        if train_model():
-             messagebox.showinfo("Model Eğitildi", "Yeni verilerle model başarıyla eğitildi.", parent=self.root)
-        else:
-             messagebox.showwarning("Model Eğitilemedi", "Model eğitimi sırasında bir sorun oluştu.", parent=self.root)
+        logger.debug("Ana pencere: Kayıt tamamlandı sinyali alındı.")
+        # Tüm veriyi yeniden eğitmek yerine sadece yeni kullanıcının örneklerini ekle.
+        # Eğitim arka planda yapılır; sonuç poll_training_events ile bildirilir.
+        self.training_worker.submit_enroll(self.capture_app.user_name)
+        self.status_label.config(text="Model eğitimi sıraya alındı...")
         # self.root.attributes('-disabled', False) # Devre dışı bırakmadıysak etkinleştirmeye gerek yok
         self.root.focus_set() # Odağı geri al
 
+    def poll_training_events(self):
+        try:
+            while True:
+                event = self.training_worker.events.get_nowait()
+                kind = event[0]
+                if kind == 'reloaded':
+                    if not self.training_worker.busy:
+                        self.status_label.config(text=f"Model güncellendi (nesil {event[2]}).", fg="green")
+                    continue
+                if event[1] == 'load':
+                    if kind == 'done':
+                        self.on_ready(event[2])
+                    elif kind == 'progress':
+                        self.status_label.config(text=event[2], fg="grey")  # Taşıma sürüyor; düğmeler kapalı
+                    continue
+                if kind == 'started':
+                    self.status_label.config(text="Model eğitiliyor...", fg="grey")
+                elif kind == 'progress':
+                    self.status_label.config(text=event[2], fg="grey")
+                elif kind == 'done':
+                    ok = event[2]
+                    if self.training_worker.busy:
+                        continue
+                    if ok:
+                        self.status_label.config(text="Model güncel.", fg="green")
+                    else:
+                        self.status_label.config(text="Model eğitilemedi.", fg="red")
+                    # Pencere sadece kullanıcının başlattığı işler (kayıt, silme) için açılır;
+                    # arka plan işleri (eski verilerin taşınması gibi) sadece durum satırını günceller
+                    if event[1] not in USER_TRAINING_JOBS:
+                        continue
+                    if ok:
+                        messagebox.showinfo("Model Eğitildi", "Yeni verilerle model başarıyla eğitildi.", parent=self.root)
+                    else:
+                        messagebox.showwarning("Model Eğitilemedi", "Model eğitimi sırasında bir sorun oluştu.", parent=self.root)
+        except queue.Empty:
+            pass
+        self.root.after(100, self.poll_training_events)
+
+    def on_ready(self, model_loaded):
+        self.action_button.config(state="normal")
+        self.attendance_button.config(state="normal")
+        if model_loaded:
+            self.status_label.config(text="Hazır.", fg="green")
+        else:
+            self.status_label.config(text="Hazır (eğitilmiş model yok).", fg="grey")
+
     def on_login_success(self, event):
-        print("Ana pencere: Giriş başarılı sinyali alındı.")
+        logger.debug("Ana pencere: Giriş başarılı sinyali alındı.")
         self.root.focus_set()
 
         if self.current_login_user == ADMIN_USER:
-            print("Admin girişi başarılı. Dashboard açılıyor.")
+            logger.info("Admin girişi başarılı. Dashboard açılıyor.")
             self.show_admin_dashboard()
         else:
             # Normal kullanıcı için mesaj artık fade_and_close'da gösteriliyor
@@ -436,7 +4099,7 @@ class MainApp:
 
 
     def on_login_failed(self, event):
-        print("Ana pencere: Giriş başarısız sinyali alındı.")
+        logger.debug("Ana pencere: Giriş başarısız sinyali alındı.")
         # Giriş başarısız olduğunda yapılacaklar (mesaj zaten FaceCaptureApp'te gösterildi)
         # self.root.attributes('-disabled', False) # Etkinleştir
         self.root.focus_set()
@@ -444,171 +4107,91 @@ class MainApp:
 
 
     def on_capture_cancelled(self, event):
-        print("Ana pencere: Yakalama iptal edildi sinyali alındı.")
+        logger.debug("Ana pencere: Yakalama iptal edildi sinyali alındı.")
         # Kullanıcı yakalama penceresini kapattığında
         # self.root.attributes('-disabled', False) # Etkinleştir
         self.root.focus_set()
 
-    # --- Gerekli importlara ekleme ---
-    from tkinter import Canvas, BOTH, YES, NW  # Canvas ve diğer sabitler için
-
-    # ... (Kodun geri kalanı aynı) ...
-
-    # --- Ana Uygulama Sınıfı ---
-    class MainApp:
-        # ... ( __init__ , handle_action, start_capture metodları aynı) ...
-        # ... ( on_registration_complete, on_login_success*, on_login_failed, on_capture_cancelled metodları aynı - *on_login_success içinde show_admin_dashboard çağrısı kalıyor ) ...
-
-        # ... (MainApp sınıfının diğer metodları aynı) ...
-
-        # ... (MainApp sınıfının diğer metodları aynı) ...
-
-        def show_admin_dashboard(self):
-            dashboard_window = tk.Toplevel(self.root)
-            dashboard_window.title("Admin Paneli - Kayıtlı Kullanıcılar ve Yüz Verileri")
-            dashboard_window.geometry("600x600")  # Pencereyi biraz büyütelim
-            dashboard_window.configure(bg="white")
-            dashboard_window.transient(self.root)
-            dashboard_window.grab_set()
-
-            title_label = tk.Label(dashboard_window, text="Kayıtlı Kullanıcılar ve Yüz Örnekleri",
-                                   font=(FONT_FAMILY, FONT_SIZE, "bold"), bg="white", fg=DARK_VIOLET)
-            title_label.pack(pady=10)
-
-            # --- Kaydırılabilir Çerçeve Oluşturma ---
-            main_frame = Frame(dashboard_window, bg="white")
-            main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-            my_canvas = tk.Canvas(main_frame, bg="white", highlightthickness=0)
-            my_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-            scrollbar = Scrollbar(main_frame, orient="vertical", command=my_canvas.yview)
-            scrollbar.pack(side=tk.RIGHT, fill="y")
-
-            my_canvas.configure(yscrollcommand=scrollbar.set)
-
-            user_display_frame = Frame(my_canvas, bg="white")
-            my_canvas.create_window((0, 0), window=user_display_frame, anchor=tk.NW)
-
-            print("--- Admin Dashboard Açılıyor ---")  # DEBUG
-
-            # Scrollbar'ı ayarlamak için iç çerçevenin boyut değişikliklerini dinle
-            def on_frame_configure(event):
-                # --- DEĞİŞİKLİK BURADA ---
-                # Canvas'ın kaydırma bölgesini, içeriği tutan çerçevenin
-                # hesaplanan gerekli boyutlarına göre ayarla.
-                # bbox("all") yerine winfo_reqwidth/height kullan.
-                scroll_width = user_display_frame.winfo_reqwidth()
-                scroll_height = user_display_frame.winfo_reqheight()
-                my_canvas.configure(scrollregion=(0, 0, scroll_width, scroll_height))
-                # --- DEĞİŞİKLİK SONU ---
-                print(
-                    f"DEBUG: Frame configured. Scroll region set to: (0, 0, {scroll_width}, {scroll_height}) based on user_display_frame size")  # DEBUG
-
-            user_display_frame.bind("<Configure>", on_frame_configure)
-
-            def on_mouse_wheel(event):
-                # Windows/MacOS için delta, Linux için num (4 yukarı, 5 aşağı)
-                if hasattr(event, 'delta'):  # Windows/MacOS
-                    delta = -1 * int(event.delta / 120)
-                elif event.num == 4:  # Linux yukarı
-                    delta = -1
-                elif event.num == 5:  # Linux aşağı
-                    delta = 1
-                else:  # Diğer durumlar?
-                    delta = 0
-
-                if delta != 0:
-                    my_canvas.yview_scroll(delta, "units")
-                    # print(f"DEBUG: Mouse wheel scroll: {delta}") # İsteğe bağlı debug
-
-            # Bind events - Farklı platformlar için
-            dashboard_window.bind_all("<MouseWheel>", on_mouse_wheel)
-            dashboard_window.bind_all("<Button-4>", on_mouse_wheel)
-            dashboard_window.bind_all("<Button-5>", on_mouse_wheel)
-            # --- Kaydırılabilir Çerçeve Sonu ---
-
-            # --- Kullanıcıları ve Resimleri Listele ---
-            THUMBNAIL_SIZE = (100, 100)
-            print(f"DEBUG: Kullanıcılar aranıyor: {DATA_DIR}")  # DEBUG
-            try:
-                registered_users = [d for d in os.listdir(DATA_DIR) if os.path.isdir(os.path.join(DATA_DIR, d))]
-                registered_users.sort()
-                print(f"DEBUG: Bulunan kullanıcı dizinleri: {registered_users}")  # DEBUG
-
-                if not registered_users:
-                    no_user_label = tk.Label(user_display_frame, text="Hiç kayıtlı kullanıcı bulunamadı.",
-                                             font=LISTBOX_FONT, bg="white")
-                    no_user_label.pack(pady=10)
-                    print("DEBUG: Kayıtlı kullanıcı bulunamadı.")  # DEBUG
-                else:
-                    for user_dirname in registered_users:
-                        print(f"DEBUG: Kullanıcı işleniyor: {user_dirname}")  # DEBUG
-                        user_frame = Frame(user_display_frame, bg="white", bd=1, relief="solid")
-
-                        display_name = user_dirname.replace('_', ' ')
-                        name_label = tk.Label(user_frame, text=display_name, font=LISTBOX_FONT, bg="white", anchor="w")
-                        name_label.pack(side="left", padx=10, pady=5)
-
-                        user_dir_path = os.path.join(DATA_DIR, user_dirname)
-                        first_image_path = None
-                        try:
-                            for filename in os.listdir(user_dir_path):
-                                if filename.lower().endswith((".png", ".jpg", ".jpeg")):
-                                    first_image_path = os.path.join(user_dir_path, filename)
-                                    # print(f"DEBUG:   -> Resim bulundu: {filename}") # İsteğe bağlı debug
-                                    break
-                        except Exception as list_err:
-                            print(f"HATA: {user_dir_path} klasörü okunurken hata: {list_err}")
-
-                        img_label = tk.Label(user_frame, bg="white")
-                        img_label.pack(side="right", padx=10, pady=5)
-
-                        if first_image_path:
-                            try:
-                                img = Image.open(first_image_path)
-                                img.thumbnail(THUMBNAIL_SIZE)
-                                photo = ImageTk.PhotoImage(img)
-                                img_label.config(image=photo)
-                                img_label.image = photo  # Referansı sakla!
-                            except Exception as e:
-                                print(f"HATA: {first_image_path} yüklenemedi/işlenemedi - {e}")
-                                img_label.config(text="[Resim Hatalı]", font=("Arial", 8), fg="red")
-                        else:
-                            # print(f"DEBUG:   -> {user_dirname} için resim bulunamadı.") # İsteğe bağlı debug
-                            img_label.config(text="[Resim Yok]", font=("Arial", 8))
-
-                        user_frame.pack(fill="x", pady=5, padx=5)
-                        # print(f"DEBUG: {user_dirname} çerçevesi eklendi.") # İsteğe bağlı debug
-
-                    # Döngü bittikten sonra çerçeve boyutunu güncellemeye zorla
-                    user_display_frame.update_idletasks()
-                    print("--- Kullanıcı listeleme tamamlandı ---")  # DEBUG
-                    # on_frame_configure fonksiyonunun çağrılması için update sonrasında manuel tetikleme gerekebilir mi?
-                    # Genellikle gerekmez, bind yeterli olmalı.
-
-            except FileNotFoundError:
-                print(f"HATA: Veri klasörü bulunamadı: {DATA_DIR}")  # DEBUG
-                error_label = tk.Label(user_display_frame, text="Hata: Veri klasörü bulunamadı!", font=LISTBOX_FONT,
-                                       bg="white", fg="red")
-                error_label.pack(pady=10)
-            except Exception as e:
-                print(f"HATA: Kullanıcılar listelenirken genel hata: {e}")  # DEBUG
-                error_label = tk.Label(user_display_frame, text=f"Hata: Kullanıcılar listelenemedi - {e}",
-                                       font=LISTBOX_FONT, bg="white", fg="red")
-                error_label.pack(pady=10)
-
-            # Kapat Butonu
-            close_button = tk.Button(dashboard_window, text="Kapat", command=dashboard_window.destroy, font=CUSTOM_FONT,
-                                     bg="grey", fg="white")
-            close_button.pack(pady=10, side="bottom")
-
-        # ... (MainApp sınıfının geri kalanı aynı) ...
-
+    def show_admin_dashboard(self):
+        self.admin_dashboard = AdminDashboard(self.root, on_delete=self.training_worker.submit_delete)
 
 
 # --- Uygulamayı Başlat ---
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = MainApp(root)
-    root.mainloop()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Dershane Otomasyonu - Yüz Tanıma ile Giriş")
+    parser.add_argument("--measure-detection", metavar="KAYNAK",
+                        help="Video dosyası veya kamera indeksi üzerinde algılama süresini ölç (öncesi/sonrası)")
+    parser.add_argument("--migrate-face-data", action="store_true",
+                        help=f"{DATA_DIR}/ klasöründeki PNG örneklerini paketlenmiş depoya taşı ve modeli yeniden eğit")
+    parser.add_argument("--train", action="store_true", help="Modeli sıfırdan yeniden eğit")
+    parser.add_argument("--delete-user", metavar="İSİM",
+                        help="Kullanıcının (Ad_Soyad) yüz verilerini sil ve modeli yeniden eğit")
+    parser.add_argument("--compact-samples", action="store_true",
+                        help="Kullanıcı başına neredeyse aynı/bulanık örnekleri at, modeli yeniden eğit ve küçülmeyi raporla")
+    parser.add_argument("--dry-run", action="store_true", help="--compact-samples: sadece raporla, değişiklik yapma")
+    parser.add_argument("--export-yaml", metavar="DOSYA", help="Eğitilmiş modeli OpenCV YAML biçiminde dışa aktar")
+    parser.add_argument("--export-attendance", metavar="GÜN", nargs="?", const=time.strftime("%Y-%m-%d"),
+                        help=f"Günün (YYYY-AA-GG, varsayılan bugün) yoklamasını {ATTENDANCE_FILE} dosyasına yaz")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Örnek yükleme / toplu tanıma / çok kameralı mod için işçi sayısı (varsayılan: {TRAINING_WORKERS})")
+    parser.add_argument("--recognize", metavar="KAYNAK", nargs="+",
+                        help="Resim klasörleri/dosyaları veya video dosyaları üzerinde ekransız toplu tanıma")
+    parser.add_argument("--output", default="tanima_sonuclari.csv",
+                        help="Toplu tanıma çıktısı (.csv veya .jsonl)")
+    parser.add_argument("--multi-camera", metavar="KAYNAK", nargs="+",
+                        help="Her kaynak (kamera indeksi, video dosyası, rtsp://...) için ayrı süreçle çok kameralı yoklama")
+    parser.add_argument("--duration", type=float, metavar="SN",
+                        help="--multi-camera: arayüzsüz bu kadar saniye çalış ve kare hızlarını raporla")
+    parser.add_argument("--frame-step", type=int, default=1, help="Videolarda her N karede bir işle")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Toplu tanımada grup boyutu")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR", "OFF"],
+                        help="Günlük seviyesi (arayüzde F3 ile açılıp kapatılabilir)")
+    parser.add_argument("--metrics-file", metavar="DOSYA",
+                        help="Aşama sürelerini bu dosyaya yaz (.json: JSON, diğerleri: Prometheus metni)")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="Aşama sürelerini http://127.0.0.1:PORT/metrics adresinden sun")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(message)s")
+    set_log_level(args.log_level)
+    if args.workers is not None:
+        TRAINING_WORKERS = max(1, args.workers)
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    if args.metrics_file:
+        metrics.start_file_export(args.metrics_file)
+
+    if args.recognize:
+        recognize_batch(args.recognize, args.output, batch_size=args.batch_size, frame_step=max(1, args.frame_step))
+    elif args.multi_camera:
+        run_multi_camera(args.multi_camera, args.workers, args.duration)
+    elif args.compact_samples:
+        compact_samples(dry_run=args.dry_run)
+    elif args.train:
+        train_model()
+    elif args.delete_user:
+        if get_sample_store().has_user(args.delete_user):
+            delete_user(args.delete_user)
+        else:
+            logger.error(f"Hata: '{args.delete_user}' isimli kayıtlı kullanıcı yok.")
+    elif args.export_attendance:
+        count = export_attendance(args.export_attendance)
+        logger.info(f"{args.export_attendance}: {count} kayıt '{ATTENDANCE_FILE}' dosyasına yazıldı.")
+    elif args.export_yaml:
+        if load_trained_data():
+            get_model()[0].export_yaml(args.export_yaml)
+            logger.info(f"Model '{args.export_yaml}' olarak dışa aktarıldı.")
+    elif args.migrate_face_data:
+        if sync_face_data():
+            train_model()
+    elif args.measure_detection is not None:
+        source = int(args.measure_detection) if args.measure_detection.isdigit() else args.measure_detection
+        measure_detection(source)
+    else:
+        root = tk.Tk()
+        app = MainApp(root)
+        root.mainloop()
+        app.camera.close()
+        attendance_store.close()  # Kuyrukta bekleyen olayları yaz
+    if args.metrics_file:
+        metrics.write(args.metrics_file)
\ No newline at end of file